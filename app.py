@@ -4,23 +4,36 @@
 """
 
 import os
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, flash
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy import distinct, func
 from datetime import datetime, timedelta
 import json
 
 from config.config import config
 from models.database import (
     db, WebsiteConfig, KeywordConfig, CrawledPost, 
-    CrawledComment, PushRecord, TaskSchedule, SystemLog
+    CrawledComment, PushRecord, TaskSchedule, SystemLog, StatCounter
 )
-from sqlalchemy import or_
+from models.sqlite_profile import configure_app as configure_sqlite
 from services.crawler_service import CrawlerService
 from services.feishu_service import FeishuService
 from services.data_filter_service import DataFilterService
 from services.scheduler_service import scheduler_service
 from services.resumable_service import resumable_service
+from services.seen_filter import seen_posts
+from services.summary_worker_pool import summary_pool
+from services.search_service import FullTextIndex
+from services.pagination import keyset_paginate, InvalidCursor
+from services.stat_counters import StatCounters, CRAWLED_POST_COUNTERS
+from services.export_service import Export, ExportError, CRAWLED_DATASETS
+from services.analytics_service import get_post_analytics, AnalyticsError
+
+# 帖子全文搜索索引（标题权重最高，其次AI总结）
+post_search_index = FullTextIndex(db, CrawledPost, ['title', 'content', 'ai_summary'], weights=[10.0, 1.0, 3.0])
+# 帖子统计计数器（总数、未存档数，按日期和来源）
+post_stat_counters = StatCounters(db, StatCounter, CRAWLED_POST_COUNTERS)
 
 def create_app():
     """创建Flask应用"""
@@ -30,6 +43,7 @@ def create_app():
     app.config['SECRET_KEY'] = config.secret_key
     app.config['SQLALCHEMY_DATABASE_URI'] = config.database.uri
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = config.database.track_modifications
+    configure_sqlite(app, config.database.sqlite_profile)
     
     # 初始化扩展
     db.init_app(app)
@@ -49,14 +63,14 @@ def create_app():
         keyword = request.args.get('keyword', '')
         
         # 构建查询
-        query = CrawledPost.query.filter_by(is_archived=False)
+        query = CrawledPost.query.options(*CrawledPost.preview_options()).filter_by(is_archived=False)
         
         # 按来源筛选
         if source:
             query = query.filter(CrawledPost.source_website == source)
         
-        # 按日期筛选
-        today = datetime.now().date()
+        # 按日期筛选（created_at 与统计计数的日期键均为UTC时间）
+        today = datetime.utcnow().date()
         if date_filter == 'today':
             query = query.filter(CrawledPost.created_at >= datetime.combine(today, datetime.min.time()))
         elif date_filter == 'week':
@@ -68,31 +82,21 @@ def create_app():
         
         # 按关键词搜索
         if keyword:
-            query = query.filter(
-                or_(
-                    CrawledPost.title.contains(keyword),
-                    CrawledPost.content.contains(keyword),
-                    CrawledPost.ai_summary.contains(keyword)
-                )
-            )
+            query = post_search_index.filter_query(query, keyword)
         
         # 获取内容列表
         posts = query.order_by(CrawledPost.created_at.desc()).limit(20).all()
         
-        # 获取统计数据
-        today_start = datetime.combine(today, datetime.min.time())
+        # 获取统计数据（读取统计计数表）
+        source_counts = post_stat_counters.get_scope('posts', 'source')
         stats = {
-            'today_posts': CrawledPost.query.filter(
-                CrawledPost.created_at >= today_start,
-                CrawledPost.is_archived == False
-            ).count(),
-            'total_posts': CrawledPost.query.filter_by(is_archived=False).count(),
-            'active_sources': db.session.query(CrawledPost.source_website).distinct().count()
+            'today_posts': post_stat_counters.get('unarchived', 'day', today.isoformat()),
+            'total_posts': post_stat_counters.get('unarchived'),
+            'active_sources': len(source_counts)
         }
         
         # 获取所有来源列表
-        sources = db.session.query(CrawledPost.source_website).distinct().all()
-        sources = [s[0] for s in sources if s[0]]
+        sources = sorted(source for source in source_counts if source)
         
         return render_template('dashboard.html', 
                              posts=posts,
@@ -176,14 +180,14 @@ def create_app():
     @app.route('/posts')
     def posts():
         """帖子管理页面"""
-        page = request.args.get('page', 1, type=int)
-        per_page = 20
+        cursor = request.args.get('cursor')
+        direction = request.args.get('direction', 'next')
+        list_query = CrawledPost.query.options(*CrawledPost.preview_options())
         
-        posts = CrawledPost.query.order_by(
-            CrawledPost.created_at.desc()
-        ).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        try:
+            posts = keyset_paginate(list_query, CrawledPost, cursor=cursor, direction=direction)
+        except InvalidCursor:
+            posts = keyset_paginate(list_query, CrawledPost)
         
         return render_template('posts.html', posts=posts)
     
@@ -295,11 +299,10 @@ def create_app():
         """统计数据API"""
         stats = {
             'posts': {
-                'total': CrawledPost.query.count(),
-                'today': CrawledPost.query.filter(
-                    CrawledPost.created_at >= datetime.now().replace(hour=0, minute=0, second=0)
-                ).count(),
-                'pushed': CrawledPost.query.filter_by(is_pushed=True).count()
+                'total': post_stat_counters.get('posts'),
+                'today': post_stat_counters.get('posts', 'day', datetime.utcnow().date().isoformat()),
+                'pushed': db.session.query(func.count(distinct(PushRecord.post_id)))
+                    .filter(PushRecord.status == 'success').scalar()
             },
             'websites': {
                 'total': WebsiteConfig.query.count(),
@@ -312,10 +315,27 @@ def create_app():
             'tasks': {
                 'total': TaskSchedule.query.count(),
                 'active': TaskSchedule.query.filter_by(is_active=True).count()
-            }
+            },
+            'seen_filter': seen_posts.stats(),
+            'ai_summary': summary_pool.stats()
         }
         return jsonify(stats)
     
+    @app.route('/api/analytics/<report>')
+    def api_analytics(report):
+        """趋势分析API（report: volume/engagement/wow；参数 dimension=platform|keyword，days，top，refresh=1 忽略缓存）"""
+        try:
+            result = get_post_analytics().report(
+                report,
+                dimension=request.args.get('dimension'),
+                days=request.args.get('days', 30, type=int),
+                top=request.args.get('top', 10, type=int),
+                refresh=request.args.get('refresh', '0') == '1'
+            )
+            return jsonify({'success': True, **result})
+        except AnalyticsError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+    
     @app.route('/history')
     def crawl_history():
         """爬取历史页面"""
@@ -449,7 +469,7 @@ def create_app():
         source = request.args.get('source', '')
         
         # 构建查询 - 只显示已存档的内容
-        query = CrawledPost.query.filter_by(is_archived=True)
+        query = CrawledPost.query.options(*CrawledPost.preview_options()).filter_by(is_archived=True)
         
         if date_str:
             try:
@@ -516,15 +536,31 @@ def create_app():
             db.session.rollback()
             return jsonify({'success': False, 'message': f'删除失败: {str(e)}'})
     
+    @app.route('/api/export/posts')
+    def export_posts():
+        """流式导出帖子（参数 format=jsonl|csv，compression=gzip|zstd|none，
+        start_date、end_date 为 YYYY-MM-DD，platform 为来源网站，archived=1/0）"""
+        try:
+            export = Export.from_args(CRAWLED_DATASETS, 'posts', request.args)
+        except ExportError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        
+        return Response(export.iter_bytes(db.engine), mimetype=export.mimetype,
+                        headers={'Content-Disposition': f'attachment; filename={export.filename}'})
+    
     return app
 
 def init_database():
     """初始化数据库"""
     db.create_all()
+    post_search_index.ensure()
+    post_stat_counters.ensure()
+    CrawlerService().warm_seen_filter()
 
 def start_scheduler():
     """启动任务调度器"""
     scheduler_service.start()
+    scheduler_service.add_stats_reconcile_job()
     
     # 加载数据库中的任务
     tasks = TaskSchedule.query.filter_by(is_active=True).all()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+趋势分析基准测试
+对比原有方式（查询 ORM 对象后用字典循环计数）与 services/analytics_service.py（一次查询读入 DataFrame，
+向量化计算）统计最近30天按来源和关键词的每日发帖量的耗时
+
+用法: python benchmarks/bench_analytics.py [帖子数]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import insert
+from models.database import db, CrawledPost
+from services.analytics_service import crawled_post_analytics
+
+KEYWORDS = [f'keyword{i}' for i in range(30)]
+SOURCES = ['Reddit', 'Facebook', 'Kickstarter', 'Indiegogo', 'YouTube']
+
+
+def seed(count: int):
+    now = datetime.now()
+    for offset in range(0, count, 5000):
+        db.session.execute(insert(CrawledPost.__table__), [{
+            'title': f'post {i}',
+            'content': 'content ' * 300,
+            'post_url': f'https://example.com/p/{i}',
+            'source_website': random.choice(SOURCES),
+            'matched_keywords': random.sample(KEYWORDS, random.randint(0, 3)),
+            'likes_count': random.randint(0, 500),
+            'comments_count': random.randint(0, 50),
+            'created_at': now - timedelta(minutes=random.randint(0, 60 * 24 * 30)),
+        } for i in range(offset, min(offset + 5000, count))])
+    db.session.commit()
+
+
+def loop_volumes(days: int):
+    """原有方式：逐个帖子对象累加字典"""
+    start = datetime.combine(datetime.now().date() - timedelta(days=days - 1), datetime.min.time())
+    by_source, by_keyword = {}, {}
+    for post in CrawledPost.query.filter(CrawledPost.created_at >= start).all():
+        day = post.created_at.date().isoformat()
+        by_source[(day, post.source_website)] = by_source.get((day, post.source_website), 0) + 1
+        for keyword in post.matched_keywords or []:
+            by_keyword[(day, keyword)] = by_keyword.get((day, keyword), 0) + 1
+    return by_source, by_keyword
+
+
+def frame_volumes(analytics, days: int):
+    frame = analytics.load_frame(days)
+    return analytics.daily_volume(frame, 'platform', days), analytics.daily_volume(frame, 'keyword', days, top=30)
+
+
+def timed(run, repeat: int = 3) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        run()
+        db.session.expunge_all()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    random.seed(42)
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        seed(count)
+        analytics = crawled_post_analytics(db)
+        print(f"帖子 {count} 条（30天内），统计按来源、关键词的每日发帖量")
+        print(f"  字典循环: {timed(lambda: loop_volumes(30)):8.1f} ms")
+        print(f"  DataFrame: {timed(lambda: frame_volumes(analytics, 30)):8.1f} ms")
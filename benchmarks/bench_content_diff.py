@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+网页差异引擎基准测试
+对比原 difflib / 子串扫描实现与块指纹实现的耗时和输出
+
+用法: python benchmarks/bench_content_diff.py [条目数...]
+"""
+
+import difflib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from crawlers.content_diff import split_blocks, fingerprint_blocks, added_blocks, new_content_blocks
+
+BLOCK_TAGS = ['article', 'section', 'div', 'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+
+
+def legacy_added_lines(old_content: str, new_content: str):
+    """原实现：difflib.unified_diff 提取新增行"""
+    differ = difflib.unified_diff(old_content.split('\n'), new_content.split('\n'), lineterm='', n=0)
+    added_lines = []
+    for line in differ:
+        if line.startswith('+ ') or line.startswith('+'):
+            clean_line = line[1:].strip()
+            if clean_line and len(clean_line) > 3:
+                added_lines.append(clean_line)
+    return added_lines
+
+
+def legacy_block_differences(old_content: str, soup: BeautifulSoup):
+    """原实现：每个内容块在旧文本中做子串扫描"""
+    blocks = []
+    for tag in soup.find_all(BLOCK_TAGS):
+        block_text = tag.get_text(strip=True)
+        if block_text and len(block_text) > 20 and block_text not in old_content:
+            blocks.append(block_text)
+    return blocks
+
+
+def block_added_lines(old_content: str, new_content: str):
+    return added_blocks(fingerprint_blocks(split_blocks(old_content)), split_blocks(new_content))
+
+
+def block_block_differences(old_content: str, soup: BeautifulSoup):
+    tags = soup.find_all(BLOCK_TAGS)
+    return new_content_blocks(fingerprint_blocks(split_blocks(old_content)), (tag.stripped_strings for tag in tags))
+
+
+def make_changelog(entries: int, seed: int = 42) -> list:
+    """生成更新日志式的条目（每条：标题 + 2段说明）"""
+    rng = random.Random(seed)
+    words = ['fix', 'laser', 'engrave', 'firmware', 'camera', 'focus', 'speed', 'power',
+             'material', 'profile', 'update', 'crash', 'preview', 'layer', 'export']
+    items = []
+    for i in range(entries):
+        notes = [' '.join(rng.choice(words) for _ in range(12)) + f' #{i}-{j}' for j in range(2)]
+        items.append((f'Version 1.{i}', notes))
+    return items
+
+
+def render(items) -> str:
+    parts = ['<html><body><main>']
+    for title, notes in items:
+        parts.append(f'<div class="entry"><h3>{title}</h3>')
+        parts.extend(f'<p>{note}</p>' for note in notes)
+        parts.append('</div>')
+    parts.append('</main></body></html>')
+    return ''.join(parts)
+
+
+def page_text(html: str):
+    soup = BeautifulSoup(html, 'html.parser')
+    return soup, soup.get_text(separator='\n', strip=True)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def compare_lines(label: str, old_text: str, new_text: str):
+    legacy_lines, legacy_time = timed(legacy_added_lines, old_text, new_text)
+    block_lines, block_time = timed(block_added_lines, old_text, new_text)
+    print(f"  {label}  difflib : {legacy_time * 1000:9.1f} ms  ({len(legacy_lines)} 行)")
+    print(f"  {label}  块指纹  : {block_time * 1000:9.1f} ms  ({len(block_lines)} 行)"
+          f"  输出一致: {legacy_lines == block_lines}")
+
+
+def run(entries: int):
+    items = make_changelog(entries)
+    # 版本A：顶部插入10条新条目，中间修改5段说明
+    new_items = make_changelog(10, seed=7)
+    new_items = [(f'Version 2.{i}', notes) for i, (_, notes) in enumerate(new_items)] + list(items)
+    for k in range(5):
+        index = 10 + (k + 1) * entries // 6
+        title, notes = new_items[index]
+        new_items[index] = (title, [notes[0] + ' (revised)', notes[1]])
+    # 版本B：每7条修改一段说明（如价格、计数类页面的分散变化）
+    scattered_items = [(title, [notes[0] + ' (revised)', notes[1]]) if i % 7 == 0 else (title, notes)
+                       for i, (title, notes) in enumerate(items)]
+
+    _, old_text = page_text(render(items))
+    _, new_text = page_text(render(new_items))
+    _, scattered_text = page_text(render(scattered_items))
+
+    # 块级差异使用仅删除内容的版本（行级无新增时才会走到这一步）
+    removed_soup, _ = page_text(render(items[5:]))
+    legacy_blocks, legacy_block_time = timed(legacy_block_differences, old_text, removed_soup)
+    block_blocks, block_block_time = timed(block_block_differences, old_text, removed_soup)
+
+    print(f"\n条目数: {entries}  旧文本: {len(old_text) / 1024:.0f} KB  新文本: {len(new_text) / 1024:.0f} KB")
+    compare_lines('顶部新增', old_text, new_text)
+    compare_lines('分散修改', old_text, scattered_text)
+    print(f"  内容块   子串扫描: {legacy_block_time * 1000:9.1f} ms  ({len(legacy_blocks)} 块)")
+    print(f"  内容块   块指纹  : {block_block_time * 1000:9.1f} ms  ({len(block_blocks)} 块)")
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [500, 2000, 5000]
+    for size in sizes:
+        run(size)
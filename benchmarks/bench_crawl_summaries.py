@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+爬取后AI总结基准测试（模拟模型延迟，不调用真实API）
+对比原有方式（爬取循环中逐条同步生成总结）与 services/summary_worker_pool.py（提交到工作池后继续爬取，
+逐条或批量请求）在多个网站各保存一批帖子时，爬取阶段的耗时、全部总结写回数据库的耗时和模型调用次数。
+模拟的延迟 = 每次请求的固定开销 + 每条总结的生成耗时，批量输出中约5%的条目缺失，由单条请求补齐
+
+用法: python benchmarks/bench_crawl_summaries.py [每个网站的帖子数] [时间缩放比例]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import func
+from models.database import db, CrawledPost
+from services.ai_summary_service import AISummaryService, BATCH_MARKER
+from services.summary_worker_pool import SummaryWorkerPool
+
+WEBSITES = 3
+CRAWL_SECONDS = 0.5  # 模拟每个网站的页面抓取耗时
+REQUEST_SECONDS = 1.0  # 每次请求的固定开销（网络往返、排队、预填充）
+SUMMARY_SECONDS = 0.6  # 每条总结的生成耗时
+
+
+class SimulatedModel:
+    def __init__(self, scale: float):
+        self.scale = scale
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def request(self, prompt: str, max_tokens: int):
+        with self._lock:
+            self.calls += 1
+            call = self.calls
+        numbers = [int(marker.group(1)) for marker in BATCH_MARKER.finditer(prompt)]
+        time.sleep((REQUEST_SECONDS + SUMMARY_SECONDS * max(len(numbers), 1)) * self.scale)
+        if not numbers:
+            return "单条总结", True
+        # 每20条漏掉一条，模拟模型没有按格式输出
+        return "\n".join(f"[[{number}]]\n第{number}条总结" for number in numbers
+                         if (call * 7 + number) % 20), True
+
+
+def make_summarizer(model: SimulatedModel, batch_size: int) -> AISummaryService:
+    summarizer = AISummaryService()
+    summarizer.gemini_api_key = 'simulated'
+    summarizer.batch_size = batch_size
+    summarizer._gemini_request = model.request
+    return summarizer
+
+
+def crawl_website(site: int, count: int, scale: float):
+    """模拟抓取并批量保存一个网站的帖子"""
+    time.sleep(CRAWL_SECONDS * scale)
+    posts = [CrawledPost(title=f'site{site} post {i}', content='content ' * 50,
+                         post_url=f'https://example.com/{site}/{i}', post_hash=f'{site}-{i}',
+                         source_website=f'site{site}') for i in range(count)]
+    db.session.add_all(posts)
+    db.session.commit()
+    return posts
+
+
+def sequential(summarizer, count: int, scale: float):
+    for site in range(WEBSITES):
+        for post in crawl_website(site, count, scale):
+            post.ai_summary = summarizer.summarize_content(post.title, post.content)
+            db.session.commit()
+    crawled = time.perf_counter()
+    return crawled, crawled
+
+
+def pooled(summarizer, count: int, scale: float, workers: int):
+    pool = SummaryWorkerPool(max_workers=workers)
+    pool._summarizer = summarizer
+    for site in range(WEBSITES):
+        pool.submit_many(db.engine, crawl_website(site, count, scale))
+    crawled = time.perf_counter()
+    pool.wait()
+    pool.shutdown()
+    return crawled, time.perf_counter()
+
+
+def timed(model: SimulatedModel, run) -> tuple:
+    db.session.query(CrawledPost).delete()
+    db.session.commit()
+    model.calls = 0
+    started = time.perf_counter()
+    crawled, finished = run()
+    missing = db.session.query(func.count(CrawledPost.id)).filter(CrawledPost.ai_summary.is_(None)).scalar()
+    return (crawled - started) / model.scale, (finished - started) / model.scale, model.calls, missing
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    scale = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+
+    app = Flask(__name__)
+    with tempfile.TemporaryDirectory() as directory:
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        db.init_app(app)
+        with app.app_context():
+            db.create_all()
+            model = SimulatedModel(scale)
+            print(f"{WEBSITES} 个网站，每个 {count} 条新帖子，每次请求开销 {REQUEST_SECONDS} 秒，"
+                  f"每条总结 {SUMMARY_SECONDS} 秒（耗时已按缩放比例换算）")
+            print(f"{'方式':<16} {'爬取完成':>10} {'总结全部写回':>12} {'模型调用':>8} {'缺少总结':>8}")
+            rows = [('逐条同步', lambda: sequential(make_summarizer(model, 1), count, scale))]
+            rows += [(f'工作池 x4 每批{batch_size}', lambda batch_size=batch_size: pooled(
+                make_summarizer(model, batch_size), count, scale, 4)) for batch_size in (1, 10)]
+            for name, run in rows:
+                crawl_seconds, total_seconds, calls, missing = timed(model, run)
+                print(f"{name:<16} {crawl_seconds:9.1f}秒 {total_seconds:11.1f}秒 {calls:>8} {missing:>8}")
+            db.session.remove()
+            db.engine.dispose()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+帖子去重入库基准测试
+对比原逐条查询/逐条写入实现与按帖子指纹批量去重实现的吞吐量
+
+用法: python benchmarks/bench_dedup.py [每次会话帖子数...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from models.competitor_models import db, MonitorConfig, CrawlSession, CompetitorPost
+from crawlers.competitor_crawler import CompetitorPost as CrawledPost
+from services.competitor_monitor_service import CompetitorMonitorService
+
+# 数据库中已有的历史帖子数
+EXISTING_POSTS = 20000
+
+
+def legacy_deduplicate_posts(posts, config_id: int, session_id: int):
+    """原实现：每条帖子一次查询，逐条添加"""
+    unique_posts = []
+    for post_data in posts:
+        existing = CompetitorPost.query.filter_by(
+            title=post_data.title,
+            post_url=post_data.post_url
+        ).first()
+        if existing:
+            existing.is_duplicate = True
+            continue
+        new_post = CompetitorPost(
+            session_id=session_id,
+            monitor_config_id=config_id,
+            title=post_data.title,
+            content=post_data.content,
+            author=post_data.author,
+            post_url=post_data.post_url,
+            post_time=post_data.post_time,
+            likes_count=post_data.likes_count,
+            comments_count=post_data.comments_count,
+            platform=post_data.platform,
+            is_processed=True
+        )
+        db.session.add(new_post)
+        unique_posts.append(new_post)
+    db.session.commit()
+    return unique_posts
+
+
+def make_posts(start: int, count: int):
+    posts = []
+    for i in range(start, start + count):
+        post = CrawledPost()
+        post.title = f"Competitor launch update #{i}"
+        post.content = f"Details of update {i} " * 20
+        post.author = f"user{i % 97}"
+        post.post_url = f"https://www.reddit.com/r/lasercutting/comments/{i}"
+        post.post_time = datetime.now()
+        post.platform = "Reddit"
+        posts.append(post)
+    return posts
+
+
+def make_app(db_path: str) -> Flask:
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def run(batch_size: int):
+    results = {}
+    for name in ('原实现', '批量'):
+        with tempfile.TemporaryDirectory() as tmp:
+            app = make_app(os.path.join(tmp, 'bench.db'))
+            with app.app_context():
+                db.create_all()
+                config = MonitorConfig(name='bench', config_type='keyword')
+                session = CrawlSession(session_name='bench', crawl_time=datetime.now())
+                db.session.add_all([config, session])
+                db.session.commit()
+
+                # 预置历史帖子（指纹已回填）
+                db.session.add_all(CompetitorPost(session_id=session.id, monitor_config_id=config.id,
+                                                  title=p.title, post_url=p.post_url, platform=p.platform,
+                                                  post_hash=CompetitorPost.compute_hash(p.title, p.post_url))
+                                   for p in make_posts(0, EXISTING_POSTS))
+                db.session.commit()
+
+                # 本次会话：一半为已存在的帖子，一半为新帖子
+                posts = make_posts(EXISTING_POSTS - batch_size // 2, batch_size)
+
+                start = time.perf_counter()
+                if name == '原实现':
+                    unique = legacy_deduplicate_posts(posts, config.id, session.id)
+                else:
+                    service = CompetitorMonitorService()
+                    unique = service._deduplicate_posts(posts, config.id, session.id)
+                elapsed = time.perf_counter() - start
+
+                duplicates = CompetitorPost.query.filter_by(is_duplicate=True).count()
+                results[name] = (elapsed, len(unique), duplicates)
+                db.engine.dispose()
+
+    print(f"\n本次帖子数: {batch_size}  已有帖子数: {EXISTING_POSTS}")
+    for name, (elapsed, unique, duplicates) in results.items():
+        print(f"  {name:4s}: {elapsed * 1000:9.1f} ms  {batch_size / elapsed:9.0f} 条/秒  "
+              f"新增 {unique} 条  标记重复 {duplicates} 条")
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [500, 2000, 5000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+批量导出基准测试
+对比原有方式（查询全部 ORM 对象，to_dict 后整体序列化为 JSON）与 services/export_service.py 的流式导出，
+在不同数据量下的耗时和 Python 内存峰值（tracemalloc）；流式导出的内存峰值应不随数据量增长
+
+用法: python benchmarks/bench_export.py [最大帖子数]
+"""
+
+import gzip
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from models.competitor_models import db, CompetitorPost
+from services.export_service import Export, COMPETITOR_DATASETS
+
+
+def seed(engine, count: int, start: int = 0):
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for offset in range(start, count, 5000):
+            conn.execute(insert(CompetitorPost.__table__), [{
+                'session_id': i // 50 + 1,
+                'title': f'post {i}',
+                'content': 'content ' * random.randint(250, 2500),
+                'post_url': f'https://example.com/p/{i}',
+                'platform': random.choice(['Reddit', 'Facebook', 'Kickstarter']),
+                'created_at': now - timedelta(minutes=i),
+            } for i in range(offset, min(offset + 5000, count))])
+
+
+def in_memory_export(engine) -> bytes:
+    with Session(engine) as session:
+        posts = session.query(CompetitorPost).order_by(CompetitorPost.id).all()
+        return gzip.compress(json.dumps([post.to_dict() for post in posts], ensure_ascii=False).encode('utf-8'))
+
+
+def streaming_export(engine) -> int:
+    size = 0
+    for data in Export(COMPETITOR_DATASETS['posts'], 'jsonl', 'gzip').iter_bytes(engine):
+        size += len(data)  # 模拟逐块发送给客户端
+    return size
+
+
+def measure(label: str, run, engine):
+    tracemalloc.start()
+    started = time.perf_counter()
+    run(engine)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"    {label}: {elapsed:7.2f} 秒  内存峰值 {peak / 1024 / 1024:8.1f} MB")
+
+
+if __name__ == '__main__':
+    max_posts = int(sys.argv[1]) if len(sys.argv) > 1 else 40000
+    random.seed(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        db.metadata.create_all(engine, tables=[CompetitorPost.__table__])
+
+        seeded = 0
+        for count in (max_posts // 4, max_posts // 2, max_posts):
+            seed(engine, count, seeded)
+            seeded = count
+            print(f"\n帖子 {count} 条（正文 2~20KB）")
+            measure('全部加载', in_memory_export, engine)
+            measure('流式导出', streaming_export, engine)
+        engine.dispose()
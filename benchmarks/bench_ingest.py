@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+爬取入库基准测试
+对比 CrawlerService 原逐条查重/逐条提交实现与整批查重/单事务写入实现的吞吐量
+
+用法: python benchmarks/bench_ingest.py [每次爬取帖子数...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import and_, or_
+from models.database import db, CrawledPost, CrawledComment
+from services.crawler_service import CrawlerService
+
+# 数据库中已有的历史帖子数
+EXISTING_POSTS = 5000
+COMMENTS_PER_POST = 5
+
+
+class FakePost:
+    """爬虫返回的帖子数据"""
+
+    def __init__(self, i: int):
+        self.title = f"Laser engraver review #{i}"
+        self.content = f"Review body {i} " * 30
+        self.author = f"user{i % 53}"
+        self.post_url = f"https://forum.example.com/t/{i}"
+        self.post_time = datetime.now()
+        self.likes_count = i % 17
+        self.comments_count = COMMENTS_PER_POST
+        self.source_website = "forum"
+        self.matched_keywords = ["laser"]
+        self.comments = [{"content": f"comment {j} on {i}", "author": f"c{j}", "likes_count": j}
+                         for j in range(COMMENTS_PER_POST)]
+
+
+def legacy_is_new_post(post_data) -> bool:
+    """原实现：url 或 标题+作者+来源 的 OR 查询"""
+    existing_post = CrawledPost.query.filter(
+        or_(
+            CrawledPost.post_url == post_data.post_url,
+            and_(
+                CrawledPost.title == post_data.title,
+                CrawledPost.author == post_data.author,
+                CrawledPost.source_website == post_data.source_website
+            )
+        )
+    ).first()
+    return existing_post is None
+
+
+def legacy_save_post_data(post_data):
+    """原实现：每条帖子一次提交"""
+    post = CrawledPost(
+        title=post_data.title,
+        content=post_data.content,
+        author=post_data.author,
+        post_url=post_data.post_url,
+        post_time=post_data.post_time,
+        likes_count=post_data.likes_count,
+        comments_count=post_data.comments_count,
+        source_website=post_data.source_website,
+        matched_keywords=post_data.matched_keywords,
+        is_read=False
+    )
+    db.session.add(post)
+    db.session.flush()
+    for comment_data in post_data.comments:
+        db.session.add(CrawledComment(post_id=post.id, content=comment_data["content"],
+                                      author=comment_data["author"], likes_count=comment_data["likes_count"]))
+    db.session.commit()
+    return post
+
+
+def legacy_ingest(service, posts):
+    saved = 0
+    for post in posts:
+        if legacy_is_new_post(post) and legacy_save_post_data(post):
+            saved += 1
+    return saved
+
+
+def batch_ingest(service, posts):
+    return len(service.save_posts_batch(service.filter_new_posts(posts)))
+
+
+def make_app(db_path: str) -> Flask:
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def run(batch_size: int):
+    print(f"\n本次爬取帖子数: {batch_size}  已有帖子数: {EXISTING_POSTS}  每帖评论数: {COMMENTS_PER_POST}")
+    for name, ingest in (('原实现', legacy_ingest), ('批量', batch_ingest)):
+        with tempfile.TemporaryDirectory() as tmp:
+            app = make_app(os.path.join(tmp, 'bench.db'))
+            with app.app_context():
+                db.create_all()
+                service = CrawlerService()
+                batch_ingest(service, [FakePost(i) for i in range(EXISTING_POSTS)])
+                service.warm_seen_filter()
+
+                # 本次爬取：前20%为已存在的帖子
+                start_index = EXISTING_POSTS - batch_size // 5
+                posts = [FakePost(i) for i in range(start_index, start_index + batch_size)]
+
+                start = time.perf_counter()
+                saved = ingest(service, posts)
+                elapsed = time.perf_counter() - start
+
+                print(f"  {name:4s}: {elapsed * 1000:9.1f} ms  {batch_size / elapsed:9.0f} 条/秒  新增 {saved} 条")
+                db.engine.dispose()
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [50, 500]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+列表视图载荷基准测试
+按接近实际的数据量（AI汇总数KB、帖子正文 2~20KB）生成数据，对比列表查询加载全文与只加载预览
+（preview_options：延迟加载大文本字段，只取前若干字符）的查询耗时和 JSON 载荷大小
+
+用法: python benchmarks/bench_list_payload.py [会话数] [每个会话帖子数] [重复次数]
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from models.competitor_models import db, CrawlSession, CompetitorPost
+
+WORDS = ['竞品', '新品', '发布', '用户', '反馈', 'price', 'update', 'review', 'feature', '活动', '价格', 'launch']
+
+
+def text_of(size: int) -> str:
+    words = []
+    length = 0
+    while length < size:
+        word = random.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return ' '.join(words)
+
+
+def seed(engine, sessions: int, posts_per_session: int):
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(CrawlSession.__table__), [{
+            'session_name': f'session {i}',
+            'crawl_time': now - timedelta(hours=i),
+            'ai_summary': text_of(random.randint(2000, 8000)),
+            'total_posts': posts_per_session,
+            'status': 'completed',
+            'created_at': now - timedelta(hours=i),
+        } for i in range(sessions)])
+        for session_id in range(1, sessions + 1):
+            conn.execute(insert(CompetitorPost.__table__), [{
+                'session_id': session_id,
+                'title': f'post {session_id}-{i}',
+                'content': text_of(random.randint(2000, 20000)),
+                'post_url': f'https://example.com/{session_id}/{i}',
+                'platform': 'Reddit',
+                'created_at': now - timedelta(hours=session_id, minutes=i),
+            } for i in range(posts_per_session)])
+
+
+def measure(engine, label: str, load, repeat: int):
+    """load(session) 返回可序列化的列表数据；输出平均耗时和 JSON 字节数"""
+    elapsed = 0.0
+    payload = b''
+    for _ in range(repeat):
+        with Session(engine) as session:
+            started = time.perf_counter()
+            payload = json.dumps(load(session), ensure_ascii=False).encode('utf-8')
+            elapsed += time.perf_counter() - started
+    print(f"  {label:4s}: {elapsed / repeat * 1000:8.2f} ms  载荷 {len(payload) / 1024:9.1f} KB")
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    sessions = args[0] if len(args) > 0 else 200
+    posts_per_session = args[1] if len(args) > 1 else 50
+    repeat = args[2] if len(args) > 2 else 20
+    random.seed(42)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        db.metadata.create_all(engine, tables=[CrawlSession.__table__, CompetitorPost.__table__])
+        seed(engine, sessions, posts_per_session)
+        print(f"会话 {sessions} 个（AI汇总 2~8KB），帖子 {sessions * posts_per_session} 条（正文 2~20KB），重复 {repeat} 次")
+
+        print("\n最近会话列表（10条）")
+        measure(engine, '全文', lambda s: [row.to_dict() for row in s.query(CrawlSession)
+                                         .order_by(CrawlSession.crawl_time.desc()).limit(10)], repeat)
+        measure(engine, '预览', lambda s: [row.to_dict(full=False) for row in s.query(CrawlSession)
+                                         .options(*CrawlSession.preview_options())
+                                         .order_by(CrawlSession.crawl_time.desc()).limit(10)], repeat)
+
+        print(f"\n会话帖子列表（{posts_per_session}条）")
+        measure(engine, '全文', lambda s: [row.to_dict() for row in s.query(CompetitorPost)
+                                         .filter_by(session_id=1).order_by(CompetitorPost.created_at.desc())], repeat)
+        measure(engine, '预览', lambda s: [row.to_dict(full=False) for row in s.query(CompetitorPost)
+                                         .options(*CompetitorPost.preview_options())
+                                         .filter_by(session_id=1).order_by(CompetitorPost.created_at.desc())], repeat)
+
+        print("\n最新帖子列表（100条）")
+        measure(engine, '全文', lambda s: [row.to_dict() for row in s.query(CompetitorPost)
+                                         .order_by(CompetitorPost.created_at.desc()).limit(100)], repeat)
+        measure(engine, '预览', lambda s: [row.to_dict(full=False) for row in s.query(CompetitorPost)
+                                         .options(*CompetitorPost.preview_options())
+                                         .order_by(CompetitorPost.created_at.desc()).limit(100)], repeat)
+        engine.dispose()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+SQLite 并发读写基准测试
+多个写线程（模拟爬取入库）和读线程（模拟页面和接口查询）同时运行，
+对比默认配置与 models/sqlite_profile.py 配置的吞吐量和 "database is locked" 错误数
+
+用法: python benchmarks/bench_sqlite_concurrency.py [写线程数] [读线程数] [秒数]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, select, insert
+from sqlalchemy.exc import OperationalError
+from models.competitor_models import db, CompetitorPost
+from models.sqlite_profile import create_sqlite_engine
+
+POSTS_PER_WRITE = 20  # 每个写事务插入的帖子数
+SEED_POSTS = 20000
+
+
+def writer(engine, stop: threading.Event, stats: dict, worker_id: int):
+    sequence = 0
+    while not stop.is_set():
+        rows = [{
+            'title': f'post {worker_id}-{sequence}-{i}',
+            'content': 'body ' * 50,
+            'post_url': f'https://example.com/{worker_id}/{sequence}/{i}',
+            'platform': 'Reddit',
+            'created_at': datetime.utcnow(),
+        } for i in range(POSTS_PER_WRITE)]
+        sequence += 1
+        try:
+            with engine.begin() as conn:
+                conn.execute(insert(CompetitorPost.__table__), rows)
+            stats['writes'] += 1
+        except OperationalError as e:
+            stats['errors'] += 1
+            stats['last_error'] = str(e.orig)
+
+
+def reader(engine, stop: threading.Event, stats: dict):
+    table = CompetitorPost.__table__
+    while not stop.is_set():
+        try:
+            with engine.connect() as conn:
+                conn.execute(select(func.count()).select_from(table)).scalar()
+                conn.execute(select(table.c.id, table.c.title).order_by(table.c.id.desc()).limit(50)).all()
+            stats['reads'] += 1
+        except OperationalError as e:
+            stats['errors'] += 1
+            stats['last_error'] = str(e.orig)
+
+
+def run(name: str, make_engine, writers: int, readers: int, seconds: float):
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = make_engine(uri)
+        db.metadata.create_all(engine, tables=[CompetitorPost.__table__])
+        with engine.begin() as conn:
+            conn.execute(insert(CompetitorPost.__table__),
+                         [{'title': f'seed {i}', 'post_url': f'https://example.com/seed/{i}'} for i in range(SEED_POSTS)])
+
+        stats = {'writes': 0, 'reads': 0, 'errors': 0, 'last_error': None}
+        stop = threading.Event()
+        threads = [threading.Thread(target=writer, args=(engine, stop, stats, i)) for i in range(writers)]
+        threads += [threading.Thread(target=reader, args=(engine, stop, stats)) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    print(f"  {name:8s}: 写事务 {stats['writes'] / seconds:8.1f} 次/秒  "
+          f"读请求 {stats['reads'] / seconds:8.1f} 次/秒  锁错误 {stats['errors']}")
+    if stats['last_error']:
+        print(f"            最后一个错误: {stats['last_error']}")
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    writers = args[0] if len(args) > 0 else 4
+    readers = args[1] if len(args) > 1 else 8
+    seconds = args[2] if len(args) > 2 else 10
+
+    print(f"写线程 {writers}  读线程 {readers}  每个写事务 {POSTS_PER_WRITE} 条  持续 {seconds} 秒")
+    # 默认配置需要先运行：SQLite 配置安装后对进程内所有新连接生效
+    run('默认配置', lambda uri: create_engine(uri, connect_args={'timeout': 1, 'check_same_thread': False}),
+        writers, readers, seconds)
+    run('生产配置', create_sqlite_engine, writers, readers, seconds)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+AI汇总基准测试（模拟模型延迟，不调用真实API）
+对比单次请求（全部帖子放进一个提示词）与分组并发摘要再汇总在不同会话规模下的端到端耗时。
+模拟的延迟 = 固定开销 + 输入token × 预填充耗时 + 输出token × 生成耗时，超出上下文长度的请求失败
+
+用法: python benchmarks/bench_summarize.py [时间缩放比例]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import services.competitor_ai_service as ai_module
+from services.competitor_ai_service import CompetitorAIService, estimate_tokens
+
+CONTEXT_LIMIT = 32000  # 模拟的上下文长度（token）
+BASE_SECONDS = 0.8
+PREFILL_SECONDS_PER_TOKEN = 0.0001
+DECODE_SECONDS_PER_TOKEN = 0.02  # 约50 token/秒
+
+
+class SimulatedModel:
+    def __init__(self, scale: float):
+        self.scale = scale
+        self.calls = 0
+        self.failures = 0
+
+    def request(self, prompt: str, generation_config=None) -> str:
+        self.calls += 1
+        config = generation_config or ai_module.GENERATION_CONFIG
+        tokens_in = estimate_tokens(prompt)
+        if tokens_in > CONTEXT_LIMIT:
+            self.failures += 1
+            time.sleep(BASE_SECONDS * self.scale)
+            return ""
+        tokens_out = min(config['maxOutputTokens'], 200 + tokens_in // 4)
+        time.sleep((BASE_SECONDS + tokens_in * PREFILL_SECONDS_PER_TOKEN
+                    + tokens_out * DECODE_SECONDS_PER_TOKEN) * self.scale)
+        return f"摘要 {tokens_out} tokens"
+
+
+class NoCache:
+    @staticmethod
+    def make_key(*args):
+        return ''
+
+    def get(self, key, bypass=False):
+        return None
+
+    def set(self, *args, **kwargs):
+        pass
+
+
+def make_posts(count: int):
+    brands = ['xTool', 'Glowforge', 'LightBurn', 'Ortur', 'Cubiio', 'WeCreat']
+    return [{
+        'platform': random.choice(['Reddit', 'Facebook', 'Kickstarter']),
+        'brand_category': random.choice(brands),
+        'title': f'帖子标题 {i} ' + 'laser engraving update ' * 3,
+        'author': f'user{i}',
+        'content': '用户反馈内容，' * 20 + 'feedback about the new firmware and camera ' * 4,
+        'post_url': f'https://example.com/p/{i}',
+        'post_time': '2025-07-17T10:00:00',
+    } for i in range(count)]
+
+
+def run(service: CompetitorAIService, model: SimulatedModel, posts, budget: int) -> tuple:
+    service.prompt_token_budget = budget
+    model.calls = model.failures = 0
+    started = time.perf_counter()
+    summary = service.analyze_posts(posts)
+    elapsed = (time.perf_counter() - started) / model.scale
+    fallback = 'AI分析服务暂时不可用' in summary
+    return elapsed, model.calls, fallback
+
+
+if __name__ == '__main__':
+    scale = float(sys.argv[1]) if len(sys.argv) > 1 else 0.05
+    random.seed(42)
+
+    ai_module.ai_response_cache = NoCache()
+    model = SimulatedModel(scale)
+    service = CompetitorAIService()
+    service._request_gemini = model.request
+
+    print(f"模拟上下文 {CONTEXT_LIMIT} tokens，生成速度 {1 / DECODE_SECONDS_PER_TOKEN:.0f} tokens/秒，"
+          f"分组预算 {ai_module.DEFAULT_PROMPT_TOKEN_BUDGET} tokens，并发 {service.map_max_workers}")
+    print(f"{'帖子数':>6} {'提示词tokens':>12} | {'单次请求':>16} | {'分组摘要+汇总':>20}")
+    for count in (20, 100, 400, 1600):
+        posts = make_posts(count)
+        prompt_tokens = estimate_tokens(service._format_posts_for_analysis(posts))
+        single = run(service, model, posts, budget=10 ** 9)
+        chunked = run(service, model, posts, budget=ai_module.DEFAULT_PROMPT_TOKEN_BUDGET)
+        single_text = f"{single[0]:6.1f}秒 {'失败' if single[2] else '成功'}"
+        chunked_text = f"{chunked[0]:6.1f}秒 {chunked[1]:3d}次调用 {'失败' if chunked[2] else '成功'}"
+        print(f"{count:>6} {prompt_tokens:>12} | {single_text:>16} | {chunked_text:>20}")
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+热点查询执行计划检查
+对 app.py、competitor_monitor_service.py、crawler_service.py、data_filter_service.py 中的常用查询执行
+EXPLAIN QUERY PLAN，出现全表扫描（SCAN <表名> 且未使用索引）时以非零状态退出
+
+用法: python benchmarks/check_query_plans.py [竞品监控库路径] [内容抓取库路径]
+不传路径时使用按模型新建的临时数据库；传入路径时检查已有数据库（用于确认迁移结果）
+"""
+
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select, func, delete, text
+from models.competitor_models import db as competitor_db, CrawlSession, CompetitorPost
+from models.database import db as feishu_db, CrawledPost, CrawledComment, SystemLog
+
+NOW = datetime(2025, 7, 17, 12, 0, 0)
+TODAY = NOW.replace(hour=0, minute=0, second=0)
+
+# (查询说明, 语句)
+COMPETITOR_QUERIES = [
+    ('最近会话列表', select(CrawlSession).order_by(CrawlSession.crawl_time.desc()).limit(10)),
+    ('24小时会话数', select(func.count()).select_from(CrawlSession)
+        .where(CrawlSession.crawl_time >= NOW - timedelta(days=1))),
+    ('24小时帖子数', select(func.count()).select_from(CompetitorPost)
+        .where(CompetitorPost.created_at >= NOW - timedelta(days=1))),
+    ('会话帖子列表', select(CompetitorPost).where(CompetitorPost.session_id == 1)
+        .order_by(CompetitorPost.created_at.desc())),
+    ('按会话和配置删除', delete(CompetitorPost)
+        .where(CompetitorPost.session_id == 1, CompetitorPost.monitor_config_id == 1)),
+    ('配置关联帖子', select(CompetitorPost).where(CompetitorPost.monitor_config_id == 1)),
+    ('按链接删除', select(CompetitorPost).where(CompetitorPost.post_url == 'https://example.com/p/1')),
+    ('清理老帖子', delete(CompetitorPost).where(CompetitorPost.created_at < NOW - timedelta(days=30))),
+    ('清理老会话', delete(CrawlSession).where(CrawlSession.crawl_time < NOW - timedelta(days=30))),
+    ('最近帖子', select(CompetitorPost).order_by(CompetitorPost.created_at.desc()).limit(5)),
+    ('指纹去重', select(CompetitorPost.post_hash).where(CompetitorPost.post_hash.in_(['a' * 32, 'b' * 32]))),
+]
+
+FEISHU_QUERIES = [
+    ('仪表板列表', select(CrawledPost).where(CrawledPost.is_archived == False)
+        .order_by(CrawledPost.created_at.desc()).limit(20)),
+    ('仪表板今日筛选', select(CrawledPost).where(CrawledPost.is_archived == False, CrawledPost.created_at >= TODAY)
+        .order_by(CrawledPost.created_at.desc()).limit(20)),
+    ('仪表板来源筛选', select(CrawledPost).where(CrawledPost.is_archived == False, CrawledPost.source_website == 'Reddit')
+        .order_by(CrawledPost.created_at.desc()).limit(20)),
+    ('今日帖子数', select(func.count()).select_from(CrawledPost).where(CrawledPost.created_at >= TODAY)),
+    ('未存档帖子数', select(func.count()).select_from(CrawledPost).where(CrawledPost.is_archived == False)),
+    ('来源列表', select(CrawledPost.source_website).distinct()),
+    ('帖子管理分页', select(CrawledPost).order_by(CrawledPost.created_at.desc()).limit(20).offset(40)),
+    ('存档7天前内容', select(CrawledPost).where(CrawledPost.created_at < NOW - timedelta(days=7),
+                                         CrawledPost.is_archived == False)),
+    ('存档页面', select(CrawledPost).where(CrawledPost.is_archived == True, CrawledPost.archive_date == TODAY.date())
+        .order_by(CrawledPost.archive_date.desc()).limit(50)),
+    ('存档日期列表', select(CrawledPost.archive_date).where(CrawledPost.is_archived == True).distinct()
+        .order_by(CrawledPost.archive_date.desc())),
+    ('存档来源列表', select(CrawledPost.source_website).where(CrawledPost.is_archived == True).distinct()),
+    ('重复内容检查', select(CrawledPost).where(CrawledPost.created_at >= NOW - timedelta(hours=24),
+                                        CrawledPost.source_website == 'Reddit', CrawledPost.id != 1)),
+    ('按来源筛选帖子', select(CrawledPost).where(CrawledPost.source_website == 'Reddit')
+        .order_by(CrawledPost.created_at.desc()).limit(20)),
+    ('区间来源统计', select(CrawledPost.source_website, func.count(CrawledPost.id))
+        .where(CrawledPost.created_at >= NOW - timedelta(days=7)).group_by(CrawledPost.source_website)),
+    ('按链接查找', select(CrawledPost).where(CrawledPost.post_url == 'https://example.com/p/1')),
+    ('指纹去重', select(CrawledPost.post_hash).where(CrawledPost.post_hash.in_(['a' * 32, 'b' * 32]))),
+    ('帖子评论', select(CrawledComment).where(CrawledComment.post_id == 1)),
+    ('系统日志', select(SystemLog).order_by(SystemLog.created_at.desc()).limit(100)),
+]
+
+# 全表扫描："SCAN crawled_posts"；使用索引的扫描为 "SCAN crawled_posts USING [COVERING] INDEX ..."
+FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+def query_plan(conn, statement):
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    return [row[-1] for row in conn.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+
+
+def check(label: str, uri: str, metadata, queries, create: bool) -> int:
+    engine = create_engine(uri)
+    if create:
+        metadata.create_all(engine)
+    failures = 0
+
+    print(f"\n{label}: {uri}")
+    with engine.connect() as conn:
+        for name, statement in queries:
+            plan = query_plan(conn, statement)
+            scans = [detail for detail in plan if FULL_SCAN.match(detail)]
+            failures += bool(scans)
+            print(f"  {'❌' if scans else '✅'} {name}: {' | '.join(plan)}")
+    engine.dispose()
+    return failures
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = sys.argv[1:3]
+        competitor_path = paths[0] if len(paths) > 0 else os.path.join(tmp, 'competitor_monitor.db')
+        feishu_path = paths[1] if len(paths) > 1 else os.path.join(tmp, 'feishu_bot.db')
+
+        failures = check('竞品监控库', f'sqlite:///{competitor_path}', competitor_db.metadata,
+                         COMPETITOR_QUERIES, create=len(paths) < 1)
+        failures += check('内容抓取库', f'sqlite:///{feishu_path}', feishu_db.metadata,
+                          FEISHU_QUERIES, create=len(paths) < 2)
+
+    if failures:
+        print(f"\n❌ {failures} 个热点查询使用了全表扫描")
+        sys.exit(1)
+    print("\n✅ 所有热点查询均使用索引")
@@ -5,11 +5,16 @@
 """
 
 import os
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for
 from flask_cors import CORS
 from flask_apscheduler import APScheduler
 from models.competitor_models import db, MonitorConfig, CrawlSession, CompetitorPost, SystemSettings
+from models.sqlite_profile import configure_app as configure_sqlite
 from services.competitor_monitor_service import CompetitorMonitorService
+from services.webpage_snapshot_service import WebpageSnapshotService
+from services.pagination import InvalidCursor, DEFAULT_PAGE_SIZE
+from services.export_service import Export, ExportError, COMPETITOR_DATASETS
+from services.ai_response_cache import ai_response_cache
 from loguru import logger
 from datetime import datetime
 
@@ -21,6 +26,7 @@ CORS(app)
 app.config['SECRET_KEY'] = 'competitor-monitor-secret-key'
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///competitor_monitor.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+configure_sqlite(app)
 
 # 调度器配置
 app.config['SCHEDULER_API_ENABLED'] = True
@@ -31,6 +37,7 @@ scheduler = APScheduler()
 
 # 创建监控服务实例
 monitor_service = CompetitorMonitorService()
+snapshot_service = WebpageSnapshotService()
 
 @app.route('/')
 def index():
@@ -77,7 +84,7 @@ def session_detail(session_id):
 
 @app.route('/api/crawl', methods=['POST'])
 def manual_crawl():
-    """手动触发爬取"""
+    """手动触发爬取（帖子入库后即返回，AI汇总在后台任务队列中生成，会话状态为 summary_pending）"""
     try:
         session_name = request.json.get('session_name', f"手动爬取 {datetime.now().strftime('%H:%M')}")
         
@@ -138,6 +145,37 @@ def delete_config(config_id):
         logger.error(f"删除配置失败: {e}")
         return jsonify({"success": False, "message": str(e)})
 
+@app.route('/api/config/<int:config_id>/snapshots')
+def list_webpage_snapshots(config_id):
+    """获取网页更新配置的快照版本列表"""
+    try:
+        snapshots = snapshot_service.list_snapshots(config_id)
+        return jsonify({
+            'success': True,
+            'snapshots': snapshots
+        })
+    except Exception as e:
+        logger.error(f"获取网页快照失败: {e}")
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        })
+
+@app.route('/api/config/<int:config_id>/snapshots/<int:version>')
+def get_webpage_snapshot(config_id, version):
+    """获取指定版本的网页内容"""
+    return jsonify(snapshot_service.get_version(config_id, version))
+
+@app.route('/api/config/<int:config_id>/snapshots/diff')
+def diff_webpage_snapshots(config_id):
+    """对比两个快照版本（参数 from、to 为版本号）"""
+    from_version = request.args.get('from', type=int)
+    to_version = request.args.get('to', type=int)
+    if not from_version or not to_version:
+        return jsonify({"success": False, "message": "请提供 from 和 to 版本号"})
+    
+    return jsonify(snapshot_service.diff_versions(config_id, from_version, to_version))
+
 @app.route('/api/scheduler/status')
 def scheduler_status():
     """获取定时任务状态"""
@@ -198,6 +236,76 @@ def get_stats():
         logger.error(f"获取统计失败: {e}")
         return jsonify({"error": str(e)})
 
+@app.route('/api/stats/reconcile', methods=['POST'])
+def reconcile_stats():
+    """立即从明细表重新计算统计计数"""
+    return jsonify(monitor_service.reconcile_statistics())
+
+@app.route('/api/analytics/<report>')
+def get_analytics(report):
+    """趋势分析（report: volume 每日发帖量 / engagement 互动分布 / wow 周环比；
+    参数 dimension=brand|platform|config，days 天数，top 返回的取值数，refresh=1 忽略缓存）"""
+    return jsonify(monitor_service.get_analytics(
+        report,
+        dimension=request.args.get('dimension'),
+        days=request.args.get('days', 30, type=int),
+        top=request.args.get('top', 10, type=int),
+        refresh=request.args.get('refresh', '0') == '1'
+    ))
+
+@app.route('/api/ai/cache')
+def get_ai_cache_stats():
+    """AI响应缓存统计（命中率、条数、节省的调用时间）"""
+    return jsonify({
+        'success': True,
+        **ai_response_cache.stats()
+    })
+
+@app.route('/api/ai/cache', methods=['DELETE'])
+def clear_ai_cache():
+    """清空AI响应缓存"""
+    try:
+        deleted = ai_response_cache.clear()
+        return jsonify({
+            'success': True,
+            'message': f'已清空 {deleted} 条AI响应缓存'
+        })
+    except Exception as e:
+        logger.error(f"清空AI响应缓存失败: {e}")
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        })
+
+@app.route('/api/ai/jobs')
+def get_ai_jobs():
+    """AI任务队列状态和最近的任务（参数 status=queued|running|completed|failed，limit 返回条数）"""
+    try:
+        return jsonify(monitor_service.get_ai_jobs(
+            limit=min(request.args.get('limit', 20, type=int), 100),
+            status=request.args.get('status')
+        ))
+    except Exception as e:
+        logger.error(f"获取AI任务队列状态失败: {e}")
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        })
+
+@app.route('/api/session/<int:session_id>/summary', methods=['POST'])
+def regenerate_session_summary(session_id):
+    """重新生成会话的AI汇总（加入任务队列；参数 refresh=1 时忽略AI响应缓存）"""
+    try:
+        return jsonify(monitor_service.regenerate_session_summary(
+            session_id, use_cache=request.args.get('refresh', '0') != '1'
+        ))
+    except Exception as e:
+        logger.error(f"重新生成AI汇总失败: {e}")
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        })
+
 @app.route('/viewer')
 def viewer_page():
     """只读查看页面（多设备访问）"""
@@ -330,15 +438,36 @@ def clear_old_records():
             'message': str(e)
         })
 
+@app.route('/api/search')
+def search_posts():
+    """全文搜索帖子（参数 q 为关键词，按相关度排序）"""
+    keyword = request.args.get('q', '').strip()
+    if not keyword:
+        return jsonify({"success": False, "message": "请提供搜索关键词"})
+    
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    return jsonify(monitor_service.search_posts(keyword, limit=limit, offset=offset))
+
 @app.route('/api/session/<int:session_id>/posts')
 def get_session_posts(session_id):
-    """获取指定会话的所有帖子"""
+    """分页获取指定会话的帖子（参数 cursor 为上一页返回的 next_cursor，limit 为每页条数，full=1 返回正文全文）"""
     try:
-        posts = monitor_service.get_session_posts(session_id)
+        page = monitor_service.get_session_posts(
+            session_id,
+            cursor=request.args.get('cursor'),
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            full=request.args.get('full', '0') == '1'
+        )
         return jsonify({
             'success': True,
-            'posts': posts
+            **page
         })
+    except InvalidCursor as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         logger.error(f"获取会话帖子失败: {e}")
         return jsonify({
@@ -346,9 +475,24 @@ def get_session_posts(session_id):
             'message': str(e)
         })
 
+@app.route('/api/export/<dataset>')
+def export_records(dataset):
+    """流式导出帖子或会话（dataset 为 posts/sessions；参数 format=jsonl|csv，compression=gzip|zstd|none，
+    start_date、end_date 为 YYYY-MM-DD，筛选条件 platform、config_id、session_id）"""
+    try:
+        export = Export.from_args(COMPETITOR_DATASETS, dataset, request.args)
+    except ExportError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    
+    return Response(export.iter_bytes(db.engine), mimetype=export.mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={export.filename}'})
+
 @app.route('/api/feishu/push/<int:session_id>', methods=['POST'])
 def push_to_feishu(session_id):
-    """手动推送指定会话内容到飞书"""
+    """手动推送指定会话内容到飞书（参数 refresh=1 时忽略AI响应缓存，重新生成汇总）"""
     try:
         # 检查访问权限 - 只允许localhost访问
         if request.remote_addr != '127.0.0.1':
@@ -358,7 +502,9 @@ def push_to_feishu(session_id):
             }), 403
         
         with app.app_context():
-            result = monitor_service.push_session_to_feishu(session_id)
+            result = monitor_service.push_session_to_feishu(
+                session_id, use_cache=request.args.get('refresh', '0') != '1'
+            )
             return jsonify(result)
     except Exception as e:
         logger.error(f"推送到飞书失败: {e}")
@@ -376,11 +522,9 @@ def scheduled_crawl():
             result = monitor_service.execute_scheduled_crawl()
             logger.info(f"定时监控完成: {result}")
             
-            # 记录飞书推送状态
-            if result.get("feishu_sent"):
-                logger.info("📱 飞书消息已推送")
-            elif result.get("processed_posts", 0) > 0:
-                logger.warning("⚠️ 有新内容但飞书推送失败")
+            # 记录飞书推送状态（AI汇总完成后由后台任务推送）
+            if result.get("feishu_pending"):
+                logger.info(f"📱 飞书消息将在AI汇总完成后推送（任务 #{result.get('summary_job_id')}）")
             else:
                 logger.info("📱 无新内容，未推送飞书消息")
                 
@@ -406,7 +550,12 @@ def init_database():
                 db.session.add(setting)
         
         db.session.commit()
+        monitor_service.search_index.ensure()
+        monitor_service.stat_counters.ensure()
         logger.info("✅ 数据库初始化完成")
+        
+        # 预热已见帖子过滤器
+        monitor_service.warm_seen_filter()
 
 def init_sample_configs():
     """初始化示例配置"""
@@ -434,13 +583,32 @@ def init_sample_configs():
             result = monitor_service.add_monitor_config(config_data)
             logger.info(f"添加示例配置: {result}")
 
+def reconcile_statistics():
+    """定时核对统计计数"""
+    with app.app_context():
+        monitor_service.reconcile_statistics()
+
+def init_ai_job_queue():
+    """启动AI任务队列的后台工作线程（继续执行上次未完成的任务）"""
+    monitor_service.job_queue.start(app)
+
+@app.before_request
+def ensure_ai_job_queue():
+    """未经 init_ai_job_queue 启动时（如由其他WSGI服务器加载应用），在收到请求时启动AI任务队列，
+    否则会话会一直停留在AI汇总中"""
+    monitor_service.job_queue.start(app)
+
 def init_scheduler():
-    """初始化调度器（不添加定时任务）"""
+    """初始化调度器（不添加定时爬取任务）"""
     try:
         # 配置调度器
         scheduler.init_app(app)
         scheduler.start()
-        logger.info("✅ 调度器已启动（无定时任务）")
+        
+        # 只添加统计计数核对任务
+        scheduler.add_job(id='reconcile_statistics', func=reconcile_statistics, trigger='interval',
+                          hours=monitor_service.stats_reconcile_hours, replace_existing=True)
+        logger.info(f"✅ 调度器已启动（每 {monitor_service.stats_reconcile_hours} 小时核对统计计数，无定时爬取任务）")
         
         # 不再添加定时任务 - 改为手动推送模式
         logger.info("📱 已切换为手动推送模式")
@@ -455,6 +623,7 @@ if __name__ == '__main__':
         init_database()
         init_sample_configs()
         init_scheduler()
+        init_ai_job_queue()
         
         # 获取端口
         port = int(os.environ.get('PORT', 8080))
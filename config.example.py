@@ -8,6 +8,22 @@
 GEMINI_API_KEY = "your_gemini_api_key_here"  # 请替换为你的Gemini API密钥
 GEMINI_MODEL = "gemini-1.5-flash"
 
+# AI响应缓存：相同的模型和提示词直接返回缓存结果（重复推送、重新生成汇总时无需再次调用）
+AI_CACHE_ENABLED = True
+AI_CACHE_TTL_HOURS = 168  # 缓存有效期（小时）
+AI_CACHE_MAX_ENTRIES = 1000  # 最多缓存条数，超出时淘汰最久未使用的
+
+# AI汇总：单次请求的提示词token预算，帖子较多超出预算时按品牌分组并发摘要后再汇总
+AI_PROMPT_TOKEN_BUDGET = 6000
+AI_MAP_MAX_WORKERS = 4  # 分组摘要的并发请求数
+AI_MAP_MAX_CHUNKS = 8  # 最多分组数，超出时按互动量保留帖子，保证汇总耗时有上限
+
+# AI任务队列：爬取会话的AI汇总在后台工作线程中生成，失败按指数退避重试，遇到限流时暂停到限流结束
+AI_JOB_WORKERS = 2  # 工作线程数
+AI_JOB_MAX_ATTEMPTS = 3  # 每个任务最多执行次数（限流延后不计入）
+AI_JOB_RETRY_SECONDS = 30  # 首次重试等待秒数，之后每次翻倍
+# 不运行Web服务时可用 python manage_records.py run-ai-jobs 执行排队中的任务
+
 # 飞书Webhook配置
 FEISHU_WEBHOOK_URL = "your_feishu_webhook_url_here"  # 请替换为你的飞书Webhook地址
 
@@ -17,5 +33,46 @@ DEBUG = False
 HOST = "0.0.0.0"
 PORT = 8080
 
+# 爬取配置
+CRAWL_MAX_WORKERS = 4  # 并发爬取监控配置的线程数，设为1则串行爬取
+
+# 按域名限速：{域名: (每秒请求数, 突发容量)}，子域名按后缀匹配，未配置的域名每秒0.5次
+HOST_RATE_LIMITS = {
+    "reddit.com": (1 / 3, 1),
+    "kickstarter.com": (1 / 3, 1),
+    "facebook.com": (1 / 3, 1),
+}
+
+# 网页更新监控：计算原始内容指纹前额外删除的易变内容（正则），如页面上的访问计数
+WEBPAGE_VOLATILE_PATTERNS = [
+    # r'<span class="visit-count">\d+</span>',
+]
+
+# 网页更新中的链接：每次爬取会话中并发爬取链接的总时限（秒，从首次爬取链接时开始计时），已爬取的链接内容按规范化URL缓存
+LINK_ENRICH_DEADLINE = 20
+LINK_CACHE_TTL = 6 * 3600  # 缓存有效期（秒）
+LINK_CACHE_MAX_ENTRIES = 1000
+
+# 网页快照：每隔多少个版本保存一个全文关键帧，其余版本只保存增量
+SNAPSHOT_KEYFRAME_INTERVAL = 20
+
+# 已见帖子过滤器（布隆过滤器）：预计帖子数和目标误判率，启动时从数据库预热
+SEEN_FILTER_CAPACITY = 200000
+SEEN_FILTER_ERROR_RATE = 0.001
+
+# 统计计数：由触发器增量维护，每隔多少小时从明细表核对一次
+STATS_RECONCILE_HOURS = 6
+
 # 数据库配置
-DATABASE_URL = "sqlite:///competitor_monitor.db" 
\ No newline at end of file
+DATABASE_URL = "sqlite:///competitor_monitor.db"
+
+# SQLite 引擎配置（未设置的项使用 models/sqlite_profile.py 中的默认值，也可用 SQLITE_* 环境变量设置）
+SQLITE_PROFILE = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 10000,  # 毫秒
+    "cache_size": -32000,  # 负数表示 KiB
+    "mmap_size": 134217728,
+    "pool_size": 10,
+    "max_overflow": 10,
+} 
\ No newline at end of file
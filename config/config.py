@@ -1,7 +1,7 @@
 import os
 import yaml
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,6 +10,8 @@ load_dotenv()
 class DatabaseConfig:
     uri: str = "sqlite:///feishu_bot.db"
     track_modifications: bool = False
+    # SQLite 引擎配置覆盖项（WAL、PRAGMA、连接池，见 models/sqlite_profile.py），也可用 SQLITE_* 环境变量设置
+    sqlite_profile: Dict[str, Any] = field(default_factory=dict)
 
 @dataclass
 class FeishuConfig:
@@ -34,6 +36,7 @@ class SchedulerConfig:
     timezone: str = "Asia/Shanghai"
     default_schedule: str = "0 9 * * *"  # 每日9点
     max_workers: int = 4
+    stats_reconcile_hours: int = int(os.getenv("STATS_RECONCILE_HOURS", "6"))  # 统计计数核对间隔（小时）
 
 @dataclass
 class Config:
@@ -53,6 +56,11 @@ class Config:
     gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
     gemini_model: str = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
     
+    # 帖子AI总结工作池：并发调用数、等待队列上限、每次请求合并总结的帖子数
+    ai_summary_workers: int = int(os.getenv("AI_SUMMARY_WORKERS", "4"))
+    ai_summary_queue_size: int = int(os.getenv("AI_SUMMARY_QUEUE_SIZE", "200"))
+    ai_summary_batch_size: int = int(os.getenv("AI_SUMMARY_BATCH_SIZE", "10"))
+    
     @classmethod
     def load_from_yaml(cls, config_path: str) -> "Config":
         """从YAML文件加载配置"""
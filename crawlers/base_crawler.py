@@ -1,4 +1,3 @@
-import time
 import requests
 from abc import ABC, abstractmethod
 from typing import Dict, List, Optional, Any
@@ -10,6 +9,7 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from loguru import logger
+from crawlers.rate_limiter import rate_limiter
 
 # 尝试导入配置，如果失败则使用默认值
 try:
@@ -89,12 +89,12 @@ class BaseCrawler(ABC):
     def make_request(self, url: str, method: str = "GET", **kwargs) -> Optional[requests.Response]:
         """发送HTTP请求"""
         try:
+            # 按域名限速，仅在同一域名请求过快时等待
+            rate_limiter.wait(url)
+            
             response = self.session.request(method, url, timeout=config.crawler.timeout, **kwargs)
             response.raise_for_status()
             
-            # 请求延迟
-            time.sleep(config.crawler.request_delay)
-            
             return response
         except Exception as e:
             logger.error(f"请求失败 {url}: {e}")
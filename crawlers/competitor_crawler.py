@@ -4,7 +4,9 @@
 专注于72小时内的内容爬取
 """
 
+import os
 import re
+import threading
 import time
 import requests
 from datetime import datetime, timedelta
@@ -14,8 +16,14 @@ from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from loguru import logger
+from crawlers.rate_limiter import rate_limiter
+from crawlers.page_fingerprint import compute_raw_fingerprint
+from crawlers.link_cache import link_content_cache, canonicalize_url
+from crawlers.content_diff import split_blocks, fingerprint_blocks, added_blocks, new_content_blocks
 
 class CompetitorPost:
     """竞品帖子数据结构"""
@@ -41,15 +49,32 @@ class CompetitorPost:
             "platform": self.platform
         }
 
+class LinkDeadline:
+    """一次爬取会话中链接爬取的总时限：首次爬取链接时开始计时，并发爬取配置时各爬虫实例共用同一个"""
+    
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._deadline = None
+        self._lock = threading.Lock()
+    
+    def remaining(self) -> float:
+        """剩余秒数（首次调用时开始计时）"""
+        with self._lock:
+            if self._deadline is None:
+                self._deadline = time.monotonic() + self.seconds
+            return max(self._deadline - time.monotonic(), 0.0)
+
 class CompetitorCrawler:
     """竞品爬虫主类"""
     
-    def __init__(self):
+    def __init__(self, link_deadline: LinkDeadline = None):
         self.session = requests.Session()
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
         })
         self.driver = None
+        # 本次爬取会话中链接爬取的总时限，close() 后重新开始
+        self.link_deadline = link_deadline or LinkDeadline(self._get_link_enrich_deadline())
         
         # 72小时时间范围
         self.time_cutoff = datetime.now() - timedelta(hours=72)
@@ -116,8 +141,16 @@ class CompetitorCrawler:
             if not driver:
                 return posts
             
+            rate_limiter.wait(account_url)
             driver.get(account_url)
-            time.sleep(3)
+            
+            # 等待项目列表渲染，出现即返回，最多等待10秒
+            try:
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, '.project-card, .js-react-on-rails-component'))
+                )
+            except TimeoutException:
+                logger.debug("等待Kickstarter项目列表超时")
             
             # 查找项目列表
             project_elements = driver.find_elements(By.CSS_SELECTOR, '.project-card, .js-react-on-rails-component')
@@ -190,9 +223,8 @@ class CompetitorCrawler:
                 'Connection': 'keep-alive'
             }
             
-            # 添加随机延迟
-            import random
-            time.sleep(random.uniform(2, 4))
+            # 按域名限速
+            rate_limiter.wait(json_url)
             
             # 发送请求
             response = self.session.get(json_url, headers=headers, timeout=30)
@@ -287,6 +319,7 @@ class CompetitorCrawler:
             }
             
             # 发送请求
+            rate_limiter.wait(json_url)
             response = self.session.get(json_url, headers=headers, timeout=15)
             response.raise_for_status()
             
@@ -538,6 +571,7 @@ class CompetitorCrawler:
                 'Connection': 'keep-alive'
             }
             
+            rate_limiter.wait(url)
             response = self.session.get(url, headers=headers)
             response.raise_for_status()
             
@@ -595,6 +629,7 @@ class CompetitorCrawler:
         try:
             logger.info(f"爬取Reddit用户: {user_url}")
             
+            rate_limiter.wait(user_url)
             response = self.session.get(user_url)
             response.raise_for_status()
             
@@ -641,6 +676,7 @@ class CompetitorCrawler:
                 search_url = f"https://www.kickstarter.com/discover/advanced?term={keyword}&sort=newest"
                 logger.info(f"搜索Kickstarter关键词: {keyword}")
                 
+                rate_limiter.wait(search_url)
                 response = self.session.get(search_url)
                 response.raise_for_status()
                 
@@ -716,8 +752,14 @@ class CompetitorCrawler:
             logger.error(f"初始化WebDriver失败: {e}")
             return None
     
+    def reset_link_deadline(self) -> LinkDeadline:
+        """开始新的爬取会话：换用尚未计时的链接爬取时限并返回（传给同一会话中的其他爬虫实例）"""
+        self.link_deadline = LinkDeadline(self._get_link_enrich_deadline())
+        return self.link_deadline
+    
     def close(self):
         """关闭资源"""
+        self.reset_link_deadline()
         if self.driver:
             self.driver.quit()
             self.driver = None
@@ -766,9 +808,8 @@ class CompetitorCrawler:
                 'Cache-Control': 'max-age=0'
             }
             
-            # 添加随机延迟
-            import random
-            time.sleep(random.uniform(3, 6))
+            # 按域名限速
+            rate_limiter.wait(new_url)
             
             # 发送请求
             response = self.session.get(new_url, headers=headers, timeout=30)
@@ -928,7 +969,6 @@ class CompetitorCrawler:
         posts = []
         webpage_url = config.get('webpage_url')
         stored_hash = config.get('content_hash')
-        last_content = config.get('last_content', '')
         
         if not webpage_url:
             logger.warning("网页更新模式缺少webpage_url配置")
@@ -942,12 +982,35 @@ class CompetitorCrawler:
                 'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
             }
             
+            # 已建立基线时发送条件请求，未变化的页面返回304且没有响应体
+            if stored_hash:
+                if config.get('etag'):
+                    headers['If-None-Match'] = config['etag']
+                if config.get('last_modified'):
+                    headers['If-Modified-Since'] = config['last_modified']
+            
+            rate_limiter.wait(webpage_url)
             response = self.session.get(webpage_url, headers=headers, timeout=30)
             
+            if response.status_code == 304:
+                logger.info("📋 网页内容无更新（304 Not Modified）")
+                return posts
+            
             if response.status_code != 200:
                 logger.warning(f"网页访问失败，状态码: {response.status_code}")
                 return posts
             
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            
+            # 原始内容指纹未变化时跳过解析和差异对比（服务器不支持条件请求时）
+            raw_fingerprint = compute_raw_fingerprint(response.content)
+            if stored_hash and raw_fingerprint == config.get('raw_fingerprint'):
+                logger.info("📋 网页内容无更新（原始内容指纹未变化）")
+                if etag != config.get('etag') or last_modified != config.get('last_modified'):
+                    self._update_webpage_meta(config['id'], raw_fingerprint, etag, last_modified)
+                return posts
+            
             # 提取并清理网页内容
             from bs4 import BeautifulSoup
             soup = BeautifulSoup(response.text, 'html.parser')
@@ -966,13 +1029,18 @@ class CompetitorCrawler:
             # 检查是否有更新
             if stored_hash and current_hash == stored_hash:
                 logger.info("📋 网页内容无更新")
+                # 保存新的原始指纹和验证信息（如服务器首次返回ETag），下次可直接短路
+                self._update_webpage_meta(config['id'], raw_fingerprint, etag, last_modified)
                 return posts
             
             # 提取页面标题
             title = soup.find('title')
             title_text = title.get_text(strip=True) if title else "网页更新"
             
-            if not last_content:
+            # 仅加载上次的内容块指纹，不加载完整文本
+            old_fingerprints = self._load_webpage_fingerprints(config['id']) if stored_hash else None
+            
+            if not old_fingerprints:
                 # 首次爬取，记录全部内容
                 logger.success(f"🆕 首次爬取网页: {title_text}")
                 
@@ -993,7 +1061,7 @@ class CompetitorCrawler:
                 logger.success(f"🆕 检测到网页更新，分析差异: {title_text}")
                 
                 # 获取更新的具体内容
-                updated_parts = self._extract_content_differences(last_content, current_content, soup)
+                updated_parts = self._extract_content_differences(old_fingerprints, current_content, soup)
                 
                 if updated_parts:
                     # 检查更新部分是否包含链接，并爬取链接内容
@@ -1015,7 +1083,8 @@ class CompetitorCrawler:
                     logger.info("📋 虽然哈希值变化，但未发现明显的内容更新")
             
             # 更新数据库中的哈希值和内容
-            self._update_webpage_data(config['id'], current_hash, current_content)
+            self._update_webpage_data(config['id'], current_hash, current_content,
+                                      raw_fingerprint, etag, last_modified)
             
             logger.success(f"✅ 智能网页更新监控完成，获取 {len(posts)} 条更新")
             
@@ -1024,30 +1093,15 @@ class CompetitorCrawler:
         
         return posts
     
-    def _extract_content_differences(self, old_content: str, new_content: str, soup: BeautifulSoup) -> str:
+    def _extract_content_differences(self, old_fingerprints: List[str], new_content: str, soup: BeautifulSoup) -> str:
         """提取网页内容的具体差异部分"""
         try:
-            import difflib
-            
-            # 按行分割内容进行对比
-            old_lines = old_content.split('\n')
-            new_lines = new_content.split('\n')
-            
-            # 使用difflib找出新增的行
-            differ = difflib.unified_diff(old_lines, new_lines, lineterm='', n=0)
-            diff_lines = list(differ)
-            
-            # 提取新增的内容行
-            added_lines = []
-            for line in diff_lines:
-                if line.startswith('+ ') or line.startswith('+'):
-                    clean_line = line[1:].strip() if line.startswith('+ ') else line[1:].strip()
-                    if clean_line and len(clean_line) > 3:  # 过滤掉太短的行
-                        added_lines.append(clean_line)
+            # 按行切分内容块，用上次保存的块指纹找出新增的行（线性时间）
+            added_lines = added_blocks(old_fingerprints, split_blocks(new_content))
             
             if not added_lines:
                 # 如果没有明显的新增行，尝试找到变化的段落
-                added_lines = self._find_content_blocks_differences(old_content, new_content, soup)
+                added_lines = self._find_content_blocks_differences(old_fingerprints, soup)
             
             # 组合新增内容
             if added_lines:
@@ -1062,28 +1116,19 @@ class CompetitorCrawler:
             logger.error(f"内容差异分析失败: {e}")
             return ""
     
-    def _find_content_blocks_differences(self, old_content: str, new_content: str, soup: BeautifulSoup) -> List[str]:
+    def _find_content_blocks_differences(self, old_fingerprints: List[str], soup: BeautifulSoup) -> List[str]:
         """寻找内容块级别的差异"""
         try:
-            # 尝试从HTML结构中提取新的内容块
-            # 查找常见的内容块标签
-            content_blocks = []
-            
-            for tag in soup.find_all(['article', 'section', 'div', 'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-                block_text = tag.get_text(strip=True)
-                if block_text and len(block_text) > 20:  # 只考虑有足够内容的块
-                    # 检查这个块是否在旧内容中存在
-                    if block_text not in old_content:
-                        content_blocks.append(block_text)
-            
-            return content_blocks
+            # 从HTML结构中提取常见的内容块标签，按文本片段指纹判断是否为新内容
+            tags = soup.find_all(['article', 'section', 'div', 'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
+            return new_content_blocks(old_fingerprints, (tag.stripped_strings for tag in tags))
             
         except Exception as e:
             logger.debug(f"内容块差异分析失败: {e}")
             return []
     
     def _enrich_updates_with_links(self, updated_content: str, base_url: str) -> str:
-        """检查更新内容中的链接并爬取链接内容"""
+        """检查更新内容中的链接并爬取链接内容（并发爬取，已缓存的链接直接使用缓存）"""
         try:
             import re
             from urllib.parse import urljoin, urlparse
@@ -1096,7 +1141,8 @@ class CompetitorCrawler:
                 r'www\.[^\s<>"]+',      # www开头的链接
             ]
             
-            found_links = set()
+            # 按规范化URL去重，保持链接出现的顺序
+            found_links = {}
             for pattern in link_patterns:
                 links = re.findall(pattern, updated_content, re.IGNORECASE)
                 for link in links:
@@ -1108,7 +1154,7 @@ class CompetitorCrawler:
                     try:
                         parsed = urlparse(link)
                         if parsed.netloc:
-                            found_links.add(link)
+                            found_links.setdefault(canonicalize_url(link), link)
                     except:
                         continue
             
@@ -1117,23 +1163,19 @@ class CompetitorCrawler:
                 
                 enriched_content += "🔗 **相关链接内容**:\n"
                 
-                for i, link in enumerate(list(found_links)[:3], 1):  # 最多处理3个链接
-                    try:
-                        logger.info(f"📎 爬取链接 {i}: {link}")
-                        
-                        # 爬取链接内容
-                        link_content = self._crawl_link_content(link)
-                        
-                        if link_content:
-                            enriched_content += f"\n**链接 {i}**: {link}\n"
-                            enriched_content += f"**内容摘要**: {link_content[:500]}{'...' if len(link_content) > 500 else ''}\n"
-                        else:
-                            enriched_content += f"\n**链接 {i}**: {link} (无法获取内容)\n"
-                            
-                    except Exception as e:
-                        logger.warning(f"爬取链接失败 {link}: {e}")
-                        enriched_content += f"\n**链接 {i}**: {link} (爬取失败)\n"
-                        continue
+                links = list(found_links.items())[:3]  # 最多处理3个链接
+                link_contents = self._fetch_link_contents(links)
+                
+                for i, (canonical_url, link) in enumerate(links, 1):
+                    link_content = link_contents.get(canonical_url)
+                    
+                    if link_content:
+                        enriched_content += f"\n**链接 {i}**: {link}\n"
+                        enriched_content += f"**内容摘要**: {link_content[:500]}{'...' if len(link_content) > 500 else ''}\n"
+                    elif link_content is None:
+                        enriched_content += f"\n**链接 {i}**: {link} (爬取超时)\n"
+                    else:
+                        enriched_content += f"\n**链接 {i}**: {link} (无法获取内容)\n"
             
             return enriched_content
             
@@ -1141,6 +1183,75 @@ class CompetitorCrawler:
             logger.error(f"链接内容丰富化失败: {e}")
             return updated_content
     
+    def _fetch_link_contents(self, links: List[tuple]) -> Dict[str, Optional[str]]:
+        """并发爬取链接内容，返回 {规范化URL: 内容}
+        
+        links 为 (规范化URL, 原始链接) 列表。缓存命中的链接不发请求；其余链接并发爬取，
+        一次爬取会话中所有链接共用 LINK_ENRICH_DEADLINE 秒的总时限，超时未完成的链接内容为 None。
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait
+        
+        contents = {}
+        pending = []
+        for canonical_url, link in links:
+            cached = link_content_cache.get(canonical_url)
+            if cached is not None:
+                logger.debug(f"📎 链接内容命中缓存: {link}")
+                contents[canonical_url] = cached
+            else:
+                pending.append((canonical_url, link))
+        
+        if not pending:
+            return contents
+        
+        remaining = self.link_deadline.remaining()
+        if remaining <= 0:
+            logger.warning(f"⏱️ 本次爬取的链接时限已用完，跳过 {len(pending)} 个链接")
+            contents.update((canonical_url, None) for canonical_url, _ in pending)
+            return contents
+        
+        executor = ThreadPoolExecutor(max_workers=len(pending))
+        try:
+            futures = {executor.submit(self._crawl_and_cache_link, canonical_url, link): canonical_url
+                       for canonical_url, link in pending}
+            done, not_done = wait(futures, timeout=remaining)
+            
+            for future in done:
+                contents[futures[future]] = future.result()
+            
+            for future in not_done:
+                logger.warning(f"⏱️ 链接爬取超时: {futures[future]}")
+                contents[futures[future]] = None
+        finally:
+            # 不等待超时的请求结束，它们完成后自行退出
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return contents
+    
+    def _crawl_and_cache_link(self, canonical_url: str, link: str) -> str:
+        """爬取链接内容并写入缓存（超时的请求完成后也会写入，下次直接命中）"""
+        content = self._crawl_link_content(link)
+        if content:
+            link_content_cache.set(canonical_url, content)
+        return content
+    
+    def _get_link_enrich_deadline(self) -> float:
+        """获取链接爬取的总时限（秒）- 优先从配置文件，然后环境变量，默认20秒"""
+        value = None
+        try:
+            import config
+            value = getattr(config, 'LINK_ENRICH_DEADLINE', None)
+        except ImportError:
+            pass
+        
+        if value is None:
+            value = os.getenv('LINK_ENRICH_DEADLINE')
+        
+        try:
+            return max(1.0, float(value)) if value is not None else 20.0
+        except (TypeError, ValueError):
+            return 20.0
+    
     def _crawl_link_content(self, url: str) -> str:
         """爬取单个链接的内容"""
         try:
@@ -1148,7 +1259,9 @@ class CompetitorCrawler:
                 'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
             }
             
-            response = self.session.get(url, headers=headers, timeout=15)
+            rate_limiter.wait(url)
+            # 在链接爬取线程中执行，requests.Session 不是线程安全的，每次请求使用独立的连接
+            response = requests.get(url, headers=headers, timeout=15)
             
             if response.status_code != 200:
                 return ""
@@ -1173,20 +1286,73 @@ class CompetitorCrawler:
             logger.debug(f"链接内容爬取失败 {url}: {e}")
             return ""
     
-    def _update_webpage_data(self, config_id: int, new_hash: str, new_content: str):
-        """更新配置中的网页数据（哈希值和内容）"""
+    def _load_webpage_fingerprints(self, config_id: int) -> List[str]:
+        """加载上次保存的内容块指纹"""
         try:
-            from models.competitor_models import db, MonitorConfig
+            from models.competitor_models import db, MonitorConfig, WebpageState
+            
+            block_hashes = db.session.query(WebpageState.block_hashes).filter_by(monitor_config_id=config_id).scalar()
+            if block_hashes:
+                return block_hashes
+            
+            # 兼容尚未迁移的旧数据：上次内容仍保存在监控配置的 last_content 列中
+            last_content = db.session.query(MonitorConfig.last_content).filter_by(id=config_id).scalar()
+            if last_content:
+                return fingerprint_blocks(split_blocks(last_content))
+            
+        except Exception as e:
+            logger.error(f"加载网页内容指纹失败: {e}")
+        
+        return None
+    
+    def _update_webpage_data(self, config_id: int, new_hash: str, new_content: str,
+                             raw_fingerprint: str = None, etag: str = None, last_modified: str = None):
+        """更新网页数据（监控配置中的哈希值和验证信息，网页状态表中的块指纹和压缩内容）"""
+        try:
+            from models.competitor_models import db, MonitorConfig, WebpageState
+            from services.webpage_snapshot_service import WebpageSnapshotService
             
             config = MonitorConfig.query.get(config_id)
             if config:
+                state = WebpageState.query.filter_by(monitor_config_id=config_id).first()
+                if not state:
+                    state = WebpageState(monitor_config_id=config_id)
+                    db.session.add(state)
+                
+                # 保存历史版本（上一版本文本用于计算增量）
+                WebpageSnapshotService().record_snapshot(config_id, new_content, new_hash,
+                                                         previous_content=state.get_content() or None)
+                
+                state.content_hash = new_hash
+                state.set_content(new_content, fingerprint_blocks(split_blocks(new_content)))
+                
                 config.content_hash = new_hash
-                config.last_content = new_content
+                config.last_content = None
+                config.raw_fingerprint = raw_fingerprint
+                config.etag = etag
+                config.last_modified = last_modified
                 db.session.commit()
                 logger.debug(f"已更新配置 {config_id} 的网页数据")
             
         except Exception as e:
-            logger.error(f"更新网页数据失败: {e}") 
+            logger.error(f"更新网页数据失败: {e}")
+            db.session.rollback()
+    
+    def _update_webpage_meta(self, config_id: int, raw_fingerprint: str, etag: str, last_modified: str):
+        """内容未变化时仅更新原始指纹和条件请求验证信息（ETag / Last-Modified）"""
+        try:
+            from models.competitor_models import db, MonitorConfig
+            
+            config = MonitorConfig.query.get(config_id)
+            if config:
+                config.raw_fingerprint = raw_fingerprint
+                config.etag = etag
+                config.last_modified = last_modified
+                db.session.commit()
+                logger.debug(f"已更新配置 {config_id} 的原始指纹和验证信息")
+            
+        except Exception as e:
+            logger.error(f"更新网页指纹信息失败: {e}")
     
     def _crawl_facebook_account(self, account_url: str) -> List[CompetitorPost]:
         """爬取Facebook账号的帖子"""
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+网页内容块差异引擎
+把文本切分为内容块（行）并计算块指纹，用哈希集合/计数在线性时间内找出新增内容块
+"""
+
+import hashlib
+from collections import Counter
+from typing import Iterable, List
+
+# 新增内容中过滤掉的过短行（与原 difflib 实现保持一致：长度需大于3）
+MIN_BLOCK_LENGTH = 3
+
+# 块指纹字节数（64位），足以区分同一页面内的内容块
+FINGERPRINT_BYTES = 8
+
+
+def split_blocks(text: str) -> List[str]:
+    """按行切分内容块，去掉首尾空白"""
+    if not text:
+        return []
+    return [line.strip() for line in text.split('\n')]
+
+
+def block_fingerprint(block: str) -> str:
+    """计算单个内容块的指纹"""
+    return hashlib.blake2b(block.encode('utf-8'), digest_size=FINGERPRINT_BYTES).hexdigest()
+
+
+def fingerprint_blocks(blocks: Iterable[str]) -> List[str]:
+    """批量计算内容块指纹，顺序与输入一致"""
+    return [block_fingerprint(block) for block in blocks]
+
+
+def added_blocks(old_fingerprints: Iterable[str], new_blocks: List[str],
+                 min_length: int = MIN_BLOCK_LENGTH) -> List[str]:
+    """找出新内容中新增的内容块，保持新内容中的顺序
+
+    旧内容按指纹计数（多重集合），新内容中每个块依次抵消一次旧指纹，
+    抵消不掉的即为新增块。重复出现的行只有多出来的次数算作新增；
+    与 difflib 的最长公共子序列不同，仅位置移动的块不算新增。
+    """
+    remaining = Counter(old_fingerprints)
+    added = []
+
+    for block in new_blocks:
+        fingerprint = block_fingerprint(block)
+        if remaining[fingerprint] > 0:
+            remaining[fingerprint] -= 1
+        elif block and len(block) > min_length:
+            added.append(block)
+
+    return added
+
+
+def new_content_blocks(old_fingerprints: Iterable[str], candidate_blocks: Iterable[List[str]],
+                       min_length: int = 20) -> List[str]:
+    """在HTML内容块中找出包含新文本的块
+
+    candidate_blocks 为每个块的文本片段列表（如 tag.stripped_strings），
+    只要块中有一个片段的指纹不在旧内容中，该块即视为新内容块。
+    返回块的拼接文本，长度需大于 min_length。
+    """
+    known = set(old_fingerprints)
+    blocks = []
+
+    for strings in candidate_blocks:
+        strings = list(strings)
+        block_text = ''.join(strings)
+        if len(block_text) <= min_length:
+            continue
+        # 片段内部可能含换行，按旧内容相同的方式切分后再比对
+        if any(block_fingerprint(line) not in known
+               for s in strings for line in split_blocks(s)):
+            blocks.append(block_text)
+
+    return blocks
+
+
+def line_delta(old_lines: List[str], new_lines: List[str]) -> List[list]:
+    """把新版本编码为相对旧版本的增量操作（线性时间）
+
+    操作为 ['c', 起始行, 行数]（从旧版本复制连续行）或 ['i', [行...]]（插入新行）。
+    每个新行优先延续上一段复制，否则用旧版本的行索引定位新的复制起点，
+    增量大小只与变化的行数有关，与页面大小无关。
+    """
+    positions = {}
+    for index, line in enumerate(old_lines):
+        positions.setdefault(line, index)
+
+    ops = []
+    inserted = []
+    i = 0
+    while i < len(new_lines):
+        line = new_lines[i]
+        start = None
+        # 紧接上一段复制的位置优先，避免重复行（空行等）打断复制
+        if ops and ops[-1][0] == 'c':
+            next_pos = ops[-1][1] + ops[-1][2]
+            if next_pos < len(old_lines) and old_lines[next_pos] == line:
+                start = next_pos
+        if start is None:
+            start = positions.get(line)
+        if start is None:
+            inserted.append(line)
+            i += 1
+            continue
+
+        if inserted:
+            ops.append(['i', inserted])
+            inserted = []
+
+        length = 1
+        while (i + length < len(new_lines) and start + length < len(old_lines)
+               and new_lines[i + length] == old_lines[start + length]):
+            length += 1
+
+        if ops and ops[-1][0] == 'c' and ops[-1][1] + ops[-1][2] == start:
+            ops[-1][2] += length
+        else:
+            ops.append(['c', start, length])
+        i += length
+
+    if inserted:
+        ops.append(['i', inserted])
+    return ops
+
+
+def apply_line_delta(old_lines: List[str], ops: List[list]) -> List[str]:
+    """按增量操作从旧版本重建新版本"""
+    lines = []
+    for op in ops:
+        if op[0] == 'c':
+            lines.extend(old_lines[op[1]:op[1] + op[2]])
+        else:
+            lines.extend(op[1])
+    return lines
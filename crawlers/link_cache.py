@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+链接内容缓存 - 按规范化URL缓存已爬取的链接内容（带过期时间）
+同一链接在有效期内重复出现时不再重新请求
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from loguru import logger
+
+# 规范化时去掉的跟踪参数（精确匹配或前缀匹配）
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid', 'ref_src', 'spm'}
+TRACKING_PARAM_PREFIXES = ('utm_',)
+
+DEFAULT_TTL = 6 * 3600  # 默认缓存6小时
+DEFAULT_MAX_ENTRIES = 1000
+
+
+def canonicalize_url(url: str) -> str:
+    """规范化URL：协议和域名小写、去掉默认端口、片段和跟踪参数，查询参数排序，去掉路径末尾的斜杠"""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+
+    scheme = (parts.scheme or 'https').lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and not ((scheme == 'http' and parts.port == 80) or (scheme == 'https' and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+             if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES)]
+    query.sort()
+
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+class TTLCache:
+    """带过期时间和容量上限的缓存（线程安全，超出容量时淘汰最久未使用的条目）"""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _load_cache_settings():
+    """读取配置文件中的 LINK_CACHE_TTL / LINK_CACHE_MAX_ENTRIES"""
+    ttl, max_entries = DEFAULT_TTL, DEFAULT_MAX_ENTRIES
+    try:
+        import config
+        ttl = float(getattr(config, 'LINK_CACHE_TTL', ttl))
+        max_entries = int(getattr(config, 'LINK_CACHE_MAX_ENTRIES', max_entries))
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.warning(f"⚠️ 链接缓存配置无效，使用默认值: {e}")
+        ttl, max_entries = DEFAULT_TTL, DEFAULT_MAX_ENTRIES
+    return ttl, max_entries
+
+
+# 全局链接内容缓存，所有爬虫实例共享
+link_content_cache = TTLCache(*_load_cache_settings())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+网页原始内容指纹
+对响应字节做轻量归一化后计算哈希，去掉每次请求都会变化的令牌，
+指纹未变化时可以跳过HTML解析和差异对比
+"""
+
+import hashlib
+import re
+from typing import Iterable, List, Pattern, Tuple, Union
+from loguru import logger
+
+# 默认的易变令牌规则：(正则, 替换内容)
+# 脚本和样式不参与文本提取，整体去掉；其余规则只抹掉变化的值
+DEFAULT_VOLATILE_PATTERNS: List[Tuple[bytes, bytes]] = [
+    # 脚本、样式、注释
+    (rb'<script\b[^>]*>.*?</script\s*>', b''),
+    (rb'<style\b[^>]*>.*?</style\s*>', b''),
+    (rb'<!--.*?-->', b''),
+    # CSRF令牌（meta标签和隐藏表单字段）
+    (rb'<meta[^>]+name\s*=\s*["\'][^"\']*(?:csrf|xsrf|_token)[^"\']*["\'][^>]*>', b''),
+    (rb'<input[^>]+name\s*=\s*["\'][^"\']*(?:csrf|xsrf|authenticity_token|_token)[^"\']*["\'][^>]*>', b''),
+    # nonce 属性
+    (rb'\snonce\s*=\s*["\'][^"\']*["\']', b''),
+    # 静态资源的缓存参数和时间戳参数，如 app.js?v=123、style.css?_=1699999999、feed?timestamp=1699999999
+    (rb'([?&](?:v|ver|version|_|t|ts|timestamp|cb|cachebuster|rev|hash)=)[^&"\'\s>]*', rb'\1'),
+    # ISO时间戳
+    (rb'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?', b''),
+    # 时间类 data 属性中的Unix时间戳（秒/毫秒），如 data-timestamp="1699999999"、data-updated-at="1699999999000"；
+    # 正文中的订单号、价格、数量等普通数字不处理，其变化仍会被检测到
+    (rb'(\sdata-(?:\w+-)*(?:time|timestamp|ts|date|updated|created|modified|expires)[\w-]*\s*=\s*["\']?)'
+     rb'1\d{9}(?:\d{3})?\b', rb'\1'),
+    # 空白字符
+    (rb'\s+', b' '),
+]
+
+CompiledPattern = Tuple[Pattern[bytes], bytes]
+
+
+def compile_patterns(patterns: Iterable[Tuple[Union[str, bytes], Union[str, bytes]]]) -> List[CompiledPattern]:
+    """编译 (正则, 替换内容) 规则列表，字符串会按UTF-8转为字节"""
+    compiled = []
+    for pattern, replacement in patterns:
+        if isinstance(pattern, str):
+            pattern = pattern.encode('utf-8')
+        if isinstance(replacement, str):
+            replacement = replacement.encode('utf-8')
+        compiled.append((re.compile(pattern, re.IGNORECASE | re.DOTALL), replacement))
+    return compiled
+
+
+def _load_extra_patterns() -> List[CompiledPattern]:
+    """读取配置文件中的 WEBPAGE_VOLATILE_PATTERNS（正则字符串，匹配内容会被删除）"""
+    try:
+        import config
+        extra = getattr(config, 'WEBPAGE_VOLATILE_PATTERNS', None) or []
+        return compile_patterns((pattern, b'') for pattern in extra)
+    except ImportError:
+        return []
+    except Exception as e:
+        logger.warning(f"⚠️ WEBPAGE_VOLATILE_PATTERNS 配置无效，已忽略: {e}")
+        return []
+
+
+# 自定义规则先于默认规则执行，避免空白归一化后自定义正则无法匹配
+_VOLATILE_PATTERNS = _load_extra_patterns() + compile_patterns(DEFAULT_VOLATILE_PATTERNS)
+
+
+def normalize_raw_content(content: bytes, patterns: List[CompiledPattern] = None) -> bytes:
+    """去掉易变令牌并归一化空白"""
+    for pattern, replacement in (patterns if patterns is not None else _VOLATILE_PATTERNS):
+        content = pattern.sub(replacement, content)
+    return content.strip()
+
+
+def compute_raw_fingerprint(content: bytes, patterns: List[CompiledPattern] = None) -> str:
+    """计算响应原始字节的归一化指纹"""
+    return hashlib.md5(normalize_raw_content(content or b'', patterns)).hexdigest()
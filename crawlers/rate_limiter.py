@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+按域名限速器 - 令牌桶实现
+同一域名请求过快时才等待，不同域名之间互不阻塞
+"""
+
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+from loguru import logger
+
+# 默认的按域名限速规则：(每秒请求数, 突发容量)
+# 域名按后缀匹配，例如 old.reddit.com 使用 reddit.com 的规则
+DEFAULT_HOST_LIMITS: Dict[str, Tuple[float, int]] = {
+    'reddit.com': (1 / 3, 1),
+    'kickstarter.com': (1 / 3, 1),
+    'facebook.com': (1 / 3, 1),
+}
+
+# 未配置的域名使用的默认规则
+DEFAULT_RATE = 0.5
+DEFAULT_BURST = 2
+
+
+class TokenBucket:
+    """单个域名的令牌桶"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+
+    def reserve(self) -> float:
+        """预占一个令牌，返回需要等待的秒数（调用方需持有锁）"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+        # 令牌可以透支：排队的请求依次往后推，等待时间互不重叠
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+
+class HostRateLimiter:
+    """按域名的令牌桶限速器（线程安全）"""
+
+    def __init__(self, default_rate: float = DEFAULT_RATE, default_burst: int = DEFAULT_BURST,
+                 host_limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        self.host_limits: Dict[str, Tuple[float, int]] = dict(host_limits or {})
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host: str, rate: float, burst: int = 1):
+        """设置某个域名的限速规则（每秒请求数、突发容量）"""
+        host = self._normalize_host(host)
+        with self._lock:
+            self.host_limits[host] = (rate, burst)
+            # 丢弃已有的桶，下次请求按新规则创建
+            self._buckets = {k: v for k, v in self._buckets.items()
+                             if k != host and not k.endswith('.' + host)}
+
+    def wait(self, url: str) -> float:
+        """在请求该URL前调用，必要时阻塞，返回实际等待的秒数"""
+        host = self._normalize_host(urlparse(url).netloc or url)
+        if not host:
+            return 0.0
+
+        with self._lock:
+            # 匹配到规则的子域名共用同一个桶
+            key, (rate, burst) = self._limits_for(host)
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(rate, burst)
+                self._buckets[key] = bucket
+            delay = bucket.reserve()
+
+        if delay > 0:
+            logger.debug(f"⏳ 限速等待 {host}: {delay:.2f}s")
+            time.sleep(delay)
+        return delay
+
+    def _limits_for(self, host: str) -> Tuple[str, Tuple[float, int]]:
+        """按后缀匹配域名规则，返回 (桶的键, 规则)"""
+        parts = host.split('.')
+        for i in range(len(parts) - 1):
+            suffix = '.'.join(parts[i:])
+            if suffix in self.host_limits:
+                return suffix, self.host_limits[suffix]
+        return host, (self.default_rate, self.default_burst)
+
+    @staticmethod
+    def _normalize_host(host: str) -> str:
+        host = host.lower().split('@')[-1].split(':')[0]
+        return host[4:] if host.startswith('www.') else host
+
+
+def _load_host_limits() -> Dict[str, Tuple[float, int]]:
+    """合并默认规则和配置文件中的 HOST_RATE_LIMITS"""
+    limits = dict(DEFAULT_HOST_LIMITS)
+    try:
+        import config
+        custom = getattr(config, 'HOST_RATE_LIMITS', None)
+        if custom:
+            for host, (rate, burst) in custom.items():
+                limits[HostRateLimiter._normalize_host(host)] = (float(rate), int(burst))
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.warning(f"⚠️ HOST_RATE_LIMITS 配置无效，使用默认限速规则: {e}")
+    return limits
+
+
+# 全局限速器实例，所有爬虫共享
+rate_limiter = HostRateLimiter(host_limits=_load_host_limits())
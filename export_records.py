@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+数据导出工具
+把竞品监控库的帖子、会话或内容抓取库的帖子流式导出为 JSONL / CSV（gzip 或 zstd 压缩）
+
+示例:
+    python export_records.py posts -o posts.jsonl.gz --start-date 2025-07-01 --platform Reddit
+    python export_records.py sessions -o sessions.csv --format csv --compression none
+    python export_records.py crawled-posts -o crawled.jsonl.zst --compression zstd --archived 1
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from models.sqlite_profile import create_sqlite_engine
+from services.export_service import (
+    Export, ExportError, COMPETITOR_DATASETS, CRAWLED_DATASETS, EXPORT_FORMATS, EXPORT_COMPRESSIONS
+)
+
+# Flask-SQLAlchemy 3.x 将相对路径的SQLite数据库放在 instance 目录下
+COMPETITOR_DB_CANDIDATES = [Path("instance/competitor_monitor.db"), Path("competitor_monitor.db")]
+FEISHU_DB_CANDIDATES = [Path("instance/feishu_bot.db"), Path("feishu_bot.db")]
+
+# 命令行数据集名称 -> (数据集定义, 数据库候选路径)
+DATASETS = {
+    'posts': (COMPETITOR_DATASETS, 'posts', COMPETITOR_DB_CANDIDATES),
+    'sessions': (COMPETITOR_DATASETS, 'sessions', COMPETITOR_DB_CANDIDATES),
+    'crawled-posts': (CRAWLED_DATASETS, 'posts', FEISHU_DB_CANDIDATES),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='流式导出监控数据')
+    parser.add_argument('dataset', choices=list(DATASETS), help='导出的数据')
+    parser.add_argument('-o', '--output', required=True, help='输出文件路径')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='jsonl')
+    parser.add_argument('--compression', choices=EXPORT_COMPRESSIONS, default='gzip')
+    parser.add_argument('--db', help='数据库文件路径（默认自动查找）')
+    parser.add_argument('--start-date', dest='start_date', help='开始日期 YYYY-MM-DD')
+    parser.add_argument('--end-date', dest='end_date', help='结束日期 YYYY-MM-DD（包含当天）')
+    parser.add_argument('--platform', help='平台（内容抓取库为来源网站）')
+    parser.add_argument('--config-id', dest='config_id', type=int, help='监控配置ID')
+    parser.add_argument('--session-id', dest='session_id', type=int, help='爬取会话ID')
+    parser.add_argument('--archived', help='只导出已存档(1)或未存档(0)的帖子')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    datasets, name, candidates = DATASETS[args.dataset]
+
+    db_path = Path(args.db) if args.db else next((path for path in candidates if path.exists()), None)
+    if not db_path or not db_path.exists():
+        print(f"❌ 数据库不存在: {args.db or ', '.join(str(path) for path in candidates)}")
+        return 1
+
+    try:
+        export = Export.from_args(datasets, name, vars(args))
+    except ExportError as e:
+        print(f"❌ {e}")
+        return 1
+
+    engine = create_sqlite_engine(f"sqlite:///{db_path.resolve()}")
+    started = time.time()
+    try:
+        written = export.write_to(engine, args.output)
+    finally:
+        engine.dispose()
+
+    print(f"✅ 已导出到 {args.output}（{written / 1024:.1f} KB，耗时 {time.time() - started:.1f} 秒）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -80,7 +80,7 @@ def show_session_details(session_id):
         # 显示帖子列表
         posts = session_data.get('posts', [])
         if posts:
-            print(f"\n📄 帖子列表 ({len(posts)} 条):")
+            print(f"\n📄 帖子列表 ({session_data['post_count']} 条):")
             print("-" * 40)
             for i, post in enumerate(posts[:5], 1):  # 只显示前5条
                 print(f"{i}. {post['title'][:50]}...")
@@ -88,8 +88,8 @@ def show_session_details(session_id):
                 print(f"   👤 {post['author']} | 🕒 {post['post_time'][:16] if post['post_time'] else 'N/A'}")
                 print()
             
-            if len(posts) > 5:
-                print(f"... 还有 {len(posts) - 5} 条帖子")
+            if session_data['post_count'] > 5:
+                print(f"... 还有 {session_data['post_count'] - 5} 条帖子")
                 
     except Exception as e:
         print(f"❌ 获取会话详情失败: {e}")
@@ -201,6 +201,25 @@ def test_delete_api():
     except Exception as e:
         print(f"❌ API测试失败: {e}")
 
+def run_ai_jobs():
+    """执行所有已到期的AI任务（不启动Web服务时处理积压的会话汇总，可由cron定时调用）"""
+    print_header("🤖 执行AI任务")
+    
+    try:
+        from competitor_app import app, monitor_service
+        
+        with app.app_context():
+            before = monitor_service.job_queue.stats()
+            print(f"📥 排队中 {before['queued']} 个，执行中 {before['running']} 个")
+            count = monitor_service.job_queue.run_pending(worker='manage_records')
+            after = monitor_service.job_queue.stats()
+            print(f"✅ 已执行 {count} 个任务，仍排队 {after['queued']} 个")
+            if after['paused_seconds']:
+                print(f"⏳ 遇到限流，{after['paused_seconds']:.0f} 秒后再次运行可继续执行")
+            
+    except Exception as e:
+        print(f"❌ 执行AI任务失败: {e}")
+
 def main():
     """主菜单"""
     while True:
@@ -210,9 +229,10 @@ def main():
         print("3. 删除监控会话")
         print("4. 清理老记录")
         print("5. 测试删除API")
+        print("6. 执行排队中的AI任务")
         print("0. 退出")
         
-        choice = input("\n请选择操作 (0-5): ").strip()
+        choice = input("\n请选择操作 (0-6): ").strip()
         
         if choice == '0':
             print("👋 再见！")
@@ -232,12 +252,18 @@ def main():
             clear_old_records_interactive()
         elif choice == '5':
             test_delete_api()
+        elif choice == '6':
+            run_ai_jobs()
         else:
             print("❌ 无效选择，请重试")
 
 if __name__ == "__main__":
     try:
-        main()
+        # python manage_records.py run-ai-jobs 直接执行AI任务后退出
+        if sys.argv[1:] == ['run-ai-jobs']:
+            run_ai_jobs()
+        else:
+            main()
     except KeyboardInterrupt:
         print("\n\n👋 操作已取消，再见！")
     except Exception as e:
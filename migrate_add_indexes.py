@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本 - 为常用查询添加索引
+索引定义以模型中的 __table_args__ / index=True 为准，本脚本为已有数据库补建缺失的索引并更新统计信息
+竞品监控库: crawl_sessions, competitor_posts；内容抓取库: crawled_posts, crawled_comments, system_logs
+"""
+
+import sqlite3
+from loguru import logger
+from pathlib import Path
+
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateIndex
+
+from models.competitor_models import CrawlSession, CompetitorPost
+from models.database import CrawledPost, CrawledComment, SystemLog
+
+# Flask-SQLAlchemy 3.x 将相对路径的SQLite数据库放在 instance 目录下
+COMPETITOR_DB_CANDIDATES = [Path("instance/competitor_monitor.db"), Path("competitor_monitor.db")]
+FEISHU_DB_CANDIDATES = [Path("instance/feishu_bot.db"), Path("feishu_bot.db")]
+
+# (数据库候选路径, 需要补建索引的模型)
+TARGETS = [
+    (COMPETITOR_DB_CANDIDATES, [CrawlSession, CompetitorPost]),
+    (FEISHU_DB_CANDIDATES, [CrawledPost, CrawledComment, SystemLog]),
+]
+
+def create_model_indexes(cursor, model) -> int:
+    """按模型定义补建索引，返回新建的索引数（唯一索引由对应的迁移脚本负责）"""
+    table = model.__table__
+    cursor.execute(f"PRAGMA table_info({table.name})")
+    columns = {column[1] for column in cursor.fetchall()}
+    if not columns:
+        logger.info(f"{table.name} 表不存在，跳过")
+        return 0
+
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table.name,))
+    existing = {row[0] for row in cursor.fetchall()}
+
+    created = 0
+    for index in sorted(table.indexes, key=lambda index: index.name):
+        if index.unique or index.name in existing:
+            continue
+        missing = [column.name for column in index.columns if column.name not in columns]
+        if missing:
+            logger.warning(f"⚠️ {table.name} 缺少字段 {missing}，跳过索引 {index.name}（请先运行对应的迁移脚本）")
+            continue
+
+        logger.info(f"创建索引 {index.name} ({', '.join(column.name for column in index.columns)})...")
+        cursor.execute(str(CreateIndex(index, if_not_exists=True).compile(dialect=sqlite.dialect())))
+        created += 1
+
+    return created
+
+def migrate_database():
+    """执行数据库迁移"""
+    success = True
+
+    for candidates, models in TARGETS:
+        db_path = next((path for path in candidates if path.exists()), None)
+        if not db_path:
+            logger.info(f"{', '.join(str(path) for path in candidates)} 不存在，跳过迁移")
+            continue
+
+        try:
+            conn = sqlite3.connect(str(db_path))
+            cursor = conn.cursor()
+            created = sum(create_model_indexes(cursor, model) for model in models)
+            # 更新统计信息，让查询规划器按实际数据分布选择索引
+            cursor.execute("ANALYZE")
+            conn.commit()
+            logger.info(f"✅ 数据库迁移完成: {db_path}，新建索引 {created} 个")
+
+        except Exception as e:
+            logger.error(f"❌ 数据库迁移失败 {db_path}: {e}")
+            success = False
+        finally:
+            if 'conn' in locals():
+                conn.close()
+
+    return success
+
+if __name__ == "__main__":
+    migrate_database()
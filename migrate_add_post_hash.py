@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本 - 添加帖子指纹字段（post_hash）及唯一索引并回填历史数据
+竞品监控库: competitor_posts；内容抓取库: crawled_posts
+"""
+
+import sqlite3
+from loguru import logger
+from pathlib import Path
+
+from models.competitor_models import CompetitorPost
+from models.database import CrawledPost
+
+# Flask-SQLAlchemy 3.x 将相对路径的SQLite数据库放在 instance 目录下
+COMPETITOR_DB_CANDIDATES = [Path("instance/competitor_monitor.db"), Path("competitor_monitor.db")]
+FEISHU_DB_CANDIDATES = [Path("instance/feishu_bot.db"), Path("feishu_bot.db")]
+
+def _competitor_post_hash(row):
+    _, title, post_url = row[:3]
+    return CompetitorPost.compute_hash(title, post_url)
+
+def _crawled_post_hash(row):
+    _, title, post_url, author, source_website = row
+    return CrawledPost.compute_hash(title, author, source_website, post_url)
+
+# (数据库候选路径, 表名, 查询字段, 指纹计算函数)
+TARGETS = [
+    (COMPETITOR_DB_CANDIDATES, "competitor_posts", "id, title, post_url", _competitor_post_hash),
+    (FEISHU_DB_CANDIDATES, "crawled_posts", "id, title, post_url, author, source_website", _crawled_post_hash),
+]
+
+def migrate_table(cursor, table: str, fields: str, compute_hash):
+    """添加字段、回填指纹并创建唯一索引"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    columns = [column[1] for column in cursor.fetchall()]
+    if not columns:
+        logger.info(f"{table} 表不存在，跳过")
+        return
+    
+    if 'post_hash' not in columns:
+        logger.info(f"添加 {table}.post_hash 字段...")
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN post_hash VARCHAR(32)")
+    
+    # 按id顺序回填，指纹重复的历史帖子只有最早的一条保留指纹，其余保持NULL
+    cursor.execute(f"SELECT post_hash FROM {table} WHERE post_hash IS NOT NULL")
+    seen = {row[0] for row in cursor.fetchall()}
+    cursor.execute(f"SELECT {fields} FROM {table} WHERE post_hash IS NULL ORDER BY id")
+    
+    updates = []
+    duplicates = 0
+    for row in cursor.fetchall():
+        post_hash = compute_hash(row)
+        if post_hash in seen:
+            duplicates += 1
+            continue
+        seen.add(post_hash)
+        updates.append((post_hash, row[0]))
+    
+    cursor.executemany(f"UPDATE {table} SET post_hash = ? WHERE id = ?", updates)
+    logger.info(f"{table}: 回填指纹 {len(updates)} 条，重复帖子 {duplicates} 条")
+    
+    cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{table}_post_hash ON {table} (post_hash)")
+
+def migrate_database():
+    """执行数据库迁移"""
+    success = True
+    
+    for candidates, table, fields, compute_hash in TARGETS:
+        db_path = next((path for path in candidates if path.exists()), None)
+        if not db_path:
+            logger.info(f"{table} 所在数据库文件不存在，跳过迁移")
+            continue
+        
+        try:
+            conn = sqlite3.connect(str(db_path))
+            migrate_table(conn.cursor(), table, fields, compute_hash)
+            conn.commit()
+            logger.info(f"✅ 数据库迁移完成: {db_path}")
+            
+        except Exception as e:
+            logger.error(f"❌ 数据库迁移失败 {db_path}: {e}")
+            success = False
+        finally:
+            if 'conn' in locals():
+                conn.close()
+    
+    return success
+
+if __name__ == "__main__":
+    migrate_database()
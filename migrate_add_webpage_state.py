@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本 - 将网页更新模式的上次内容迁移到 webpage_states 表
+monitor_configs.last_content 中的完整文本转换为内容块指纹 + zlib压缩文本，原列清空
+"""
+
+import json
+import sqlite3
+import zlib
+from datetime import datetime
+from loguru import logger
+from pathlib import Path
+
+from crawlers.content_diff import split_blocks, fingerprint_blocks
+
+# Flask-SQLAlchemy 3.x 将相对路径的SQLite数据库放在 instance 目录下
+DB_CANDIDATES = [Path("instance/competitor_monitor.db"), Path("competitor_monitor.db")]
+
+CREATE_WEBPAGE_STATES = """
+CREATE TABLE IF NOT EXISTS webpage_states (
+    id INTEGER NOT NULL PRIMARY KEY,
+    created_at DATETIME,
+    updated_at DATETIME,
+    monitor_config_id INTEGER NOT NULL UNIQUE REFERENCES monitor_configs (id),
+    content_hash VARCHAR(64),
+    block_hashes JSON,
+    compressed_content BLOB,
+    content_length INTEGER
+)
+"""
+
+def migrate_database():
+    """执行数据库迁移"""
+    db_path = next((path for path in DB_CANDIDATES if path.exists()), None)
+    
+    if not db_path:
+        logger.info("数据库文件不存在，跳过迁移")
+        return True
+    
+    try:
+        conn = sqlite3.connect(str(db_path))
+        cursor = conn.cursor()
+        
+        cursor.execute(CREATE_WEBPAGE_STATES)
+        
+        cursor.execute("PRAGMA table_info(monitor_configs)")
+        columns = [column[1] for column in cursor.fetchall()]
+        if 'last_content' not in columns:
+            conn.commit()
+            logger.info("monitor_configs 表没有 last_content 字段，无需迁移数据")
+            return True
+        
+        cursor.execute(
+            "SELECT id, content_hash, last_content FROM monitor_configs "
+            "WHERE last_content IS NOT NULL AND last_content != ''"
+        )
+        rows = cursor.fetchall()
+        logger.info(f"需要迁移的网页内容: {len(rows)} 条")
+        
+        now = datetime.utcnow().isoformat(sep=' ')
+        for config_id, content_hash, last_content in rows:
+            block_hashes = fingerprint_blocks(split_blocks(last_content))
+            cursor.execute(
+                "INSERT INTO webpage_states (created_at, updated_at, monitor_config_id, content_hash, "
+                "block_hashes, compressed_content, content_length) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(monitor_config_id) DO UPDATE SET updated_at = excluded.updated_at, "
+                "content_hash = excluded.content_hash, block_hashes = excluded.block_hashes, "
+                "compressed_content = excluded.compressed_content, content_length = excluded.content_length",
+                (now, now, config_id, content_hash, json.dumps(block_hashes),
+                 zlib.compress(last_content.encode('utf-8')), len(last_content))
+            )
+            cursor.execute("UPDATE monitor_configs SET last_content = NULL WHERE id = ?", (config_id,))
+        
+        conn.commit()
+        
+        # 释放清空 last_content 后的空闲页
+        if rows:
+            conn.execute("VACUUM")
+        
+        logger.info(f"✅ 数据库迁移完成: {db_path}")
+        return True
+        
+    except Exception as e:
+        logger.error(f"❌ 数据库迁移失败: {e}")
+        return False
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+if __name__ == "__main__":
+    migrate_database()
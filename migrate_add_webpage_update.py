@@ -1 +1,58 @@
- 
\ No newline at end of file
+#!/usr/bin/env python3
+"""
+数据库迁移脚本 - 添加网页更新监控相关字段
+"""
+
+import sqlite3
+from loguru import logger
+from pathlib import Path
+
+# Flask-SQLAlchemy 3.x 将相对路径的SQLite数据库放在 instance 目录下
+DB_CANDIDATES = [Path("instance/competitor_monitor.db"), Path("competitor_monitor.db")]
+
+# monitor_configs 表需要的字段及类型
+WEBPAGE_UPDATE_COLUMNS = [
+    ("webpage_url", "VARCHAR(500)"),
+    ("content_hash", "VARCHAR(64)"),
+    ("last_content", "TEXT"),
+    ("raw_fingerprint", "VARCHAR(64)"),
+    ("etag", "VARCHAR(255)"),
+    ("last_modified", "VARCHAR(100)"),
+]
+
+def migrate_database():
+    """执行数据库迁移"""
+    db_path = next((path for path in DB_CANDIDATES if path.exists()), None)
+
+    if not db_path:
+        logger.info("数据库文件不存在，跳过迁移")
+        return True
+
+    try:
+        conn = sqlite3.connect(str(db_path))
+        cursor = conn.cursor()
+
+        # 检查是否已经存在新字段
+        cursor.execute("PRAGMA table_info(monitor_configs)")
+        columns = [column[1] for column in cursor.fetchall()]
+
+        logger.info(f"当前字段: {columns}")
+
+        for name, column_type in WEBPAGE_UPDATE_COLUMNS:
+            if name not in columns:
+                logger.info(f"添加 {name} 字段...")
+                cursor.execute(f"ALTER TABLE monitor_configs ADD COLUMN {name} {column_type}")
+
+        conn.commit()
+        logger.info(f"✅ 数据库迁移完成: {db_path}")
+        return True
+
+    except Exception as e:
+        logger.error(f"❌ 数据库迁移失败: {e}")
+        return False
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+if __name__ == "__main__":
+    migrate_database()
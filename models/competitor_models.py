@@ -4,14 +4,24 @@
 简化版，专注于竞品监控需求
 """
 
+import hashlib
+import zlib
 from datetime import datetime, date
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Column, Integer, String, Text, DateTime, Date, Boolean, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Date, Boolean, JSON, ForeignKey, LargeBinary, UniqueConstraint, Index, func
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred, backref, defer, query_expression, with_expression
 
 db = SQLAlchemy()
 
+# 列表视图中正文/汇总预览的字符数（详情页才加载全文）
+PREVIEW_LENGTH = 300
+
+def _preview_fields(name: str, preview, length: int = PREVIEW_LENGTH) -> dict:
+    """预览字段：{name}_preview 为截断后的文本，{name}_truncated 表示是否还有更多内容"""
+    preview = preview or ''
+    return {f'{name}_preview': preview[:length], f'{name}_truncated': len(preview) > length}
+
 class BaseModel(db.Model):
     __abstract__ = True
     
@@ -36,7 +46,10 @@ class MonitorConfig(BaseModel):
     # 配置3：网页更新模式
     webpage_url = Column(String(500))  # 监控的网页链接
     content_hash = Column(String(64))  # 网页内容的哈希值，用于检测更新
-    last_content = Column(Text)  # 上次的网页文本内容，用于差异对比
+    last_content = deferred(Column(Text))  # 已废弃：上次网页内容已迁移到 webpage_states 表，保留列兼容旧数据库
+    raw_fingerprint = Column(String(64))  # 归一化后原始响应的指纹，未变化时跳过解析
+    etag = Column(String(255))  # 上次响应的ETag，用于条件请求
+    last_modified = Column(String(100))  # 上次响应的Last-Modified，用于条件请求
     
     is_active = Column(Boolean, default=True)  # 是否启用
     last_crawl_time = Column(DateTime)  # 上次爬取时间
@@ -54,41 +67,125 @@ class MonitorConfig(BaseModel):
             'keywords': self.keywords,
             'webpage_url': self.webpage_url,
             'content_hash': self.content_hash,
-            'last_content': self.last_content,
+            'raw_fingerprint': self.raw_fingerprint,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
             'is_active': self.is_active,
             'last_crawl_time': self.last_crawl_time.isoformat() if self.last_crawl_time else None,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+class WebpageState(BaseModel):
+    """网页状态表 - 网页更新模式上次的内容块指纹和压缩文本，仅在差异对比时加载"""
+    __tablename__ = 'webpage_states'
+    
+    monitor_config_id = Column(Integer, ForeignKey('monitor_configs.id'), nullable=False, unique=True)  # 关联监控配置
+    content_hash = Column(String(64))  # 内容哈希（与监控配置中的一致）
+    block_hashes = Column(JSON)  # 按行切分的内容块指纹列表
+    compressed_content = Column(LargeBinary)  # zlib压缩的网页文本内容
+    content_length = Column(Integer, default=0)  # 原始文本长度（字符数）
+    
+    monitor_config = relationship("MonitorConfig",
+                                  backref=backref("webpage_state", uselist=False, cascade="all, delete-orphan"))
+    
+    def __repr__(self):
+        return f'<WebpageState config={self.monitor_config_id}>'
+    
+    def set_content(self, content: str, block_hashes: list):
+        """保存网页文本（压缩）和内容块指纹"""
+        content = content or ''
+        self.compressed_content = zlib.compress(content.encode('utf-8'))
+        self.content_length = len(content)
+        self.block_hashes = block_hashes
+    
+    def get_content(self) -> str:
+        """解压上次的网页文本"""
+        if not self.compressed_content:
+            return ''
+        return zlib.decompress(self.compressed_content).decode('utf-8')
+
+class WebpageSnapshot(BaseModel):
+    """网页快照表 - 网页更新模式的历史版本，关键帧保存全文，其余版本保存相对上一版本的增量"""
+    __tablename__ = 'webpage_snapshots'
+    __table_args__ = (UniqueConstraint('monitor_config_id', 'version', name='uq_webpage_snapshot_version'),)
+    
+    monitor_config_id = Column(Integer, ForeignKey('monitor_configs.id'), nullable=False, index=True)  # 关联监控配置
+    version = Column(Integer, nullable=False)  # 版本号，从1开始递增
+    is_keyframe = Column(Boolean, default=False)  # 是否为关键帧（保存全文）
+    keyframe_version = Column(Integer, nullable=False)  # 重建本版本所依赖的关键帧版本号
+    content_hash = Column(String(64))  # 本版本内容的哈希值
+    content_length = Column(Integer, default=0)  # 本版本文本长度（字符数）
+    payload = deferred(Column(LargeBinary))  # zlib压缩的全文（关键帧）或增量操作JSON（增量帧）
+    
+    monitor_config = relationship("MonitorConfig",
+                                  backref=backref("webpage_snapshots", cascade="all, delete-orphan"))
+    
+    def __repr__(self):
+        return f'<WebpageSnapshot config={self.monitor_config_id} v{self.version}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'monitor_config_id': self.monitor_config_id,
+            'version': self.version,
+            'is_keyframe': self.is_keyframe,
+            'keyframe_version': self.keyframe_version,
+            'content_hash': self.content_hash,
+            'content_length': self.content_length,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
 class CrawlSession(BaseModel):
     """爬取会话表 - 每次爬取的汇总结果"""
     __tablename__ = 'crawl_sessions'
+    __table_args__ = (
+        Index('ix_crawl_sessions_crawl_time', 'crawl_time'),  # 最近会话列表、24小时统计、清理老记录
+    )
     
     session_name = Column(String(100), nullable=False)  # 会话名称（如：2025-07-17 每日爬取）
     crawl_time = Column(DateTime, nullable=False)  # 爬取时间
     ai_summary = Column(Text)  # AI汇总内容
     total_posts = Column(Integer, default=0)  # 总帖子数
     processed_posts = Column(Integer, default=0)  # 处理的帖子数
-    status = Column(String(20), default='processing')  # 状态：processing/completed/failed
+    status = Column(String(20), default='processing')  # 状态：processing/summary_pending（等待AI汇总）/completed/failed
+    
+    summary_preview = query_expression()  # 列表查询时加载的AI汇总开头部分（见 preview_options）
     
     def __repr__(self):
         return f'<CrawlSession {self.session_name}>'
     
-    def to_dict(self):
-        return {
+    @classmethod
+    def preview_options(cls, length: int = PREVIEW_LENGTH):
+        """列表查询选项：不加载AI汇总全文，只加载前 length+1 个字符（多取1个用于判断是否截断）"""
+        return (defer(cls.ai_summary),
+                with_expression(cls.summary_preview, func.substr(cls.ai_summary, 1, length + 1)))
+    
+    def to_dict(self, full: bool = True):
+        """full=False 时返回AI汇总预览（需使用 preview_options 查询）"""
+        data = {
             'id': self.id,
             'session_name': self.session_name,
             'crawl_time': self.crawl_time.isoformat() if self.crawl_time else None,
-            'ai_summary': self.ai_summary,
             'total_posts': self.total_posts,
             'processed_posts': self.processed_posts,
             'status': self.status,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+        if full:
+            data['ai_summary'] = self.ai_summary
+        else:
+            data.update(_preview_fields('ai_summary', self.summary_preview))
+        return data
 
 class CompetitorPost(BaseModel):
     """竞品帖子表 - 原始爬取数据"""
     __tablename__ = 'competitor_posts'
+    __table_args__ = (
+        Index('ix_competitor_posts_session_created', 'session_id', 'created_at'),  # 会话帖子列表（按时间排序）、按会话删除
+        Index('ix_competitor_posts_monitor_config_id', 'monitor_config_id'),  # 配置关联的帖子
+        Index('ix_competitor_posts_created_at', 'created_at'),  # 最近帖子、24小时统计、清理老记录
+        Index('ix_competitor_posts_post_url', 'post_url'),  # 按链接删除
+    )
     
     session_id = Column(Integer, ForeignKey('crawl_sessions.id'))  # 关联爬取会话
     monitor_config_id = Column(Integer, ForeignKey('monitor_configs.id'))  # 关联监控配置
@@ -106,6 +203,9 @@ class CompetitorPost(BaseModel):
     is_processed = Column(Boolean, default=False)  # 是否已处理
     is_duplicate = Column(Boolean, default=False)  # 是否重复
     brand_category = Column(String(100))  # 品牌分类（AI识别）
+    post_hash = Column(String(32), unique=True, index=True)  # 帖子指纹（标题|链接的MD5），唯一索引用于去重
+    
+    content_preview = query_expression()  # 列表查询时加载的正文开头部分（见 preview_options）
     
     # 关联关系
     session = relationship("CrawlSession", backref="posts")
@@ -114,11 +214,22 @@ class CompetitorPost(BaseModel):
     def __repr__(self):
         return f'<CompetitorPost {self.title[:50]}>'
     
-    def to_dict(self):
-        return {
+    @staticmethod
+    def compute_hash(title: str, post_url: str) -> str:
+        """计算帖子指纹，与按 (标题, 链接) 去重的规则一致"""
+        return hashlib.md5(f"{title or ''}|{post_url or ''}".encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def preview_options(cls, length: int = PREVIEW_LENGTH):
+        """列表查询选项：不加载正文全文，只加载前 length+1 个字符"""
+        return (defer(cls.content),
+                with_expression(cls.content_preview, func.substr(cls.content, 1, length + 1)))
+    
+    def to_dict(self, full: bool = True):
+        """full=False 时返回正文预览（需使用 preview_options 查询）"""
+        data = {
             'id': self.id,
             'title': self.title,
-            'content': self.content,
             'author': self.author,
             'post_url': self.post_url,
             'post_time': self.post_time.isoformat() if self.post_time else None,
@@ -129,6 +240,11 @@ class CompetitorPost(BaseModel):
             'brand_category': self.brand_category,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+        if full:
+            data['content'] = self.content
+        else:
+            data.update(_preview_fields('content', self.content_preview))
+        return data
 
 class SystemSettings(BaseModel):
     """系统设置表"""
@@ -139,4 +255,74 @@ class SystemSettings(BaseModel):
     description = Column(String(200))  # 描述
     
     def __repr__(self):
-        return f'<SystemSettings {self.key}>' 
\ No newline at end of file
+        return f'<SystemSettings {self.key}>' 
+
+class StatCounter(db.Model):
+    """统计计数表 - 由触发器在写入时增量维护，定期与明细表核对"""
+    __tablename__ = 'stat_counters'
+    __table_args__ = (UniqueConstraint('metric', 'scope', 'key', name='uq_stat_counter'),)
+    
+    id = Column(Integer, primary_key=True)
+    metric = Column(String(50), nullable=False)  # 统计项（如 posts/sessions）
+    scope = Column(String(20), nullable=False)  # 统计维度：total/config/platform/source/day/hour
+    key = Column(String(200), nullable=False, default='')  # 维度取值（如配置ID、平台名、日期），total 维度为空
+    value = Column(Integer, nullable=False, default=0)  # 计数
+    
+    def __repr__(self):
+        return f'<StatCounter {self.metric}/{self.scope}/{self.key}={self.value}>'
+
+class AIResponseCache(BaseModel):
+    """AI响应缓存表 - 按 模型+生成参数+完整提示词 的哈希缓存AI返回内容"""
+    __tablename__ = 'ai_response_cache'
+    __table_args__ = (Index('ix_ai_response_cache_last_used', 'last_used_at'),)  # 超出容量时按最近使用时间淘汰
+    
+    cache_key = Column(String(64), nullable=False, unique=True)  # SHA-256
+    model = Column(String(100))  # AI模型
+    response = Column(Text, nullable=False)  # AI返回的内容
+    prompt_chars = Column(Integer, default=0)  # 提示词字符数
+    latency_ms = Column(Integer, default=0)  # 原始调用耗时（毫秒），用于统计节省的时间
+    hit_count = Column(Integer, default=0)  # 命中次数
+    last_used_at = Column(DateTime, default=datetime.utcnow)  # 最近写入或命中时间
+    
+    def __repr__(self):
+        return f'<AIResponseCache {self.cache_key[:12]} {self.model}>'
+
+class AIJob(BaseModel):
+    """AI任务队列表 - 后台工作线程按优先级处理的AI分析任务（见 services/ai_job_queue.py）"""
+    __tablename__ = 'ai_jobs'
+    __table_args__ = (
+        Index('ix_ai_jobs_claim', 'status', 'priority', 'run_after'),  # 工作线程领取任务
+        Index('ix_ai_jobs_session_id', 'session_id'),
+    )
+    
+    job_type = Column(String(50), nullable=False)  # 任务类型：session_summary
+    session_id = Column(Integer, ForeignKey('crawl_sessions.id'))  # 关联的爬取会话
+    payload = Column(JSON)  # 任务参数（如 use_cache、push_feishu）
+    priority = Column(Integer, default=0)  # 优先级，数值大的先处理
+    status = Column(String(20), default='queued')  # 状态：queued/running/completed/failed
+    attempts = Column(Integer, default=0)  # 已执行次数
+    max_attempts = Column(Integer, default=3)  # 最多执行次数（遇到限流延后不计入）
+    run_after = Column(DateTime, default=datetime.utcnow)  # 最早执行时间（重试退避、限流延后）
+    locked_by = Column(String(50))  # 领取任务的工作线程
+    locked_at = Column(DateTime)  # 领取时间，超过租约时间未完成视为工作线程已退出，重新排队
+    last_error = Column(Text)  # 最近一次失败原因
+    finished_at = Column(DateTime)  # 完成或最终失败的时间
+    
+    def __repr__(self):
+        return f'<AIJob {self.id} {self.job_type} {self.status}>'
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'session_id': self.session_id,
+            'payload': self.payload,
+            'priority': self.priority,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_after': self.run_after.isoformat() if self.run_after else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -1,8 +1,9 @@
+import hashlib
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Column, Integer, String, Text, DateTime, Date, Boolean, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Date, Boolean, JSON, ForeignKey, Index, UniqueConstraint, func
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, defer, query_expression, with_expression
 
 db = SQLAlchemy()
 
@@ -68,6 +69,13 @@ class KeywordConfig(BaseModel):
 class CrawledPost(BaseModel):
     """爬取的帖子数据"""
     __tablename__ = 'crawled_posts'
+    __table_args__ = (
+        Index('ix_crawled_posts_archived_created', 'is_archived', 'created_at'),  # 仪表板列表、时间筛选、存档7天前内容
+        Index('ix_crawled_posts_archived_date', 'is_archived', 'archive_date'),  # 存档页面及存档日期列表
+        Index('ix_crawled_posts_source_created', 'source_website', 'created_at'),  # 按来源筛选、来源统计、重复内容检查
+        Index('ix_crawled_posts_created_at', 'created_at'),  # 帖子管理分页、今日/区间统计
+        Index('ix_crawled_posts_post_url', 'post_url'),  # 按链接查找
+    )
     
     title = Column(String(500), nullable=False)  # 标题
     content = Column(Text)  # 内容
@@ -79,6 +87,7 @@ class CrawledPost(BaseModel):
     source_website = Column(String(100))  # 来源网站
     matched_keywords = Column(JSON)  # 匹配的关键词
     ai_summary = Column(Text)  # AI生成的内容总结
+    post_hash = Column(String(32), unique=True, index=True)  # 帖子指纹，唯一索引用于去重
     
     # 状态标记
     is_read = Column(Boolean, default=False)  # 是否已读
@@ -88,9 +97,26 @@ class CrawledPost(BaseModel):
     # 关联的评论
     comments = relationship("CrawledComment", back_populates="post")
     
+    content_preview = query_expression()  # 列表查询时加载的正文开头部分（见 preview_options）
+    
     def __repr__(self):
         return f'<CrawledPost {self.title[:50]}>'
     
+    @classmethod
+    def preview_options(cls, length: int = 300):
+        """列表查询选项：不加载正文全文，只加载前 length+1 个字符（多取1个用于判断是否截断）"""
+        return (defer(cls.content),
+                with_expression(cls.content_preview, func.substr(cls.content, 1, length + 1)))
+    
+    @staticmethod
+    def compute_hash(title: str, author: str, source_website: str, post_url: str = None) -> str:
+        """计算帖子指纹：有链接时按链接，否则按 标题|作者|来源网站"""
+        if post_url:
+            key = f"url|{post_url}"
+        else:
+            key = f"post|{title or ''}|{author or ''}|{source_website or ''}"
+        return hashlib.md5(key.encode('utf-8')).hexdigest()
+    
     def to_dict(self):
         """转换为字典"""
         return {
@@ -116,7 +142,7 @@ class CrawledComment(BaseModel):
     """爬取的评论数据"""
     __tablename__ = 'crawled_comments'
     
-    post_id = Column(Integer, ForeignKey('crawled_posts.id'))
+    post_id = Column(Integer, ForeignKey('crawled_posts.id'), index=True)
     content = Column(Text)  # 评论内容
     author = Column(String(100))  # 评论作者
     comment_time = Column(DateTime)  # 评论时间
@@ -159,6 +185,9 @@ class TaskSchedule(BaseModel):
 class SystemLog(BaseModel):
     """系统日志表"""
     __tablename__ = 'system_logs'
+    __table_args__ = (
+        Index('ix_system_logs_created_at', 'created_at'),  # 日志页面按时间倒序
+    )
     
     level = Column(String(20))  # 日志级别
     module = Column(String(100))  # 模块名称
@@ -166,4 +195,18 @@ class SystemLog(BaseModel):
     extra_data = Column(JSON)  # 额外数据
     
     def __repr__(self):
-        return f'<SystemLog {self.level}>' 
\ No newline at end of file
+        return f'<SystemLog {self.level}>' 
+
+class StatCounter(db.Model):
+    """统计计数表 - 由触发器在写入时增量维护，定期与明细表核对"""
+    __tablename__ = 'stat_counters'
+    __table_args__ = (UniqueConstraint('metric', 'scope', 'key', name='uq_stat_counter'),)
+    
+    id = Column(Integer, primary_key=True)
+    metric = Column(String(50), nullable=False)  # 统计项（如 posts/sessions）
+    scope = Column(String(20), nullable=False)  # 统计维度：total/config/platform/source/day/hour
+    key = Column(String(200), nullable=False, default='')  # 维度取值（如配置ID、平台名、日期），total 维度为空
+    value = Column(Integer, nullable=False, default=0)  # 计数
+    
+    def __repr__(self):
+        return f'<StatCounter {self.metric}/{self.scope}/{self.key}={self.value}>'
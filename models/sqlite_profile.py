@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+SQLite 生产环境配置
+在引擎创建时统一设置 WAL 日志、同步级别、忙等待超时、缓存和内存映射大小以及连接池参数，
+避免 Flask 请求线程、调度器线程和手动爬取同时写库时出现 "database is locked"
+
+配置优先级：显式传入的覆盖项 > 配置文件 SQLITE_PROFILE > 环境变量 SQLITE_<键名大写> > 默认值
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from loguru import logger
+
+DEFAULT_SQLITE_PROFILE: Dict[str, Any] = {
+    # PRAGMA 设置
+    'journal_mode': 'WAL',       # 读写互不阻塞
+    'synchronous': 'NORMAL',     # WAL 模式下 NORMAL 不会损坏数据库，只在检查点时 fsync
+    'busy_timeout': 10000,       # 遇到写锁时等待的毫秒数
+    'cache_size': -32000,        # 页缓存大小，负数表示 KiB（约32MB）
+    'mmap_size': 134217728,      # 内存映射读取大小（128MB）
+    'temp_store': 'MEMORY',      # 临时表和排序使用内存
+    # 连接池设置
+    'pool_size': 10,
+    'max_overflow': 10,
+    'pool_timeout': 30,
+    'pool_recycle': 3600,
+}
+
+PRAGMA_KEYS = ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'mmap_size', 'temp_store')
+POOL_KEYS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle')
+
+_active_profile: Dict[str, Any] = dict(DEFAULT_SQLITE_PROFILE)
+_listener_lock = threading.Lock()
+_listener_installed = False
+
+
+def _coerce(value: Any, default: Any) -> Any:
+    """环境变量为字符串，按默认值的类型转换"""
+    if isinstance(default, int) and not isinstance(value, int):
+        return int(value)
+    return value
+
+
+def load_sqlite_profile(overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """合并默认值、环境变量、配置文件和覆盖项，返回完整的配置"""
+    profile = dict(DEFAULT_SQLITE_PROFILE)
+
+    # 1. 环境变量
+    for key, default in DEFAULT_SQLITE_PROFILE.items():
+        value = os.getenv(f'SQLITE_{key.upper()}')
+        if value is not None:
+            try:
+                profile[key] = _coerce(value, default)
+            except ValueError:
+                logger.warning(f"⚠️ 无效的环境变量 SQLITE_{key.upper()}={value}，使用默认值 {default}")
+
+    # 2. 配置文件
+    try:
+        import config
+        profile.update(getattr(config, 'SQLITE_PROFILE', None) or {})
+    except ImportError:
+        pass
+
+    # 3. 显式覆盖项
+    profile.update(overrides or {})
+    return profile
+
+
+def is_sqlite_file_uri(uri: str) -> bool:
+    """是否为文件型 SQLite 数据库（内存数据库不使用连接池和 WAL）"""
+    if not uri or not uri.startswith('sqlite'):
+        return False
+    path = uri.split(':///', 1)[1] if ':///' in uri else ''
+    return bool(path) and not path.startswith(':memory:') and 'mode=memory' not in path
+
+
+def engine_options(uri: str, profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """生成 create_engine / SQLALCHEMY_ENGINE_OPTIONS 使用的参数"""
+    if not is_sqlite_file_uri(uri):
+        return {}
+
+    profile = profile or _active_profile
+    options = {key: profile[key] for key in POOL_KEYS if profile.get(key) is not None}
+    options['connect_args'] = {
+        # 驱动层的锁等待（秒），与 busy_timeout 一致
+        'timeout': profile['busy_timeout'] / 1000,
+        # 连接由连接池在线程间复用
+        'check_same_thread': False,
+    }
+    return options
+
+
+def apply_pragmas(dbapi_connection, profile: Optional[Dict[str, Any]] = None):
+    """在新建的 SQLite 连接上执行 PRAGMA 设置"""
+    profile = profile or _active_profile
+    cursor = dbapi_connection.cursor()
+    try:
+        for key in PRAGMA_KEYS:
+            value = profile.get(key)
+            if value is not None:
+                cursor.execute(f"PRAGMA {key}={value}")
+    finally:
+        cursor.close()
+
+
+def _on_connect(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        apply_pragmas(dbapi_connection)
+
+
+def install_sqlite_profile(profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """设置当前进程使用的配置，并注册连接事件（所有引擎的新 SQLite 连接都会执行 PRAGMA）"""
+    global _listener_installed
+
+    _active_profile.clear()
+    _active_profile.update(profile or load_sqlite_profile())
+
+    with _listener_lock:
+        if not _listener_installed:
+            event.listen(Engine, 'connect', _on_connect)
+            _listener_installed = True
+
+    return _active_profile
+
+
+def configure_app(app, overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """在 db.init_app(app) 之前调用，为 Flask-SQLAlchemy 引擎应用 SQLite 配置"""
+    profile = install_sqlite_profile(load_sqlite_profile(overrides))
+    options = engine_options(app.config.get('SQLALCHEMY_DATABASE_URI', ''), profile)
+    if options:
+        app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {}).update(options)
+        logger.info(f"🗄️ SQLite 配置: journal_mode={profile['journal_mode']}, "
+                    f"synchronous={profile['synchronous']}, busy_timeout={profile['busy_timeout']}ms, "
+                    f"pool_size={profile['pool_size']}")
+    return profile
+
+
+def create_sqlite_engine(uri: str, overrides: Optional[Dict[str, Any]] = None) -> Engine:
+    """创建应用了 SQLite 配置的独立引擎（如 APScheduler 作业存储）"""
+    profile = install_sqlite_profile(load_sqlite_profile(overrides))
+    return create_engine(uri, **engine_options(uri, profile))
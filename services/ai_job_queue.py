@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+AI任务队列 - 持久化的后台AI分析任务
+请求中只写入一条任务记录（ai_jobs 表）即返回，后台工作线程按优先级领取执行；
+失败按指数退避重试，遇到限流时所有工作线程暂停到限流结束，进程重启后未完成的任务继续执行
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import func, select, update
+from loguru import logger
+
+from models.competitor_models import db, AIJob
+
+PRIORITY_MANUAL = 10  # 手动触发（用户在页面上等待结果）
+PRIORITY_SCHEDULED = 0  # 定时任务
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_SECONDS = 30  # 第 n 次失败后等待 30 × 2^(n-1) 秒再重试
+DEFAULT_POLL_SECONDS = 5  # 空闲时检查新任务的间隔（新任务入队时会立即唤醒）
+DEFAULT_LEASE_MINUTES = 15  # 任务领取后超过此时间仍未完成，视为工作线程已退出，重新排队
+STALE_CHECK_SECONDS = 60
+
+
+def _get_int_setting(name: str, default: int) -> int:
+    """读取整数配置 - 优先从配置文件，然后环境变量，最后默认值"""
+    value = None
+
+    # 1. 优先从配置文件获取
+    try:
+        import config
+        value = getattr(config, name, None)
+    except ImportError:
+        pass
+
+    # 2. 从环境变量获取
+    if value is None:
+        value = os.getenv(name)
+
+    try:
+        return max(1, int(value)) if value is not None else default
+    except (TypeError, ValueError):
+        logger.warning(f"⚠️ 无效的配置 {name}: {value}，使用默认值{default}")
+        return default
+
+
+class AIJobQueue:
+    """AI任务队列
+
+    register 注册任务类型的处理函数 handler(job)，在应用上下文中执行，抛出异常即失败；
+    异常带有 retry_after 属性（如 RateLimitedError）时视为限流：任务延后执行且不计入重试次数，
+    全部工作线程暂停领取任务到限流结束。超过最多执行次数后调用 on_failure(job, error)
+    """
+
+    def __init__(self):
+        self.workers = _get_int_setting('AI_JOB_WORKERS', DEFAULT_WORKERS)
+        self.max_attempts = _get_int_setting('AI_JOB_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+        self.retry_seconds = _get_int_setting('AI_JOB_RETRY_SECONDS', DEFAULT_RETRY_SECONDS)
+        self.poll_seconds = _get_int_setting('AI_JOB_POLL_SECONDS', DEFAULT_POLL_SECONDS)
+        self.lease_minutes = _get_int_setting('AI_JOB_LEASE_MINUTES', DEFAULT_LEASE_MINUTES)
+        self._handlers: Dict[str, Callable[[AIJob], None]] = {}
+        self._failure_handlers: Dict[str, Callable[[AIJob, Exception], None]] = {}
+        self._threads: List[threading.Thread] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._stale_checked_at = 0.0
+
+    def register(self, job_type: str, handler: Callable[[AIJob], None],
+                 on_failure: Optional[Callable[[AIJob, Exception], None]] = None):
+        self._handlers[job_type] = handler
+        if on_failure:
+            self._failure_handlers[job_type] = on_failure
+
+    def enqueue(self, job_type: str, session_id: int = None, payload: Dict[str, Any] = None,
+                priority: int = PRIORITY_SCHEDULED) -> AIJob:
+        """写入任务并提交当前数据库会话（调用方对会话的修改一起提交），然后唤醒工作线程"""
+        job = AIJob(job_type=job_type, session_id=session_id, payload=payload or {}, priority=priority,
+                    status='queued', attempts=0, max_attempts=self.max_attempts, run_after=datetime.utcnow())
+        db.session.add(job)
+        db.session.commit()
+        self._wake.set()
+        logger.info(f"📥 AI任务已入队: #{job.id} {job_type}（会话 {session_id}，优先级 {priority}）")
+        return job
+
+    def start(self, app):
+        """启动后台工作线程（重复调用不会重复启动）"""
+        if self._threads and all(thread.is_alive() for thread in self._threads):
+            return
+        with self._lock:
+            if any(thread.is_alive() for thread in self._threads):
+                return
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._work, args=(app, f'ai-job-{index + 1}'),
+                                 name=f'ai-job-{index + 1}', daemon=True)
+                for index in range(self.workers)
+            ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"✅ AI任务队列已启动: {self.workers} 个工作线程")
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_pending(self, worker: str = 'inline') -> int:
+        """在当前线程（需在应用上下文中）执行所有已到期的任务，返回执行的任务数
+
+        用于不运行Web服务时处理积压的任务（python manage_records.py run-ai-jobs）
+        """
+        count = 0
+        while self._paused_seconds() <= 0:
+            job_id = self._claim(worker)
+            if job_id is None:
+                break
+            self._run(job_id)
+            count += 1
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        """各状态的任务数、限流暂停剩余秒数、工作线程数"""
+        counts = dict(db.session.execute(select(AIJob.status, func.count()).group_by(AIJob.status)).all())
+        return {
+            'workers': sum(1 for thread in self._threads if thread.is_alive()),
+            'paused_seconds': round(self._paused_seconds(), 1),
+            'queued': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'completed': counts.get('completed', 0),
+            'failed': counts.get('failed', 0),
+        }
+
+    def recent_jobs(self, limit: int = 20, status: str = None) -> List[Dict[str, Any]]:
+        query = AIJob.query.order_by(AIJob.id.desc())
+        if status:
+            query = query.filter_by(status=status)
+        return [job.to_dict() for job in query.limit(limit).all()]
+
+    def _work(self, app, name: str):
+        while not self._stop.is_set():
+            paused = self._paused_seconds()
+            if paused > 0:
+                self._stop.wait(min(paused, self.poll_seconds))
+                continue
+
+            self._wake.clear()
+            try:
+                with app.app_context():
+                    job_id = self._claim(name)
+                    if job_id is not None:
+                        self._run(job_id)
+                        continue
+            except Exception as e:
+                logger.error(f"❌ AI任务工作线程异常 {name}: {e}")
+            self._wake.wait(self.poll_seconds)
+
+    def _claim(self, worker: str) -> Optional[int]:
+        """领取一个到期的任务（优先级高的先领取，同优先级先入队的先领取），没有时返回 None"""
+        self._requeue_stale()
+        now = datetime.utcnow()
+        while True:
+            job_id = db.session.execute(
+                select(AIJob.id).where(AIJob.status == 'queued', AIJob.run_after <= now)
+                .order_by(AIJob.priority.desc(), AIJob.id).limit(1)
+            ).scalar()
+            if job_id is None:
+                db.session.rollback()
+                return None
+            # 只在任务仍为排队状态时领取，多个工作线程同时选中同一任务时只有一个成功
+            claimed = db.session.execute(
+                update(AIJob).where(AIJob.id == job_id, AIJob.status == 'queued')
+                .values(status='running', locked_by=worker, locked_at=now, attempts=AIJob.attempts + 1)
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return job_id
+
+    def _run(self, job_id: int):
+        job = db.session.get(AIJob, job_id)
+        started = time.perf_counter()
+        try:
+            handler = self._handlers.get(job.job_type)
+            if handler is None:
+                raise ValueError(f"未知的AI任务类型: {job.job_type}")
+            handler(job)
+        except Exception as e:
+            db.session.rollback()
+            self._record_failure(db.session.get(AIJob, job_id), e)
+            return
+
+        job.status = 'completed'
+        job.finished_at = datetime.utcnow()
+        job.locked_by = None
+        job.last_error = None
+        db.session.commit()
+        logger.info(f"✅ AI任务完成: #{job_id} {job.job_type}（{time.perf_counter() - started:.1f} 秒）")
+
+    def _record_failure(self, job: AIJob, error: Exception):
+        now = datetime.utcnow()
+        retry_after = getattr(error, 'retry_after', None)
+
+        if retry_after is not None:
+            # 限流：不计入重试次数，所有工作线程暂停到限流结束
+            job.status = 'queued'
+            job.attempts = max((job.attempts or 1) - 1, 0)
+            job.run_after = now + timedelta(seconds=retry_after)
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.time() + retry_after)
+            logger.warning(f"⏳ AI任务 #{job.id} 遇到限流，{retry_after:.0f} 秒后重试")
+        elif job.attempts < job.max_attempts:
+            delay = self.retry_seconds * 2 ** (job.attempts - 1)
+            job.status = 'queued'
+            job.run_after = now + timedelta(seconds=delay)
+            logger.warning(f"⚠️ AI任务 #{job.id} 第 {job.attempts} 次执行失败，{delay} 秒后重试: {error}")
+        else:
+            logger.error(f"❌ AI任务 #{job.id} 执行 {job.attempts} 次后仍失败: {error}")
+            on_failure = self._failure_handlers.get(job.job_type)
+            if on_failure:
+                try:
+                    on_failure(job, error)
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"❌ AI任务 #{job.id} 失败处理异常: {e}")
+            job.status = 'failed'
+            job.finished_at = now
+
+        job.locked_by = None
+        job.last_error = str(error)[:2000]
+        db.session.commit()
+
+    def _requeue_stale(self):
+        """超过租约时间仍在执行中的任务（工作线程或进程已退出）重新排队，每分钟最多检查一次"""
+        with self._lock:
+            if time.time() - self._stale_checked_at < STALE_CHECK_SECONDS:
+                return
+            self._stale_checked_at = time.time()
+        expired = datetime.utcnow() - timedelta(minutes=self.lease_minutes)
+        requeued = db.session.execute(
+            update(AIJob).where(AIJob.status == 'running', AIJob.locked_at < expired)
+            .values(status='queued', locked_by=None)
+        ).rowcount
+        db.session.commit()
+        if requeued:
+            logger.warning(f"♻️ {requeued} 个超时未完成的AI任务已重新排队")
+
+    def _paused_seconds(self) -> float:
+        return max(self._paused_until - time.time(), 0.0)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+AI响应缓存 - 按内容寻址的持久化缓存
+缓存键为 模型 + 生成参数 + 完整提示词（含格式化后的帖子）的 SHA-256，相同输入直接返回上次的结果；
+支持有效期和容量淘汰（最久未使用），记录命中率和节省的调用时间。
+读写使用独立连接，不影响调用方会话中的事务
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from loguru import logger
+
+from models.competitor_models import db, AIResponseCache
+
+DEFAULT_TTL_HOURS = 168
+DEFAULT_MAX_ENTRIES = 1000
+
+
+def _get_setting(name: str, default):
+    """读取配置 - 优先从配置文件，然后环境变量，最后默认值（按默认值的类型转换）"""
+    value = None
+
+    # 1. 优先从配置文件获取
+    try:
+        import config
+        value = getattr(config, name, None)
+    except ImportError:
+        pass
+
+    # 2. 从环境变量获取
+    if value is None:
+        value = os.getenv(name)
+
+    if value is None:
+        return default
+    try:
+        if isinstance(default, bool):
+            return value if isinstance(value, bool) else str(value).lower() in ('1', 'true', 'yes', 'on')
+        return max(type(default)(value), 1)
+    except (TypeError, ValueError):
+        logger.warning(f"⚠️ 无效的配置 {name}: {value}，使用默认值{default}")
+        return default
+
+
+class AIResponseCacheStore:
+    """AI响应缓存"""
+
+    def __init__(self):
+        self.enabled = _get_setting('AI_CACHE_ENABLED', True)
+        self.ttl_hours = _get_setting('AI_CACHE_TTL_HOURS', DEFAULT_TTL_HOURS)
+        self.max_entries = _get_setting('AI_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+        self.table = AIResponseCache.__table__
+        self._lock = threading.Lock()
+        self._metrics = {'hits': 0, 'misses': 0, 'bypassed': 0, 'writes': 0, 'evicted': 0, 'errors': 0,
+                         'saved_ms': 0}
+
+    @staticmethod
+    def make_key(model: str, prompt: str, options: Optional[Dict[str, Any]] = None) -> str:
+        """缓存键：模型、生成参数、提示词任一变化都会得到不同的键"""
+        payload = json.dumps([model, options or {}, prompt], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str, bypass: bool = False) -> Optional[str]:
+        """读取未过期的缓存内容并记录命中，未命中、跳过缓存（bypass）或读取失败时返回 None"""
+        if not self.enabled:
+            return None
+        if bypass:
+            self._count('bypassed')
+            return None
+        try:
+            now = datetime.utcnow()
+            with db.engine.begin() as conn:
+                row = conn.execute(
+                    select(self.table.c.response, self.table.c.latency_ms, self.table.c.created_at)
+                    .where(self.table.c.cache_key == key)
+                ).first()
+                if row and row.created_at >= now - timedelta(hours=self.ttl_hours):
+                    conn.execute(update(self.table).where(self.table.c.cache_key == key)
+                                 .values(hit_count=self.table.c.hit_count + 1, last_used_at=now))
+                    self._count('hits', saved_ms=row.latency_ms or 0)
+                    return row.response
+                if row:
+                    conn.execute(delete(self.table).where(self.table.c.cache_key == key))
+                    self._count('evicted')
+            self._count('misses')
+            return None
+        except Exception as e:
+            self._count('errors')
+            logger.debug(f"AI响应缓存读取失败（按未命中处理）: {e}")
+            return None
+
+    def set(self, key: str, model: str, prompt: str, response: str, latency_ms: int = 0):
+        """保存AI返回内容（只应保存成功的结果），并按有效期和容量淘汰"""
+        if not self.enabled or not response:
+            return
+        try:
+            now = datetime.utcnow()
+            values = {'cache_key': key, 'model': model, 'response': response, 'prompt_chars': len(prompt),
+                      'latency_ms': latency_ms, 'hit_count': 0, 'last_used_at': now,
+                      'created_at': now, 'updated_at': now}
+            statement = sqlite_insert(self.table).values(**values)
+            statement = statement.on_conflict_do_update(
+                index_elements=['cache_key'],
+                set_={name: statement.excluded[name]
+                      for name in ('response', 'model', 'latency_ms', 'last_used_at', 'created_at', 'updated_at')}
+            )
+            with db.engine.begin() as conn:
+                conn.execute(statement)
+                evicted = self._evict(conn, now)
+            self._count('writes')
+            if evicted:
+                self._count('evicted', amount=evicted)
+        except Exception as e:
+            self._count('errors')
+            logger.warning(f"⚠️ AI响应缓存写入失败: {e}")
+
+    def clear(self) -> int:
+        """清空缓存，返回删除的条数"""
+        with db.engine.begin() as conn:
+            deleted = conn.execute(delete(self.table)).rowcount
+        logger.info(f"🧹 已清空AI响应缓存: {deleted} 条")
+        return deleted
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计：本进程的命中/未命中次数和命中率，以及缓存表的条数、大小、累计命中"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        saved_ms = metrics.pop('saved_ms')
+        lookups = metrics['hits'] + metrics['misses']
+        stats = {
+            'enabled': self.enabled,
+            'ttl_hours': self.ttl_hours,
+            'max_entries': self.max_entries,
+            **metrics,
+            'saved_seconds': round(saved_ms / 1000, 1),
+            'hit_rate': round(metrics['hits'] / lookups, 3) if lookups else None,
+        }
+        try:
+            with db.engine.connect() as conn:
+                entries, total_hits, total_bytes = conn.execute(select(
+                    func.count(), func.coalesce(func.sum(self.table.c.hit_count), 0),
+                    func.coalesce(func.sum(func.length(self.table.c.response)), 0)
+                )).one()
+            stats.update(entries=entries, total_hits=total_hits, size_chars=total_bytes)
+        except Exception as e:
+            logger.debug(f"读取AI响应缓存统计失败: {e}")
+        return stats
+
+    def _evict(self, conn, now: datetime) -> int:
+        """删除过期的条目，以及超出容量的最久未使用的条目"""
+        evicted = conn.execute(
+            delete(self.table).where(self.table.c.created_at < now - timedelta(hours=self.ttl_hours))
+        ).rowcount
+        overflow = select(self.table.c.id).order_by(self.table.c.last_used_at.desc())\
+            .limit(-1).offset(self.max_entries)
+        evicted += conn.execute(delete(self.table).where(self.table.c.id.in_(overflow))).rowcount
+        return evicted
+
+    def _count(self, name: str, amount: int = 1, saved_ms: int = 0):
+        with self._lock:
+            self._metrics[name] += amount
+            self._metrics['saved_ms'] += saved_ms
+
+
+# 全局AI响应缓存，进程内共享命中统计
+ai_response_cache = AIResponseCacheStore()
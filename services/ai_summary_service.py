@@ -6,10 +6,15 @@ AI内容总结服务
 
 import re
 import requests
-from typing import Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 from loguru import logger
 from config.config import config
 
+SINGLE_CONTENT_CHARS = 3000  # 单条总结时内容的最大长度
+BATCH_CONTENT_CHARS = 1000  # 批量总结时每条内容的最大长度
+BATCH_PROMPT_CHARS = 12000  # 批量总结时一次请求中所有内容的长度上限
+BATCH_MARKER = re.compile(r'\[\[(\d+)\]\]')  # 批量输出中每条总结的编号标记，如 [[3]]
+
 class AISummaryService:
     """AI内容总结服务"""
     
@@ -22,6 +27,9 @@ class AISummaryService:
         # Gemini API 配置
         self.gemini_api_key = getattr(config, 'gemini_api_key', '')
         self.gemini_model = getattr(config, 'gemini_model', 'gemini-1.5-flash')
+        
+        # 批量总结时每次请求最多包含的帖子数
+        self.batch_size = max(getattr(config, 'ai_summary_batch_size', 10), 1)
     
     def summarize_content(self, title: str, content: str, max_length: int = 150) -> str:
         """
@@ -51,14 +59,108 @@ class AISummaryService:
             # 出错时回退到简单总结
             return self._simple_summarize(content, max_length)
     
-    def _openai_summarize(self, title: str, content: str, max_length: int) -> str:
-        """使用OpenAI进行内容总结"""
+    def summarize_batch(self, items: Sequence[Tuple[str, str]], max_length: int = 150) -> List[str]:
+        """
+        批量总结多条内容：多条短内容合并为一次请求，模型按编号逐条输出
+        
+        Args:
+            items: [(标题, 内容)]
+            max_length: 每条总结的最大长度
+            
+        Returns:
+            与 items 顺序一致的总结列表；未能从批量结果中解析出的条目改为单条总结
+        """
+        if not items:
+            return []
+        if not self.is_ai_available():
+            return [self._simple_summarize(content, max_length) for _, content in items]
+        
+        summaries: List[Optional[str]] = [None] * len(items)
+        for batch in self._pack_batches(items):
+            if len(batch) == 1:
+                index = batch[0]
+                summaries[index] = self.summarize_content(*items[index], max_length=max_length)
+                continue
+            
+            try:
+                parsed = self._summarize_batch_request([items[index] for index in batch], max_length)
+            except Exception as e:
+                # 请求本身失败时单条请求大概率也会失败，直接使用简单总结
+                logger.error(f"❌ 批量AI总结失败，改用简单总结: {e}")
+                for index in batch:
+                    summaries[index] = self._simple_summarize(items[index][1], max_length)
+                continue
+            
+            missing = [index for position, index in enumerate(batch) if not parsed.get(position + 1)]
+            for position, index in enumerate(batch):
+                summaries[index] = parsed.get(position + 1)
+            if missing:
+                logger.warning(f"⚠️ 批量AI总结有 {len(missing)}/{len(batch)} 条未能解析，改为单条总结")
+            for index in missing:
+                summaries[index] = self.summarize_content(*items[index], max_length=max_length)
+        
+        logger.info(f"✅ 批量AI总结完成: {len(items)} 条")
+        return summaries
+    
+    def _pack_batches(self, items: Sequence[Tuple[str, str]]) -> List[List[int]]:
+        """按条数和内容长度把条目分批，返回每批的条目下标"""
+        batches, current, current_chars = [], [], 0
+        for index, (title, content) in enumerate(items):
+            chars = len(title or "") + min(len(content or ""), BATCH_CONTENT_CHARS)
+            if current and (len(current) >= self.batch_size or current_chars + chars > BATCH_PROMPT_CHARS):
+                batches.append(current)
+                current, current_chars = [], 0
+            current.append(index)
+            current_chars += chars
+        if current:
+            batches.append(current)
+        return batches
+    
+    def _summarize_batch_request(self, items: Sequence[Tuple[str, str]], max_length: int) -> Dict[int, str]:
+        """发送一次批量总结请求，返回 {编号: 总结}（编号从1开始）"""
+        sections = []
+        for number, (title, content) in enumerate(items, 1):
+            clean_content = self._clean_text(content)
+            if len(clean_content) > BATCH_CONTENT_CHARS:
+                clean_content = clean_content[:BATCH_CONTENT_CHARS] + "..."
+            sections.append(f"[[{number}]]\n标题：{title}\n内容：{clean_content}")
+        
+        prompt = f"""请分别总结以下{len(items)}篇文章，要求：
+1. 每篇总结长度不超过{max_length}字
+2. 突出关键信息和要点
+3. 语言简洁明了
+4. 保持客观中性
+5. 按编号逐篇输出，每篇以单独一行的编号标记开头（如 [[1]]），下一行为总结内容，不要输出其他内容
+
+""" + "\n\n".join(sections) + "\n\n请按编号输出总结："
+        
+        text, complete = self._request(prompt, max_tokens=len(items) * max_length * 2 + 64)
+        parsed = self._parse_batch_output(text, len(items))
+        if not complete and parsed:
+            # 输出被截断时最后一条可能不完整，交给单条总结
+            parsed.pop(max(parsed))
+        return parsed
+    
+    @staticmethod
+    def _parse_batch_output(text: str, count: int) -> Dict[int, str]:
+        """按编号标记拆分批量输出，忽略超出范围的编号和空总结；重复的编号以第一次出现的为准"""
+        parsed = {}
+        markers = list(BATCH_MARKER.finditer(text or ""))
+        for marker, following in zip(markers, markers[1:] + [None]):
+            number = int(marker.group(1))
+            summary = text[marker.end():following.start() if following else len(text)].strip()
+            if 1 <= number <= count and summary and number not in parsed:
+                parsed[number] = summary
+        return parsed
+    
+    def _build_prompt(self, title: str, content: str, max_length: int) -> str:
+        """单条总结的提示词"""
         # 清理和截取内容
         clean_content = self._clean_text(content)
-        if len(clean_content) > 3000:  # 限制输入长度
-            clean_content = clean_content[:3000] + "..."
+        if len(clean_content) > SINGLE_CONTENT_CHARS:  # 限制输入长度
+            clean_content = clean_content[:SINGLE_CONTENT_CHARS] + "..."
         
-        prompt = f"""请对以下文章内容进行简洁的总结，要求：
+        return f"""请对以下文章内容进行简洁的总结，要求：
 1. 总结长度不超过{max_length}字
 2. 突出关键信息和要点
 3. 语言简洁明了
@@ -69,111 +171,107 @@ class AISummaryService:
 内容：{clean_content}
 
 请提供总结："""
-
+    
+    def _openai_summarize(self, title: str, content: str, max_length: int) -> str:
+        """使用OpenAI进行内容总结"""
         try:
-            headers = {
-                'Authorization': f'Bearer {self.openai_api_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            data = {
-                'model': self.openai_model,
-                'messages': [
-                    {
-                        'role': 'user', 
-                        'content': prompt
-                    }
-                ],
-                'max_tokens': max_length * 2,  # 给一些缓冲
-                'temperature': 0.3
-            }
-            
-            response = requests.post(
-                f'{self.openai_base_url}/chat/completions',
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                summary = result['choices'][0]['message']['content'].strip()
-                logger.info("✅ OpenAI总结成功")
-                return summary
-            else:
-                logger.error(f"❌ OpenAI API错误: {response.status_code} - {response.text}")
-                return self._simple_summarize(content, max_length)
-                
+            summary, _ = self._openai_request(self._build_prompt(title, content, max_length),
+                                              max_tokens=max_length * 2)  # 给一些缓冲
+            logger.info("✅ OpenAI总结成功")
+            return summary
         except Exception as e:
             logger.error(f"❌ OpenAI总结异常: {e}")
             return self._simple_summarize(content, max_length)
     
     def _gemini_summarize(self, title: str, content: str, max_length: int) -> str:
         """使用Google Gemini进行内容总结"""
-        # 清理和截取内容
-        clean_content = self._clean_text(content)
-        if len(clean_content) > 3000:  # 限制输入长度
-            clean_content = clean_content[:3000] + "..."
-        
-        prompt = f"""请对以下文章内容进行简洁的总结，要求：
-1. 总结长度不超过{max_length}字
-2. 突出关键信息和要点
-3. 语言简洁明了
-4. 保持客观中性
-
-标题：{title}
-
-内容：{clean_content}
-
-请提供总结："""
-
         try:
-            headers = {
-                'Content-Type': 'application/json'
-            }
-            
-            data = {
-                "contents": [
-                    {
-                        "parts": [
-                            {
-                                "text": prompt
-                            }
-                        ]
-                    }
-                ],
-                "generationConfig": {
-                    "temperature": 0.3,
-                    "maxOutputTokens": max_length * 2,
-                    "topP": 0.8,
-                    "topK": 10
-                }
-            }
-            
-            response = requests.post(
-                f'https://generativelanguage.googleapis.com/v1beta/models/{self.gemini_model}:generateContent?key={self.gemini_api_key}',
-                headers=headers,
-                json=data,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if 'candidates' in result and len(result['candidates']) > 0:
-                    summary = result['candidates'][0]['content']['parts'][0]['text'].strip()
-                    logger.info("✅ Gemini总结成功")
-                    return summary
-                else:
-                    logger.error(f"❌ Gemini API返回格式异常: {result}")
-                    return self._simple_summarize(content, max_length)
-            else:
-                logger.error(f"❌ Gemini API错误: {response.status_code} - {response.text}")
-                return self._simple_summarize(content, max_length)
-                
+            summary, _ = self._gemini_request(self._build_prompt(title, content, max_length),
+                                              max_tokens=max_length * 2)
+            logger.info("✅ Gemini总结成功")
+            return summary
         except Exception as e:
             logger.error(f"❌ Gemini总结异常: {e}")
             return self._simple_summarize(content, max_length)
     
+    def _request(self, prompt: str, max_tokens: int) -> Tuple[str, bool]:
+        """使用已配置的AI服务（优先 Gemini）发送请求"""
+        if self.gemini_api_key:
+            return self._gemini_request(prompt, max_tokens)
+        return self._openai_request(prompt, max_tokens)
+    
+    def _openai_request(self, prompt: str, max_tokens: int) -> Tuple[str, bool]:
+        """调用OpenAI接口，返回 (文本, 是否完整输出)，请求失败时抛出异常"""
+        headers = {
+            'Authorization': f'Bearer {self.openai_api_key}',
+            'Content-Type': 'application/json'
+        }
+        
+        data = {
+            'model': self.openai_model,
+            'messages': [
+                {
+                    'role': 'user', 
+                    'content': prompt
+                }
+            ],
+            'max_tokens': max_tokens,
+            'temperature': 0.3
+        }
+        
+        response = requests.post(
+            f'{self.openai_base_url}/chat/completions',
+            headers=headers,
+            json=data,
+            timeout=30
+        )
+        
+        if response.status_code != 200:
+            raise RuntimeError(f"OpenAI API错误: {response.status_code} - {response.text}")
+        
+        choice = response.json()['choices'][0]
+        return choice['message']['content'].strip(), choice.get('finish_reason') != 'length'
+    
+    def _gemini_request(self, prompt: str, max_tokens: int) -> Tuple[str, bool]:
+        """调用Gemini接口，返回 (文本, 是否完整输出)，请求失败或返回格式异常时抛出异常"""
+        headers = {
+            'Content-Type': 'application/json'
+        }
+        
+        data = {
+            "contents": [
+                {
+                    "parts": [
+                        {
+                            "text": prompt
+                        }
+                    ]
+                }
+            ],
+            "generationConfig": {
+                "temperature": 0.3,
+                "maxOutputTokens": max_tokens,
+                "topP": 0.8,
+                "topK": 10
+            }
+        }
+        
+        response = requests.post(
+            f'https://generativelanguage.googleapis.com/v1beta/models/{self.gemini_model}:generateContent?key={self.gemini_api_key}',
+            headers=headers,
+            json=data,
+            timeout=30
+        )
+        
+        if response.status_code != 200:
+            raise RuntimeError(f"Gemini API错误: {response.status_code} - {response.text}")
+        
+        result = response.json()
+        if not result.get('candidates'):
+            raise RuntimeError(f"Gemini API返回格式异常: {result}")
+        candidate = result['candidates'][0]
+        return candidate['content']['parts'][0]['text'].strip(), candidate.get('finishReason') != 'MAX_TOKENS'
+    
     def _simple_summarize(self, content: str, max_length: int) -> str:
         """简单的提取式总结"""
         clean_content = self._clean_text(content)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+趋势分析服务 - 基于 pandas 的帖子统计分析
+一次查询把帖子元数据（不含正文）读入列式 DataFrame，按品牌、平台、配置、关键词等维度
+向量化计算每日发帖量、互动分布和周环比；结果按天缓存，有新帖子时重新计算。
+帖子的 created_at 以UTC时间保存，"今天"和每日分组同样按UTC日期计算
+"""
+
+import json
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import String, func, select, type_coerce
+from loguru import logger
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 365
+DEFAULT_TOP = 10
+REPORTS = ('volume', 'engagement', 'wow')
+OTHERS_KEY = '其他'
+UNKNOWN_KEY = '未知'
+
+
+def _utc_today() -> date:
+    return datetime.utcnow().date()
+
+
+class AnalyticsError(ValueError):
+    """分析参数错误（未知的报表、维度等）"""
+
+
+class TrendAnalytics:
+    """一张帖子表的趋势分析
+
+    dimensions 为 {维度名: 列表达式}，list_dimensions 中的维度为列表字段（如匹配的关键词），按元素展开统计；
+    joins 为 [(表, 连接条件)]（外连接），extra_columns 为额外读取的 {名称: 列表达式}
+    """
+
+    def __init__(self, db, model, dimensions: Dict[str, Any], list_dimensions: Sequence[str] = (),
+                 joins: Sequence[Tuple[Any, Any]] = (), extra_columns: Optional[Dict[str, Any]] = None):
+        self.db = db
+        self.model = model
+        self.dimensions = dimensions
+        self.list_dimensions = set(list_dimensions)
+        self.joins = list(joins)
+        self.extra_columns = extra_columns or {}
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def report(self, name: str, dimension: Optional[str] = None, days: int = DEFAULT_DAYS,
+               top: int = DEFAULT_TOP, refresh: bool = False) -> Dict[str, Any]:
+        """生成报表（volume: 每日发帖量，engagement: 互动分布，wow: 周环比），结果按天缓存"""
+        if name not in REPORTS:
+            raise AnalyticsError(f"未知的报表: {name}（可选 {', '.join(REPORTS)}）")
+        dimension = dimension or next(iter(self.dimensions))
+        if dimension not in self.dimensions:
+            raise AnalyticsError(f"未知的维度: {dimension}（可选 {', '.join(self.dimensions)}）")
+        days = min(max(days or DEFAULT_DAYS, 1), MAX_DAYS)
+        top = min(max(top or DEFAULT_TOP, 1), 100)
+        if name == 'wow':
+            days = 14
+
+        compute = {'volume': self.daily_volume, 'engagement': self.engagement, 'wow': self.week_over_week}[name]
+        return self._cached((name, dimension, days, top), refresh,
+                            lambda: compute(self.load_frame(days), dimension, days=days, top=top))
+
+    def load_frame(self, days: int = DEFAULT_DAYS) -> pd.DataFrame:
+        """读取最近 days 天（含今天）的帖子元数据：id、created_at、day、likes、comments、engagement 及各维度字段
+
+        时间和列表字段按原始文本读取，由 pandas 整列解析（列表字段相同的值只解析一次），避免逐行类型转换
+        """
+        start = datetime.combine(_utc_today() - timedelta(days=days - 1), datetime.min.time())
+        columns = [
+            self.model.id.label('id'),
+            type_coerce(self.model.created_at, String).label('created_at'),
+            func.coalesce(self.model.likes_count, 0).label('likes'),
+            func.coalesce(self.model.comments_count, 0).label('comments'),
+        ]
+        columns += [(type_coerce(expression, String) if name in self.list_dimensions else expression).label(name)
+                    for name, expression in self.dimensions.items()]
+        columns += [expression.label(name) for name, expression in self.extra_columns.items()]
+
+        statement = select(*columns).select_from(self.model.__table__)
+        for target, onclause in self.joins:
+            statement = statement.outerjoin(target, onclause)
+        statement = statement.where(self.model.created_at >= start)
+
+        result = self.db.session.connection().execute(statement)
+        frame = pd.DataFrame(result.fetchall(), columns=list(result.keys()))
+        frame[['likes', 'comments']] = frame[['likes', 'comments']].astype('int64')
+        frame['created_at'] = pd.to_datetime(frame['created_at'], format='ISO8601')
+        frame['day'] = frame['created_at'].dt.normalize()
+        frame['engagement'] = frame['likes'] + frame['comments']
+        for name in self.list_dimensions:
+            parsed = {value: json.loads(value) for value in frame[name].dropna().unique()}
+            frame[name] = frame[name].map(parsed)
+        return frame
+
+    def daily_volume(self, frame: pd.DataFrame, dimension: str, days: int = DEFAULT_DAYS,
+                     top: int = DEFAULT_TOP) -> Dict[str, Any]:
+        """每日发帖量：发帖量最多的 top 个取值各一条序列，其余合并为"其他\""""
+        today = _utc_today()
+        dates = pd.date_range(today - timedelta(days=days - 1), today, freq='D')
+        grouped = self._by_dimension(frame, dimension)
+        counts = grouped.groupby(['day', dimension]).size().unstack(fill_value=0)\
+            .reindex(dates, fill_value=0)
+
+        top_keys = counts.sum().nlargest(top).index
+        series = {str(key): counts[key].astype(int).tolist() for key in top_keys}
+        others = counts.drop(columns=top_keys).sum(axis=1)
+        if others.any():
+            series[OTHERS_KEY] = others.astype(int).tolist()
+
+        return {
+            'dimension': dimension,
+            'dates': [day.strftime('%Y-%m-%d') for day in dates],
+            'series': series,
+            'total': frame.groupby('day').size().reindex(dates, fill_value=0).astype(int).tolist()
+        }
+
+    def engagement(self, frame: pd.DataFrame, dimension: str, days: int = DEFAULT_DAYS,
+                   top: int = DEFAULT_TOP) -> Dict[str, Any]:
+        """互动分布（点赞数+评论数）：各取值的帖子数、平均值、中位数、P90、最大值"""
+        grouped = self._by_dimension(frame, dimension).groupby(dimension)
+        stats = grouped.agg(posts=('id', 'size'), likes_mean=('likes', 'mean'), comments_mean=('comments', 'mean'),
+                            engagement_mean=('engagement', 'mean'), engagement_max=('engagement', 'max'))
+        quantiles = grouped['engagement'].quantile([0.5, 0.9]).unstack()
+        if not stats.empty:
+            stats['engagement_median'] = quantiles[0.5]
+            stats['engagement_p90'] = quantiles[0.9]
+        stats = stats.sort_values('posts', ascending=False).head(top).round(2)
+
+        return {
+            'dimension': dimension,
+            'days': days,
+            'items': self._records(stats)
+        }
+
+    def week_over_week(self, frame: pd.DataFrame, dimension: str, days: int = 14,
+                       top: int = DEFAULT_TOP) -> Dict[str, Any]:
+        """周环比：最近7天（含今天）与之前7天的发帖量及变化"""
+        this_week_start = pd.Timestamp(_utc_today() - timedelta(days=6))
+        grouped = self._by_dimension(frame, dimension)
+        period = np.where(grouped['day'] >= this_week_start, 'this_week', 'last_week')
+        counts = grouped.assign(period=period).groupby([dimension, 'period']).size()\
+            .unstack(fill_value=0).reindex(columns=['this_week', 'last_week'], fill_value=0)
+
+        counts['delta'] = counts['this_week'] - counts['last_week']
+        last_week = counts['last_week'].to_numpy(dtype=float)
+        counts['change'] = np.divide(counts['delta'].to_numpy(dtype=float) * 100, last_week,
+                                     out=np.full(len(counts), np.nan), where=last_week > 0).round(1)
+        counts = counts.sort_values(['this_week', 'last_week'], ascending=False).head(top)
+
+        return {
+            'dimension': dimension,
+            'this_week_start': this_week_start.strftime('%Y-%m-%d'),
+            'items': self._records(counts)
+        }
+
+    def top_values(self, frame: pd.DataFrame, dimension: str, top: Optional[int] = 5) -> list:
+        """出现次数最多的 top 个取值 [(取值, 次数)]，top=None 时返回全部"""
+        counts = self._by_dimension(frame, dimension)[dimension].value_counts()
+        if top:
+            counts = counts.head(top)
+        return [(str(key), int(count)) for key, count in counts.items()]
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _by_dimension(self, frame: pd.DataFrame, dimension: str) -> pd.DataFrame:
+        """列表维度按元素展开（一个帖子计入每个关键词），空值归为"未知\""""
+        if dimension in self.list_dimensions:
+            frame = frame.explode(dimension)
+            frame = frame[frame[dimension].notna() & (frame[dimension] != '')]
+        else:
+            frame = frame.assign(**{dimension: frame[dimension].fillna(UNKNOWN_KEY)})
+        return frame
+
+    def _data_version(self) -> Tuple[int, int]:
+        """帖子数和最大ID，新增或删除帖子后缓存失效"""
+        count, max_id = self.db.session.query(func.count(self.model.id), func.max(self.model.id)).one()
+        return count, max_id or 0
+
+    def _cached(self, key: tuple, refresh: bool, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        today = _utc_today()
+        version = self._data_version()
+        with self._lock:
+            entry = self._cache.get(key)
+        if entry and not refresh and entry[0] == today and entry[1] == version:
+            return entry[2]
+
+        result = compute()
+        result['generated_at'] = datetime.now().isoformat()
+        with self._lock:
+            # 只保留当天的缓存
+            self._cache = {k: v for k, v in self._cache.items() if v[0] == today}
+            self._cache[key] = (today, version, result)
+        logger.debug(f"📈 已计算分析报表 {key}")
+        return result
+
+    @staticmethod
+    def _records(frame: pd.DataFrame) -> list:
+        """按取值输出 [{key, 各列...}]，保持各列的整数/小数类型，NaN 转为 None"""
+        frame = frame.rename_axis('key').reset_index()
+        frame['key'] = frame['key'].astype(str)
+        return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+def competitor_post_analytics(db) -> TrendAnalytics:
+    """竞品帖子分析：按品牌、平台、监控配置（配置名称）"""
+    from models.competitor_models import CompetitorPost, MonitorConfig
+
+    return TrendAnalytics(
+        db, CompetitorPost,
+        dimensions={
+            'brand': CompetitorPost.brand_category,
+            'platform': CompetitorPost.platform,
+            'config': MonitorConfig.name,
+        },
+        joins=[(MonitorConfig.__table__, MonitorConfig.id == CompetitorPost.monitor_config_id)]
+    )
+
+
+def crawled_post_analytics(db) -> TrendAnalytics:
+    """抓取帖子分析：按来源网站、匹配的关键词；pushed 表示已成功推送"""
+    from models.database import CrawledPost, PushRecord
+
+    pushed = select(PushRecord.post_id).where(PushRecord.status == 'success').distinct().subquery()
+    return TrendAnalytics(
+        db, CrawledPost,
+        dimensions={
+            'platform': CrawledPost.source_website,
+            'keyword': CrawledPost.matched_keywords,
+        },
+        list_dimensions=['keyword'],
+        joins=[(pushed, pushed.c.post_id == CrawledPost.id)],
+        extra_columns={'pushed': pushed.c.post_id.isnot(None)}
+    )
+
+
+_post_analytics = None
+_post_analytics_lock = threading.Lock()
+
+
+def get_post_analytics() -> TrendAnalytics:
+    """抓取帖子分析的全局实例（首次使用时创建），接口、爬虫服务和定时任务共用同一份报表缓存"""
+    global _post_analytics
+    with _post_analytics_lock:
+        if _post_analytics is None:
+            from models.database import db
+            _post_analytics = crawled_post_analytics(db)
+        return _post_analytics
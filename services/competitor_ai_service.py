@@ -4,10 +4,63 @@
 使用Gemini API进行品牌分类和内容总结
 """
 
+import re
 import requests
 import os
-from typing import List, Dict, Any
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import List, Dict, Any, Optional
+from flask import current_app, has_app_context
 from loguru import logger
+from services.ai_response_cache import ai_response_cache
+
+# Gemini 生成参数（也是AI响应缓存键的一部分）
+GENERATION_CONFIG = {
+    "temperature": 0.3,
+    "maxOutputTokens": 2048,
+    "topP": 0.8,
+    "topK": 10
+}
+
+# 分组摘要（map）阶段每组的输出更短，多组摘要合起来仍能放进一次汇总请求
+MAP_GENERATION_CONFIG = dict(GENERATION_CONFIG, maxOutputTokens=640)
+
+# 单次请求的提示词token预算（超出时分组摘要再汇总）、分组摘要的并发数和最多分组数
+DEFAULT_PROMPT_TOKEN_BUDGET = 6000
+DEFAULT_MAP_MAX_WORKERS = 4
+DEFAULT_MAP_MAX_CHUNKS = 8  # 最多 2 轮并发摘要，帖子再多耗时也不再增加
+MAX_REDUCE_ROUNDS = 3  # 分组摘要仍超出预算时逐层合并的最多轮数
+DEFAULT_RATE_LIMIT_SECONDS = 60  # 限流响应没有给出等待时间时暂停调用的秒数
+
+# 分组摘要提示词：只提炼要点，最终格式由汇总阶段的提示词决定
+MAP_PROMPT = """你是竞品情报分析助手。请从以下帖子中提炼关键信息，按品牌列出要点：
+1. 每个品牌列出产品动态和用户反馈，每条一句话
+2. 保留每条要点对应的链接
+3. 不使用markdown符号，不写开场白和总结
+4. 总字数控制在400字以内"""
+
+_CJK = re.compile(r'[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]')
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估计token数：中日韩字符约1个token，其他字符约4个字符1个token"""
+    if not text:
+        return 0
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+class AIServiceError(RuntimeError):
+    """AI分析失败（analyze_posts 使用 raise_errors=True 时抛出，由调用方决定重试）"""
+
+
+class RateLimitedError(AIServiceError):
+    """Gemini API 限流，retry_after 为建议等待的秒数"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Gemini API限流，{retry_after:.0f} 秒后重试")
+        self.retry_after = retry_after
 
 class CompetitorAIService:
     """竞品AI分析服务"""
@@ -16,6 +69,11 @@ class CompetitorAIService:
         # 从数据库获取API配置
         self.api_key = self._get_api_key()
         self.model = self._get_model()
+        self.prompt_token_budget = self._get_int_setting('AI_PROMPT_TOKEN_BUDGET', DEFAULT_PROMPT_TOKEN_BUDGET)
+        self.map_max_workers = self._get_int_setting('AI_MAP_MAX_WORKERS', DEFAULT_MAP_MAX_WORKERS)
+        self.map_max_chunks = self._get_int_setting('AI_MAP_MAX_CHUNKS', DEFAULT_MAP_MAX_CHUNKS)
+        # 收到限流响应后在此时间（time.time()）之前不再请求Gemini，共用同一服务实例的调用方均遵守
+        self.rate_limited_until = 0.0
         
         # 优化的AI提示词 - 公众号推送风格
         self.system_prompt = """你是一个科技媒体编辑，专门整理竞品动态信息。请用公众号推送的简洁风格，按品牌分类整理产品动态和用户反馈。
@@ -101,8 +159,34 @@ class CompetitorAIService:
         # 4. 使用默认模型
         return "gemini-1.5-flash"
 
-    def analyze_posts(self, posts: List[Dict[str, Any]], custom_prompt: str = None) -> str:
-        """分析竞品帖子，生成按品牌分类的总结"""
+    def _get_int_setting(self, name: str, default: int) -> int:
+        """获取整数配置 - 优先从配置文件，然后环境变量，最后默认值"""
+        value = None
+        
+        # 1. 优先从配置文件获取
+        try:
+            import config
+            value = getattr(config, name, None)
+        except ImportError:
+            pass
+        
+        # 2. 从环境变量获取
+        if value is None:
+            value = os.getenv(name)
+        
+        try:
+            return max(1, int(value)) if value is not None else default
+        except (TypeError, ValueError):
+            logger.warning(f"⚠️ 无效的配置 {name}: {value}，使用默认值{default}")
+            return default
+
+    def analyze_posts(self, posts: List[Dict[str, Any]], custom_prompt: str = None, use_cache: bool = True,
+                      raise_errors: bool = False) -> str:
+        """分析竞品帖子，生成按品牌分类的总结（相同的帖子和提示词默认使用缓存结果，use_cache=False 时重新生成）
+
+        默认在AI调用失败时返回原始数据整理；raise_errors=True 时改为抛出 AIServiceError（限流时为 RateLimitedError），
+        分组摘要中任一组失败也视为失败（已成功的分组结果在AI响应缓存中，重试时直接复用）
+        """
         if not posts:
             return "暂无新的竞品动态"
         
@@ -115,40 +199,209 @@ class CompetitorAIService:
             
             full_prompt = f"{prompt}\n\n以下是需要分析的帖子数据：\n\n{posts_text}\n\n请按要求进行分析和整理："
             
-            # 调用Gemini API
-            summary = self._call_gemini_api(full_prompt)
+            if estimate_tokens(full_prompt) <= self.prompt_token_budget:
+                # 调用Gemini API
+                summary = self._call_gemini_api(full_prompt, use_cache=use_cache)
+            else:
+                # 超出单次请求预算：分组并发摘要，再汇总
+                summary = self._map_reduce_summary(posts, prompt, use_cache, strict=raise_errors)
             
             if summary:
                 logger.info("✅ AI分析完成")
                 return summary
+            elif raise_errors:
+                self._raise_failure("AI分析失败")
             else:
                 logger.error("❌ AI分析失败，返回原始数据")
                 return self._fallback_summary(posts)
                 
+        except AIServiceError:
+            raise
         except Exception as e:
             logger.error(f"❌ AI分析异常: {e}")
+            if raise_errors:
+                raise AIServiceError(f"AI分析异常: {e}") from e
             return self._fallback_summary(posts)
     
+    def rate_limit_remaining(self) -> float:
+        """距离限流结束的秒数，未限流时为0"""
+        return max(self.rate_limited_until - time.time(), 0.0)
+    
+    def _raise_failure(self, message: str):
+        """AI调用失败：限流期间抛出 RateLimitedError，否则抛出 AIServiceError"""
+        remaining = self.rate_limit_remaining()
+        if remaining > 0:
+            raise RateLimitedError(remaining)
+        raise AIServiceError(message)
+    
     def _format_posts_for_analysis(self, posts: List[Dict[str, Any]]) -> str:
         """格式化帖子数据供AI分析"""
-        formatted_posts = []
-        
-        for i, post in enumerate(posts, 1):
-            post_text = f"""
-帖子 {i}:
+        return "\n".join(self._format_post(i, post) for i, post in enumerate(posts, 1))
+    
+    def _format_post(self, index: int, post: Dict[str, Any]) -> str:
+        """格式化单个帖子"""
+        return f"""
+帖子 {index}:
 平台: {post.get('platform', '未知')}
 标题: {post.get('title', '无标题')}
 作者: {post.get('author', '未知作者')}
-内容: {post.get('content', '无内容')[:300]}
+内容: {(post.get('content') or '无内容')[:300]}
 链接: {post.get('post_url', '无链接')}
 时间: {post.get('post_time', '未知时间')}
 ---"""
-            formatted_posts.append(post_text)
+    
+    def _map_reduce_summary(self, posts: List[Dict[str, Any]], prompt: str, use_cache: bool = True,
+                            strict: bool = False) -> str:
+        """分组摘要再汇总：帖子按品牌/监控配置分组并按token预算切分，各组并发摘要，最后按原提示词汇总
+
+        最多 map_max_chunks 组，超出时按互动量（点赞+评论）保留优先的帖子；
+        总耗时约为 (组数/并发数) 次摘要 + 1 次汇总，帖子再多也有上限。
+        strict=True 时任一次调用失败即抛出 AIServiceError，不使用原始数据代替
+        """
+        chunk_budget = self.prompt_token_budget - estimate_tokens(MAP_PROMPT) - 50
+        selected = self._select_posts(posts, chunk_budget * self.map_max_chunks)
+        chunks = self._chunk_posts(selected, chunk_budget)
+        # 分组后块未装满，组数仍可能超出上限：去掉与超出部分等量的低互动帖子后重新分组
+        while len(chunks) > self.map_max_chunks:
+            overflow = sum(len(chunk_posts) for _, chunk_posts in chunks[self.map_max_chunks:])
+            selected = self._drop_least_engaged(selected, overflow)
+            chunks = self._chunk_posts(selected, chunk_budget)
+        omitted = len(posts) - len(selected)
+        logger.info(f"🧩 帖子较多（{len(posts)} 条），分 {len(chunks)} 组并发摘要后汇总"
+                    + (f"，{omitted} 条低互动帖子未纳入" if omitted else ""))
+        
+        map_prompts = [f"{MAP_PROMPT}\n\n帖子数据：\n{text}" for text, _ in chunks]
+        partials = self._call_concurrently(map_prompts, MAP_GENERATION_CONFIG, use_cache)
+        if strict and not all(partials):
+            self._raise_failure(f"{sum(1 for partial in partials if not partial)}/{len(partials)} 组摘要失败")
+        # 某组摘要失败时用该组的原始数据整理代替，其余分组的结果仍然可用
+        partials = [partial or self._fallback_summary(chunk_posts)
+                    for partial, (_, chunk_posts) in zip(partials, chunks)]
+        
+        # 分组摘要合起来仍超出预算时，先逐层合并
+        for _ in range(MAX_REDUCE_ROUNDS):
+            if len(partials) <= 1 or estimate_tokens(prompt + '\n\n'.join(partials)) <= self.prompt_token_budget:
+                break
+            groups = self._pack_texts(partials, self.prompt_token_budget - estimate_tokens(MAP_PROMPT) - 50)
+            merged = self._call_concurrently(
+                [f"{MAP_PROMPT}\n\n以下是分组摘要，请合并去重：\n\n" + '\n\n'.join(group) for group in groups],
+                MAP_GENERATION_CONFIG, use_cache
+            )
+            if strict and not all(merged):
+                self._raise_failure("合并分组摘要失败")
+            partials = [result or '\n\n'.join(group) for result, group in zip(merged, groups)]
+        
+        scope = f"共 {len(posts)} 条帖子" + (f"，其中 {omitted} 条低互动帖子未纳入摘要" if omitted else "")
+        reduce_prompt = (f"{prompt}\n\n以下是按品牌分组整理的竞品动态摘要（{scope}）：\n\n"
+                         + '\n\n'.join(partials) + "\n\n请按要求进行分析和整理：")
+        summary = self._call_gemini_api(reduce_prompt, use_cache=use_cache)
+        if strict and not summary:
+            self._raise_failure("汇总分组摘要失败")
+        # 汇总失败时直接返回分组摘要
+        return summary or '\n\n'.join(partials)
+    
+    def _select_posts(self, posts: List[Dict[str, Any]], budget: int) -> List[Dict[str, Any]]:
+        """帖子总量超出 budget 个token时，按互动量从高到低保留能放下的帖子（保持原顺序）"""
+        tokens = [estimate_tokens(self._format_post(i, post)) for i, post in enumerate(posts, 1)]
+        if sum(tokens) <= budget:
+            return posts
+        
+        ranked = sorted(range(len(posts)), reverse=True,
+                        key=lambda i: (posts[i].get('likes_count') or 0) + (posts[i].get('comments_count') or 0))
+        kept, used = set(), 0
+        for i in ranked:
+            if used + tokens[i] <= budget:
+                kept.add(i)
+                used += tokens[i]
+        return [post for i, post in enumerate(posts) if i in kept]
+    
+    @staticmethod
+    def _drop_least_engaged(posts: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+        """去掉互动量最低的 count 条帖子（保持原顺序）"""
+        ranked = sorted(range(len(posts)),
+                        key=lambda i: (posts[i].get('likes_count') or 0) + (posts[i].get('comments_count') or 0))
+        dropped = set(ranked[:count])
+        return [post for i, post in enumerate(posts) if i not in dropped]
+    
+    def _chunk_posts(self, posts: List[Dict[str, Any]], budget: int) -> List[tuple]:
+        """按品牌（无品牌时按监控配置、平台）分组，同组帖子尽量在一起，每块不超过 budget 个token
+
+        返回 [(格式化文本, 帖子列表)]；单个帖子超出预算时单独成块
+        """
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for post in posts:
+            key = post.get('brand_category') or post.get('monitor_config_id') or post.get('platform') or '其他'
+            groups.setdefault(str(key), []).append(post)
         
-        return "\n".join(formatted_posts)
+        chunks, texts, chunk_posts, used = [], [], [], 0
+        for group_posts in groups.values():
+            for post in group_posts:
+                text = self._format_post(len(chunk_posts) + 1, post)
+                tokens = estimate_tokens(text)
+                if chunk_posts and used + tokens > budget:
+                    chunks.append(('\n'.join(texts), chunk_posts))
+                    texts, chunk_posts, used = [], [], 0
+                    text = self._format_post(1, post)
+                texts.append(text)
+                chunk_posts.append(post)
+                used += tokens
+        if chunk_posts:
+            chunks.append(('\n'.join(texts), chunk_posts))
+        return chunks
+    
+    @staticmethod
+    def _pack_texts(texts: List[str], budget: int) -> List[List[str]]:
+        """把若干段文本按顺序装入不超过 budget 个token的组（至少两段一组，保证每轮都会减少）"""
+        groups, current, used = [], [], 0
+        for text in texts:
+            tokens = estimate_tokens(text)
+            if len(current) >= 2 and used + tokens > budget:
+                groups.append(current)
+                current, used = [], 0
+            current.append(text)
+            used += tokens
+        if current:
+            groups.append(current)
+        return groups
     
-    def _call_gemini_api(self, prompt: str) -> str:
-        """调用Gemini API"""
+    def _call_concurrently(self, prompts: List[str], generation_config: Dict[str, Any],
+                           use_cache: bool = True) -> List[str]:
+        """并发调用Gemini API，结果与 prompts 顺序一致（失败的为空字符串）"""
+        # 工作线程中需要应用上下文才能访问AI响应缓存
+        app = current_app._get_current_object() if has_app_context() else None
+        
+        def call(prompt: str) -> str:
+            with app.app_context() if app else nullcontext():
+                return self._call_gemini_api(prompt, use_cache=use_cache, generation_config=generation_config)
+        
+        if len(prompts) <= 1 or self.map_max_workers <= 1:
+            return [call(prompt) for prompt in prompts]
+        
+        with ThreadPoolExecutor(max_workers=min(self.map_max_workers, len(prompts)),
+                                thread_name_prefix='ai-map') as executor:
+            return list(executor.map(call, prompts))
+    
+    def _call_gemini_api(self, prompt: str, use_cache: bool = True,
+                         generation_config: Optional[Dict[str, Any]] = None) -> str:
+        """调用Gemini API（先查AI响应缓存，成功的结果写入缓存）"""
+        generation_config = generation_config or GENERATION_CONFIG
+        cache_key = ai_response_cache.make_key(self.model, prompt, generation_config)
+        cached = ai_response_cache.get(cache_key, bypass=not use_cache)
+        if cached:
+            logger.info("⚡ 命中AI响应缓存，跳过Gemini调用")
+            return cached
+        if self.rate_limit_remaining() > 0:
+            logger.warning(f"⏳ Gemini API限流中（剩余 {self.rate_limit_remaining():.0f} 秒），跳过调用")
+            return ""
+        
+        started = time.time()
+        content = self._request_gemini(prompt, generation_config)
+        if content:
+            ai_response_cache.set(cache_key, self.model, prompt, content, latency_ms=int((time.time() - started) * 1000))
+        return content
+    
+    def _request_gemini(self, prompt: str, generation_config: Optional[Dict[str, Any]] = None) -> str:
+        """请求Gemini API，失败时返回空字符串"""
         try:
             headers = {
                 'Content-Type': 'application/json'
@@ -164,12 +417,7 @@ class CompetitorAIService:
                         ]
                     }
                 ],
-                "generationConfig": {
-                    "temperature": 0.3,
-                    "maxOutputTokens": 2048,
-                    "topP": 0.8,
-                    "topK": 10
-                }
+                "generationConfig": generation_config or GENERATION_CONFIG
             }
             
             url = f'https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent?key={self.api_key}'
@@ -184,6 +432,11 @@ class CompetitorAIService:
                 else:
                     logger.error(f"❌ Gemini API返回格式异常: {result}")
                     return ""
+            elif response.status_code == 429:
+                delay = self._retry_delay(response)
+                self.rate_limited_until = max(self.rate_limited_until, time.time() + delay)
+                logger.warning(f"⏳ Gemini API限流，{delay:.0f} 秒内暂停调用")
+                return ""
             else:
                 logger.error(f"❌ Gemini API错误: {response.status_code} - {response.text}")
                 return ""
@@ -192,6 +445,19 @@ class CompetitorAIService:
             logger.error(f"❌ 调用Gemini API失败: {e}")
             return ""
     
+    @staticmethod
+    def _retry_delay(response) -> float:
+        """限流响应建议的等待秒数：Retry-After 响应头，或错误详情中的 retryDelay（如 "37s"）"""
+        try:
+            if response.headers.get('Retry-After'):
+                return max(float(response.headers['Retry-After']), 1.0)
+            for detail in response.json().get('error', {}).get('details', []):
+                if detail.get('retryDelay'):
+                    return max(float(detail['retryDelay'].rstrip('s')), 1.0)
+        except (TypeError, ValueError, AttributeError):
+            pass
+        return float(DEFAULT_RATE_LIMIT_SECONDS)
+    
     def _fallback_summary(self, posts: List[Dict[str, Any]]) -> str:
         """AI失败时的备用总结 - 公众号推送风格"""
         if not posts:
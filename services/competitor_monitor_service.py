@@ -4,14 +4,29 @@
 整合爬虫、AI分析、数据存储等功能
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from models.competitor_models import db, MonitorConfig, CrawlSession, CompetitorPost
-from crawlers.competitor_crawler import CompetitorCrawler
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from flask import current_app
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models.competitor_models import db, MonitorConfig, CrawlSession, CompetitorPost, StatCounter, AIJob
+from crawlers.competitor_crawler import CompetitorCrawler, LinkDeadline
 from services.competitor_ai_service import CompetitorAIService
+from services.ai_job_queue import AIJobQueue, PRIORITY_MANUAL, PRIORITY_SCHEDULED
 from services.feishu_webhook_service import FeishuWebhookService
+from services.seen_filter import seen_posts
+from services.search_service import FullTextIndex
+from services.pagination import keyset_paginate, DEFAULT_PAGE_SIZE
+from services.stat_counters import StatCounters, COMPETITOR_COUNTERS
+from services.analytics_service import competitor_post_analytics, AnalyticsError
 from loguru import logger
-import hashlib
+
+# 批量查询/更新时每条 IN 语句的参数个数（SQLite旧版本上限为999）
+DEDUP_QUERY_CHUNK_SIZE = 500
+
+# AI任务类型：生成会话的AI汇总（可选推送飞书）
+JOB_SESSION_SUMMARY = 'session_summary'
 
 class CompetitorMonitorService:
     """竞品监控核心服务"""
@@ -19,10 +34,69 @@ class CompetitorMonitorService:
     def __init__(self):
         self.crawler = CompetitorCrawler()
         self.ai_service = CompetitorAIService()
-        self.feishu_service = FeishuWebhookService()
+        self.feishu_service = FeishuWebhookService(ai_service=self.ai_service)
+        self.crawl_max_workers = self._get_crawl_max_workers()
+        # 帖子全文搜索索引（标题权重最高，其次作者）
+        self.search_index = FullTextIndex(db, CompetitorPost, ['title', 'content', 'author'], weights=[10.0, 1.0, 2.0])
+        # 统计计数器（配置/会话/帖子数，按配置、平台、日期）
+        self.stat_counters = StatCounters(db, StatCounter, COMPETITOR_COUNTERS)
+        self.stats_reconcile_hours = self._get_stats_reconcile_hours()
+        # 趋势分析（按品牌、平台、监控配置）
+        self.analytics = competitor_post_analytics(db)
+        # AI任务队列：会话的AI汇总在后台生成，爬取请求不等待AI调用
+        self.job_queue = AIJobQueue()
+        self.job_queue.register(JOB_SESSION_SUMMARY, self._run_session_summary_job,
+                                on_failure=self._session_summary_failed)
+    
+    def _get_crawl_max_workers(self) -> int:
+        """获取并发爬取的线程数 - 优先从配置文件，然后环境变量，默认4"""
+        value = None
+        
+        # 1. 优先从配置文件获取
+        try:
+            import config
+            value = getattr(config, 'CRAWL_MAX_WORKERS', None)
+        except ImportError:
+            pass
+        
+        # 2. 从环境变量获取
+        if value is None:
+            value = os.getenv('CRAWL_MAX_WORKERS')
+        
+        try:
+            return max(1, int(value)) if value is not None else 4
+        except (TypeError, ValueError):
+            logger.warning(f"⚠️ 无效的并发爬取线程数配置: {value}，使用默认值4")
+            return 4
     
-    def execute_crawl_session(self, session_name: str = None) -> Dict[str, Any]:
-        """执行一次完整的爬取会话"""
+    def _get_stats_reconcile_hours(self) -> int:
+        """获取统计计数核对间隔（小时）- 优先从配置文件，然后环境变量，默认6"""
+        value = None
+        
+        # 1. 优先从配置文件获取
+        try:
+            import config
+            value = getattr(config, 'STATS_RECONCILE_HOURS', None)
+        except ImportError:
+            pass
+        
+        # 2. 从环境变量获取
+        if value is None:
+            value = os.getenv('STATS_RECONCILE_HOURS')
+        
+        try:
+            return max(1, int(value)) if value is not None else 6
+        except (TypeError, ValueError):
+            logger.warning(f"⚠️ 无效的统计核对间隔配置: {value}，使用默认值6")
+            return 6
+    
+    def execute_crawl_session(self, session_name: str = None, priority: int = PRIORITY_MANUAL,
+                              push_feishu: bool = False) -> Dict[str, Any]:
+        """执行一次完整的爬取会话
+        
+        帖子入库后会话标记为 summary_pending 并写入AI汇总任务即返回，汇总由后台工作线程生成后更新会话
+        （push_feishu=True 时汇总完成后推送飞书）
+        """
         if not session_name:
             session_name = f"{datetime.now().strftime('%Y-%m-%d %H:%M')} 竞品监控"
         
@@ -50,15 +124,21 @@ class CompetitorMonitorService:
             
             all_posts = []
             total_posts = 0
-            
-            # 遍历每个监控配置
-            for config in configs:
-                logger.info(f"📡 爬取配置: {config.name}")
+            config_results = []
+            
+            # 并发爬取所有配置，去重和入库在当前线程按完成顺序串行执行
+            for config, posts, error in self._crawl_configs(configs):
+                if error:
+                    logger.error(f"❌ 爬取配置失败 {config.name}: {error}")
+                    config_results.append({
+                        "config_id": config.id,
+                        "name": config.name,
+                        "success": False,
+                        "error": error
+                    })
+                    continue
                 
                 try:
-                    # 爬取数据
-                    posts = self.crawler.crawl_by_config(config.to_dict())
-                    
                     # 去重和保存
                     unique_posts = self._deduplicate_posts(posts, config.id, session.id)
                     
@@ -68,36 +148,55 @@ class CompetitorMonitorService:
                     # 更新配置的最后爬取时间
                     config.last_crawl_time = datetime.now()
                     
+                    config_results.append({
+                        "config_id": config.id,
+                        "name": config.name,
+                        "success": True,
+                        "total_posts": len(posts),
+                        "unique_posts": len(unique_posts)
+                    })
+                    
                     logger.info(f"✅ {config.name}: 爬取 {len(posts)} 条，去重后 {len(unique_posts)} 条")
                     
                 except Exception as e:
-                    logger.error(f"❌ 爬取配置失败 {config.name}: {e}")
+                    db.session.rollback()
+                    logger.error(f"❌ 保存配置数据失败 {config.name}: {e}")
+                    config_results.append({
+                        "config_id": config.id,
+                        "name": config.name,
+                        "success": False,
+                        "error": str(e)
+                    })
                     continue
             
             # 更新会话统计
             session.total_posts = total_posts
             session.processed_posts = len(all_posts)
             
-            # AI分析
+            # AI分析写入任务队列，和会话统计、配置的爬取时间一起提交
+            job = None
             if all_posts:
-                logger.info("🤖 开始AI分析...")
-                post_dicts = [post.to_dict() for post in all_posts]
-                ai_summary = self.ai_service.analyze_posts(post_dicts)
-                session.ai_summary = ai_summary
+                session.status = 'summary_pending'
+                job = self.job_queue.enqueue(JOB_SESSION_SUMMARY, session_id=session.id, priority=priority,
+                                             payload={'push_feishu': push_feishu})
+                logger.info(f"🤖 AI分析已加入队列（任务 #{job.id}）")
             else:
                 session.ai_summary = "24小时内暂无新的竞品动态"
-            
-            session.status = 'completed'
-            db.session.commit()
+                session.status = 'completed'
+                db.session.commit()
             
             logger.info(f"🎉 竞品监控完成: 处理 {len(all_posts)} 条有效数据")
             
             return {
                 "success": True,
                 "session_id": session.id,
+                "status": session.status,
                 "total_posts": total_posts,
                 "processed_posts": len(all_posts),
-                "summary": session.ai_summary
+                "failed_configs": sum(1 for r in config_results if not r["success"]),
+                "config_results": config_results,
+                "summary": session.ai_summary,
+                "summary_job_id": job.id if job else None
             }
             
         except Exception as e:
@@ -116,65 +215,178 @@ class CompetitorMonitorService:
             # 清理资源
             self.crawler.close()
     
+    def _crawl_configs(self, configs: List[MonitorConfig]) -> Iterator[Tuple[MonitorConfig, List, Optional[str]]]:
+        """爬取所有配置，按完成顺序产出 (配置, 帖子列表, 错误信息)
+        
+        线程数为1时沿用共享的爬虫实例串行爬取；否则每个配置在独立线程中
+        使用独立的爬虫实例（独立的HTTP会话和WebDriver）爬取。
+        """
+        # 配置字典在当前线程生成，工作线程不接触当前会话中的ORM对象
+        config_dicts = [(config, config.to_dict()) for config in configs]
+        # 本次会话的所有配置共用链接爬取的总时限（首次爬取链接时开始计时）
+        link_deadline = self.crawler.reset_link_deadline()
+        
+        if self.crawl_max_workers <= 1 or len(configs) <= 1:
+            for config, config_dict in config_dicts:
+                logger.info(f"📡 爬取配置: {config.name}")
+                try:
+                    yield config, self.crawler.crawl_by_config(config_dict), None
+                except Exception as e:
+                    yield config, [], str(e)
+            return
+        
+        app = current_app._get_current_object()
+        max_workers = min(self.crawl_max_workers, len(configs))
+        logger.info(f"⚡ 并发爬取 {len(configs)} 个配置，线程数: {max_workers}")
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crawl") as executor:
+            futures = {
+                executor.submit(self._crawl_config_worker, app, config.name, config_dict, link_deadline): config
+                for config, config_dict in config_dicts
+            }
+            for future in as_completed(futures):
+                config = futures[future]
+                try:
+                    yield config, future.result(), None
+                except Exception as e:
+                    yield config, [], str(e)
+    
+    def _crawl_config_worker(self, app, config_name: str, config_dict: Dict[str, Any],
+                             link_deadline: LinkDeadline = None) -> List:
+        """工作线程：使用独立的爬虫实例爬取单个配置"""
+        crawler = CompetitorCrawler(link_deadline=link_deadline)
+        try:
+            # 网页更新模式会回写配置，需要独立的应用上下文（即独立的数据库会话）
+            with app.app_context():
+                logger.info(f"📡 爬取配置: {config_name}")
+                return crawler.crawl_by_config(config_dict)
+        finally:
+            crawler.close()
+    
     def _deduplicate_posts(self, posts: List, config_id: int, session_id: int) -> List[CompetitorPost]:
-        """去重并保存帖子"""
-        unique_posts = []
+        """去重并保存帖子 - 按帖子指纹唯一索引 INSERT OR IGNORE，已存在的帖子标记为重复"""
+        if not posts:
+            return []
         
+        # 批内去重：同一批中指纹相同的帖子只保留第一条
+        candidates = {}
         for post_data in posts:
-            # 生成内容hash用于去重
-            content_hash = self._generate_post_hash(
-                post_data.title,
-                post_data.post_url,
-                post_data.author
-            )
-            
-            # 检查是否已存在
-            existing = CompetitorPost.query.filter_by(
-                title=post_data.title,
-                post_url=post_data.post_url
-            ).first()
-            
-            if existing:
-                existing.is_duplicate = True
+            post_hash = self._generate_post_hash(post_data.title, post_data.post_url)
+            if post_hash in candidates:
                 logger.debug(f"发现重复帖子: {post_data.title[:50]}")
                 continue
-            
-            # 创建新记录
-            new_post = CompetitorPost(
-                session_id=session_id,
-                monitor_config_id=config_id,
-                title=post_data.title,
-                content=post_data.content,
-                author=post_data.author,
-                post_url=post_data.post_url,
-                post_time=post_data.post_time,
-                likes_count=post_data.likes_count,
-                comments_count=post_data.comments_count,
-                platform=post_data.platform,
-                is_processed=True
-            )
-            
-            db.session.add(new_post)
-            unique_posts.append(new_post)
+            candidates[post_hash] = post_data
+        
+        # 新帖子的写入本身就是查重，过滤器在这里只用于记录可能命中的帖子，统计误判率
+        possible_hits = {post_hash for post_hash, post_data in candidates.items()
+                         if seen_posts.might_contain(post_data.post_url, post_hash)}
+        
+        now = datetime.utcnow()
+        rows = [
+            {
+                'session_id': session_id,
+                'monitor_config_id': config_id,
+                'title': post_data.title,
+                'content': post_data.content,
+                'author': post_data.author,
+                'post_url': post_data.post_url,
+                'post_time': post_data.post_time,
+                'likes_count': post_data.likes_count,
+                'comments_count': post_data.comments_count,
+                'platform': post_data.platform,
+                'is_processed': True,
+                'is_duplicate': False,
+                'post_hash': post_hash,
+                'created_at': now,
+                'updated_at': now
+            }
+            for post_hash, post_data in candidates.items()
+        ]
+        
+        # 一条语句批量写入，指纹已存在的帖子由唯一索引忽略，RETURNING 只返回实际写入的帖子
+        unique_posts = db.session.scalars(
+            sqlite_insert(CompetitorPost)
+            .on_conflict_do_nothing(index_elements=['post_hash'])
+            .returning(CompetitorPost),
+            rows
+        ).all()
+        
+        hashes = list(candidates)
+        new_hashes = {post.post_hash for post in unique_posts}
+        duplicate_hashes = [post_hash for post_hash in hashes if post_hash not in new_hashes]
+        for post_hash in duplicate_hashes:
+            logger.debug(f"发现重复帖子: {candidates[post_hash].title[:50]}")
+        for i in range(0, len(duplicate_hashes), DEDUP_QUERY_CHUNK_SIZE):
+            CompetitorPost.query.filter(CompetitorPost.post_hash.in_(duplicate_hashes[i:i + DEDUP_QUERY_CHUNK_SIZE]))\
+                .update({CompetitorPost.is_duplicate: True}, synchronize_session=False)
+        
+        seen_posts.record_false_positive(len(possible_hits & new_hashes))
+        
+        # 保持爬取顺序（提交前排序，提交后属性会过期）
+        order = {post_hash: index for index, post_hash in enumerate(hashes)}
+        unique_posts.sort(key=lambda post: order[post.post_hash])
+        new_keys = [(post.post_url, post.post_hash) for post in unique_posts]
         
         db.session.commit()
+        
+        for post_url, post_hash in new_keys:
+            seen_posts.add(post_url, post_hash)
         return unique_posts
     
-    def _generate_post_hash(self, title: str, url: str, author: str) -> str:
-        """生成帖子内容的hash值"""
-        content = f"{title}|{url}|{author}"
-        return hashlib.md5(content.encode()).hexdigest()
+    def warm_seen_filter(self):
+        """用已入库帖子的链接和指纹预热已见帖子过滤器"""
+        try:
+            total = db.session.query(CompetitorPost.id).count()
+            rows = db.session.query(CompetitorPost.post_url, CompetitorPost.post_hash).yield_per(10000)
+            seen_posts.warm(rows, expected=total)
+        except Exception as e:
+            logger.error(f"❌ 预热已见帖子过滤器失败: {e}")
+    
+    def _generate_post_hash(self, title: str, url: str) -> str:
+        """生成帖子指纹（与 post_hash 列一致）"""
+        return CompetitorPost.compute_hash(title, url)
     
     def get_recent_sessions(self, limit: int = 10) -> List[Dict[str, Any]]:
-        """获取最近的爬取会话"""
-        sessions = CrawlSession.query.order_by(
+        """获取最近的爬取会话（AI汇总只返回预览，全文在会话详情中）"""
+        sessions = CrawlSession.query.options(*CrawlSession.preview_options()).order_by(
             CrawlSession.crawl_time.desc()
         ).limit(limit).all()
         
-        return [session.to_dict() for session in sessions]
+        return [session.to_dict(full=False) for session in sessions]
     
-    def get_session_details(self, session_id: int) -> Optional[Dict[str, Any]]:
-        """获取会话详情"""
+    def search_posts(self, keyword: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """全文搜索帖子，按相关度排序并返回高亮的标题和内容片段"""
+        try:
+            hits = self.search_index.search(keyword, limit=limit, offset=offset, snippet_column='content')
+            posts = {post.id: post for post in CompetitorPost.query.options(*CompetitorPost.preview_options()).filter(
+                CompetitorPost.id.in_([hit['id'] for hit in hits])
+            ).all()} if hits else {}
+
+            results = []
+            for hit in hits:
+                post = posts.get(hit['id'])
+                if post:
+                    post_data = post.to_dict(full=False)
+                    post_data.update(rank=hit['rank'], title_highlight=hit['title_highlight'], snippet=hit['snippet'])
+                    results.append(post_data)
+
+            return {
+                "success": True,
+                "keyword": keyword,
+                "total": self.search_index.count(keyword),
+                "posts": results
+            }
+
+        except Exception as e:
+            logger.error(f"❌ 搜索帖子失败: {e}")
+            return {
+                "success": False,
+                "message": str(e)
+            }
+    
+    def get_session_details(self, session_id: int, cursor: str = None,
+                            limit: int = DEFAULT_PAGE_SIZE) -> Optional[Dict[str, Any]]:
+        """获取会话详情（帖子只返回一页，后续页通过 next_cursor 获取）"""
         session = CrawlSession.query.get(session_id)
         if not session:
             return None
@@ -182,8 +394,10 @@ class CompetitorMonitorService:
         session_data = session.to_dict()
         
         # 获取关联的帖子
-        posts = CompetitorPost.query.filter_by(session_id=session_id).all()
-        session_data['posts'] = [post.to_dict() for post in posts]
+        page = self.get_session_posts(session_id, cursor=cursor, limit=limit)
+        session_data['posts'] = page['posts']
+        session_data['next_cursor'] = page['next_cursor']
+        session_data['post_count'] = CompetitorPost.query.filter_by(session_id=session_id).count()
         
         return session_data
     
@@ -198,7 +412,6 @@ class CompetitorMonitorService:
                 keywords=config_data.get('keywords'),
                 webpage_url=config_data.get('webpage_url'),
                 content_hash=None,  # 网页更新模式初始化为None，首次爬取时设置
-                last_content=None,  # 上次内容初始化为None
                 is_active=True
             )
             
@@ -286,68 +499,71 @@ class CompetitorMonitorService:
         return [config.to_dict() for config in configs]
     
     def get_statistics(self) -> Dict[str, Any]:
-        """获取统计信息"""
-        total_configs = MonitorConfig.query.count()
-        active_configs = MonitorConfig.query.filter_by(is_active=True).count()
-        total_sessions = CrawlSession.query.count()
-        total_posts = CompetitorPost.query.count()
-        
-        # 最近24小时的数据
-        yesterday = datetime.now() - timedelta(days=1)
-        recent_sessions = CrawlSession.query.filter(
-            CrawlSession.crawl_time >= yesterday
-        ).count()
-        recent_posts = CompetitorPost.query.filter(
-            CompetitorPost.created_at >= yesterday
-        ).count()
+        """获取统计信息（读取统计计数表）"""
+        counters = self.stat_counters
         
         return {
-            "total_configs": total_configs,
-            "active_configs": active_configs,
-            "total_sessions": total_sessions,
-            "total_posts": total_posts,
-            "recent_sessions": recent_sessions,
-            "recent_posts": recent_posts,
-            "ai_status": self.ai_service.get_summary_status()
+            "total_configs": counters.get('configs'),
+            "active_configs": counters.get('active_configs'),
+            "total_sessions": counters.get('sessions'),
+            "total_posts": counters.get('posts'),
+            # 最近24小时的数据（按小时计数累加）
+            "recent_sessions": counters.recent('sessions'),
+            "recent_posts": counters.recent('posts'),
+            "posts_by_platform": counters.get_scope('posts', 'platform'),
+            "posts_by_config": counters.get_scope('posts', 'config'),
+            "ai_status": self.ai_service.get_summary_status(),
+            "seen_filter": seen_posts.stats()
         }
     
+    def reconcile_statistics(self) -> Dict[str, Any]:
+        """从明细表重新计算统计计数"""
+        try:
+            result = self.stat_counters.reconcile()
+            return {
+                "success": True,
+                "message": f"核对完成，修正 {result['corrected']} 个计数",
+                **result
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": str(e)
+            }
+    
+    def get_analytics(self, report: str, dimension: str = None, days: int = 30, top: int = 10,
+                      refresh: bool = False) -> Dict[str, Any]:
+        """趋势分析报表（volume/engagement/wow），维度为 brand/platform/config"""
+        try:
+            return {
+                "success": True,
+                **self.analytics.report(report, dimension, days=days, top=top, refresh=refresh)
+            }
+        except AnalyticsError as e:
+            return {
+                "success": False,
+                "message": str(e)
+            }
+        except Exception as e:
+            logger.error(f"❌ 生成分析报表失败: {e}")
+            return {
+                "success": False,
+                "message": str(e)
+            }
+    
     def execute_scheduled_crawl(self) -> Dict[str, Any]:
-        """执行定时爬取任务（每日10点），有内容时推送飞书"""
+        """执行定时爬取任务（每日10点），有内容时在AI汇总完成后推送飞书"""
         logger.info("🕘 执行定时竞品监控...")
         
         try:
-            # 执行爬取会话
-            result = self.execute_crawl_session("每日定时监控")
+            # 执行爬取会话，AI汇总和飞书推送由后台任务完成
+            result = self.execute_crawl_session("每日定时监控", priority=PRIORITY_SCHEDULED, push_feishu=True)
             
-            # 如果有新内容且爬取成功，发送飞书推送
-            if result.get("success") and result.get("processed_posts", 0) > 0:
-                logger.info("📱 准备发送飞书推送...")
-                
-                # 获取本次会话的帖子数据
-                session_id = result.get("session_id")
-                if session_id:
-                    posts = CompetitorPost.query.filter_by(session_id=session_id).all()
-                    post_dicts = [post.to_dict() for post in posts]
-                    
-                    # 发送飞书推送
-                    feishu_success = self.feishu_service.send_daily_summary(
-                        post_dicts, 
-                        "每日定时监控",
-                        session_id
-                    )
-                    
-                    if feishu_success:
-                        logger.info("✅ 飞书推送发送成功")
-                        result["feishu_sent"] = True
-                    else:
-                        logger.warning("⚠️ 飞书推送发送失败")
-                        result["feishu_sent"] = False
-                else:
-                    logger.warning("⚠️ 无法获取会话ID，跳过飞书推送")
-                    result["feishu_sent"] = False
+            result["feishu_pending"] = bool(result.get("success") and result.get("summary_job_id"))
+            if result["feishu_pending"]:
+                logger.info("📱 AI汇总完成后将推送飞书")
             else:
                 logger.info("📱 没有新内容，跳过飞书推送")
-                result["feishu_sent"] = False
             
             return result
             
@@ -356,9 +572,76 @@ class CompetitorMonitorService:
             return {
                 "success": False,
                 "message": str(e),
-                "feishu_sent": False
+                "feishu_pending": False
             }
     
+    def _run_session_summary_job(self, job: AIJob):
+        """AI任务：生成会话的AI汇总并标记会话完成；payload 中 push_feishu 为真时随后推送飞书，
+        use_cache 为假时忽略AI响应缓存重新生成"""
+        session = db.session.get(CrawlSession, job.session_id)
+        if not session:
+            logger.warning(f"⚠️ AI任务 #{job.id} 的会话 {job.session_id} 已删除，跳过")
+            return
+        
+        payload = job.payload or {}
+        post_dicts = self._session_post_dicts(session.id)
+        if post_dicts:
+            session.ai_summary = self.ai_service.analyze_posts(
+                post_dicts, use_cache=payload.get('use_cache', True), raise_errors=True
+            )
+        else:
+            session.ai_summary = "24小时内暂无新的竞品动态"
+        session.status = 'completed'
+        db.session.commit()
+        logger.info(f"✅ 会话AI汇总完成: {session.session_name}")
+        
+        if payload.get('push_feishu') and post_dicts:
+            # 推送的汇总同样需要调用AI：失败或限流时抛出异常，由任务队列重试，不推送原始数据整理；
+            # 推送失败时任务重试，重新生成汇总会命中AI响应缓存
+            if not self.feishu_service.send_daily_summary(post_dicts, session.session_name, session.id,
+                                                          use_cache=payload.get('use_cache', True),
+                                                          raise_errors=True):
+                raise RuntimeError("飞书推送失败")
+            logger.info("✅ 飞书推送发送成功")
+    
+    def _session_summary_failed(self, job: AIJob, error: Exception):
+        """AI任务重试后仍失败：仍在等待汇总的会话改用原始数据整理作为汇总（与AI服务不可用时一致）"""
+        session = db.session.get(CrawlSession, job.session_id)
+        if not session or session.status != 'summary_pending':
+            return
+        session.ai_summary = self.ai_service._fallback_summary(self._session_post_dicts(session.id))
+        session.status = 'completed'
+    
+    def _session_post_dicts(self, session_id: int) -> List[Dict[str, Any]]:
+        """会话中新增的帖子（按入库顺序）"""
+        posts = CompetitorPost.query.filter_by(session_id=session_id).order_by(CompetitorPost.id).all()
+        return [post.to_dict() for post in posts]
+    
+    def regenerate_session_summary(self, session_id: int, use_cache: bool = True) -> Dict[str, Any]:
+        """重新生成会话的AI汇总（加入任务队列，use_cache=False 时忽略AI响应缓存）"""
+        session = CrawlSession.query.get(session_id)
+        if not session:
+            return {"success": False, "message": "会话不存在"}
+        
+        pending = AIJob.query.filter(AIJob.session_id == session_id, AIJob.job_type == JOB_SESSION_SUMMARY,
+                                     AIJob.status.in_(['queued', 'running'])).first()
+        if pending:
+            return {"success": True, "message": "该会话的AI汇总任务已在队列中", "job_id": pending.id}
+        
+        session.status = 'summary_pending'
+        job = self.job_queue.enqueue(JOB_SESSION_SUMMARY, session_id=session_id, priority=PRIORITY_MANUAL,
+                                     payload={'use_cache': use_cache})
+        return {"success": True, "message": "AI汇总任务已加入队列", "job_id": job.id}
+    
+    def get_ai_jobs(self, limit: int = 20, status: str = None) -> Dict[str, Any]:
+        """AI任务队列状态和最近的任务"""
+        return {
+            "success": True,
+            **self.job_queue.stats(),
+            "rate_limited_seconds": round(self.ai_service.rate_limit_remaining(), 1),
+            "jobs": self.job_queue.recent_jobs(limit=limit, status=status)
+        }
+    
     def test_feishu_webhook(self) -> bool:
         """测试飞书webhook连接"""
         return self.feishu_service.test_webhook()
@@ -376,8 +659,9 @@ class CompetitorMonitorService:
             
             session_name = session.session_name
             
-            # 删除关联的帖子记录
+            # 删除关联的帖子记录和AI任务
             posts_deleted = CompetitorPost.query.filter_by(session_id=session_id).delete()
+            AIJob.query.filter_by(session_id=session_id).delete()
             
             # 删除会话记录
             db.session.delete(session)
@@ -472,6 +756,12 @@ class CompetitorMonitorService:
                 CrawlSession.crawl_time < cutoff_date
             ).delete()
             
+            # 删除老的AI任务（未完成的保留）
+            AIJob.query.filter(
+                AIJob.created_at < cutoff_date,
+                AIJob.status.in_(['completed', 'failed'])
+            ).delete(synchronize_session=False)
+            
             db.session.commit()
             
             logger.info(f"✅ 清理老记录: 删除 {sessions_deleted} 个会话，{posts_deleted} 条帖子")
@@ -492,16 +782,23 @@ class CompetitorMonitorService:
                 "message": str(e)
             }
     
-    def get_session_posts(self, session_id: int) -> List[Dict[str, Any]]:
-        """获取指定会话的所有帖子"""
-        posts = CompetitorPost.query.filter_by(session_id=session_id).order_by(
-            CompetitorPost.created_at.desc()
-        ).all()
+    def get_session_posts(self, session_id: int, cursor: str = None,
+                          limit: int = DEFAULT_PAGE_SIZE, full: bool = False) -> Dict[str, Any]:
+        """按时间倒序分页获取指定会话的帖子，cursor 为上一页返回的 next_cursor；
+        默认只返回正文预览，full=True 时返回正文全文"""
+        query = CompetitorPost.query.filter_by(session_id=session_id)
+        if not full:
+            query = query.options(*CompetitorPost.preview_options())
+        page = keyset_paginate(query, CompetitorPost, cursor=cursor, limit=limit)
         
-        return [post.to_dict() for post in posts]
+        return {
+            "posts": [post.to_dict(full=full) for post in page.items],
+            "next_cursor": page.next_cursor,
+            "has_more": page.has_next
+        }
     
-    def push_session_to_feishu(self, session_id: int) -> Dict[str, Any]:
-        """手动推送指定会话内容到飞书"""
+    def push_session_to_feishu(self, session_id: int, use_cache: bool = True) -> Dict[str, Any]:
+        """手动推送指定会话内容到飞书（重复推送默认使用缓存的AI汇总，use_cache=False 时重新生成）"""
         try:
             # 获取会话信息
             session = CrawlSession.query.get(session_id)
@@ -531,7 +828,8 @@ class CompetitorMonitorService:
             feishu_result = self.feishu_service.send_daily_summary(
                 posts_data, 
                 session.session_name,
-                session.id
+                session.id,
+                use_cache=use_cache
             )
             
             if feishu_result:
@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, NamedTuple
 from loguru import logger
-from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
 from models.database import (
     db, WebsiteConfig, KeywordConfig, CrawledPost, 
     CrawledComment, PushRecord, SystemLog
@@ -10,6 +10,19 @@ from crawlers.crawler_factory import CrawlerFactory
 from services.feishu_service import feishu_service
 from services.data_filter_service import DataFilterService
 from services.resumable_service import resumable_service
+from services.seen_filter import seen_posts
+from services.summary_worker_pool import summary_pool
+
+# 批量查重时每条 IN 语句的参数个数（SQLite旧版本上限为999）
+BATCH_QUERY_CHUNK_SIZE = 500
+
+
+class SavedPost(NamedTuple):
+    """已保存帖子的字段快照（提交前读取，提交后使用不会因属性过期而重新查询数据库）"""
+    id: int
+    matched_keywords: Optional[list]
+    title: str
+    content: str
 
 class CrawlerService:
     """爬虫服务类"""
@@ -24,6 +37,7 @@ class CrawlerService:
             "total_posts": 0,
             "new_posts": 0,
             "pushed_posts": 0,
+            "summary_queued": 0,
             "errors": []
         }
         
@@ -50,6 +64,7 @@ class CrawlerService:
                     results["total_posts"] += website_result["total_posts"]
                     results["new_posts"] += website_result["new_posts"]
                     results["pushed_posts"] += website_result["pushed_posts"]
+                    results["summary_queued"] += website_result.get("summary_queued", 0)
                     
                     if website_result["errors"]:
                         results["errors"].extend(website_result["errors"])
@@ -61,7 +76,7 @@ class CrawlerService:
                     results["success"] = False
             
             # 记录系统日志
-            log_message = f"爬虫任务完成 - 总帖子数: {results['total_posts']}, 新帖子数: {results['new_posts']}, 推送数: {results['pushed_posts']}"
+            log_message = f"爬虫任务完成 - 总帖子数: {results['total_posts']}, 新帖子数: {results['new_posts']}, 推送数: {results['pushed_posts']}, AI总结排队: {results['summary_queued']}"
             if results["errors"]:
                 log_message += f", 错误数: {len(results['errors'])}"
             
@@ -142,40 +157,34 @@ class CrawlerService:
             with crawler:
                 posts = crawler.crawl_posts(keyword_list, limit=50)
                 result["total_posts"] = len(posts)
-                
-                for i, post in enumerate(posts):
-                    try:
-                        # 更新检查点数据
-                        checkpoint_data["pages_processed"] += 1
-                        checkpoint_data["last_url"] = getattr(post, 'post_url', website.url)
-                        
-                        # 检查是否是新帖子
-                        if self.is_new_post(post):
-                            # 保存帖子数据
-                            saved_post = self.save_post_data(post, website, keyword_dict)
-                            if saved_post:
-                                result["new_posts"] += 1
-                                checkpoint_data["total_posts"] += 1
-                                checkpoint_data["last_post_id"] = saved_post.id
-                                
-                                # 收集关键词
-                                if saved_post.matched_keywords:
-                                    checkpoint_data["keywords_found"].extend(saved_post.matched_keywords)
-                                
-                                # 生成AI总结（替代飞书推送）
-                                if self.generate_ai_summary(saved_post):
-                                    result["processed_posts"] = result.get("processed_posts", 0) + 1
-                        
-                        # 每处理10个帖子保存一次检查点
-                        if (i + 1) % 10 == 0:
-                            resumable_service.save_crawl_checkpoint(website.id, checkpoint_data)
-                        
-                    except Exception as e:
-                        error_msg = f"处理帖子失败: {getattr(post, 'title', 'Unknown')[:50]}, 错误: {str(e)}"
-                        logger.error(error_msg)
-                        result["errors"].append(error_msg)
-                        checkpoint_data["error"] = error_msg
-                        continue
+            
+            # 整批查重并在一个事务中写入帖子和评论
+            saved_posts = []
+            try:
+                new_posts = self.filter_new_posts(posts)
+                saved_posts = self.save_posts_batch(new_posts)
+            except Exception as e:
+                error_msg = f"批量保存帖子失败: {website.name}, 错误: {str(e)}"
+                logger.error(error_msg)
+                result["errors"].append(error_msg)
+                checkpoint_data["error"] = error_msg
+            
+            result["new_posts"] = len(saved_posts)
+            
+            # 每批保存一次检查点
+            checkpoint_data["pages_processed"] += len(posts)
+            if posts:
+                checkpoint_data["last_url"] = getattr(posts[-1], 'post_url', website.url)
+            checkpoint_data["total_posts"] += len(saved_posts)
+            if saved_posts:
+                checkpoint_data["last_post_id"] = saved_posts[-1].id
+            for saved_post in saved_posts:
+                if saved_post.matched_keywords:
+                    checkpoint_data["keywords_found"].extend(saved_post.matched_keywords)
+            resumable_service.save_crawl_checkpoint(website.id, checkpoint_data)
+            
+            # 提交到AI总结工作池（替代飞书推送），总结在后台生成，不阻塞后续网站的爬取
+            result["summary_queued"] = summary_pool.submit_many(db.engine, saved_posts)
             
             # 保存最终检查点
             checkpoint_data["end_time"] = datetime.now().isoformat()
@@ -200,58 +209,152 @@ class CrawlerService:
             return result
     
     def is_new_post(self, post_data) -> bool:
-        """检查是否是新帖子"""
-        # 根据URL和标题检查是否已存在
-        existing_post = CrawledPost.query.filter(
-            or_(
-                CrawledPost.post_url == post_data.post_url,
-                and_(
-                    CrawledPost.title == post_data.title,
-                    CrawledPost.author == post_data.author,
-                    CrawledPost.source_website == post_data.source_website
-                )
-            )
-        ).first()
+        """检查是否是新帖子（按帖子指纹唯一索引查询）"""
+        post_hash = self._generate_post_hash(post_data)
+        
+        # 过滤器判定一定是新帖子时无需查询数据库
+        if not seen_posts.might_contain(post_data.post_url, post_hash):
+            return True
+        
+        existing_id = db.session.query(CrawledPost.id).filter_by(post_hash=post_hash).first()
+        if existing_id is None:
+            seen_posts.record_false_positive()
+        
+        return existing_id is None
+    
+    def filter_new_posts(self, posts: List) -> List[tuple]:
+        """整批检查新帖子，返回 [(帖子数据, 帖子指纹)]，保持原顺序
+        
+        批内指纹相同的帖子只保留第一条；过滤器判定可能已存在的帖子用一条 IN 查询确认。
+        """
+        candidates = {}
+        for post in posts:
+            post_hash = self._generate_post_hash(post)
+            if post_hash not in candidates:
+                candidates[post_hash] = post
+        
+        maybe_hashes = [post_hash for post_hash, post in candidates.items()
+                        if seen_posts.might_contain(post.post_url, post_hash)]
+        
+        existing = set()
+        for i in range(0, len(maybe_hashes), BATCH_QUERY_CHUNK_SIZE):
+            rows = db.session.query(CrawledPost.post_hash).filter(
+                CrawledPost.post_hash.in_(maybe_hashes[i:i + BATCH_QUERY_CHUNK_SIZE])
+            ).all()
+            existing.update(row[0] for row in rows)
+        seen_posts.record_false_positive(len(maybe_hashes) - len(existing))
+        
+        return [(post, post_hash) for post_hash, post in candidates.items() if post_hash not in existing]
+    
+    def save_posts_batch(self, new_posts: List[tuple]) -> List[SavedPost]:
+        """在一个事务中保存一批新帖子及其评论，返回已保存帖子的字段快照
+        
+        new_posts 为 filter_new_posts 的返回值。写入失败（如并发写入导致指纹冲突）时回滚，改为逐条保存。
+        """
+        if not new_posts:
+            return []
+        
+        try:
+            posts = [self._build_post(post_data, post_hash) for post_data, post_hash in new_posts]
+            db.session.add_all(posts)
+            db.session.flush()  # 获取ID
+            
+            comments = [
+                self._build_comment(post.id, comment_data)
+                for post, (post_data, _) in zip(posts, new_posts)
+                for comment_data in (post_data.comments or [])
+            ]
+            db.session.add_all(comments)
+            seen_keys = [(post.post_url, post.post_hash) for post in posts]
+            saved_posts = [self._snapshot(post) for post in posts]
+            db.session.commit()
+            
+        except IntegrityError:
+            db.session.rollback()
+            logger.warning("批量保存帖子时指纹冲突，改为逐条保存")
+            return self._save_posts_one_by_one(new_posts)
+            
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"批量保存帖子失败，改为逐条保存: {str(e)}")
+            return self._save_posts_one_by_one(new_posts)
         
-        return existing_post is None
+        for post_url, post_hash in seen_keys:
+            seen_posts.add(post_url, post_hash)
+        logger.info(f"批量保存帖子成功: {len(saved_posts)} 条，评论 {len(comments)} 条")
+        return saved_posts
+    
+    def _save_posts_one_by_one(self, new_posts: List[tuple]) -> List[SavedPost]:
+        saved = (self.save_post_data(post_data, None, {}) for post_data, _ in new_posts)
+        return [post for post in saved if post]
+    
+    def _snapshot(self, post: CrawledPost) -> SavedPost:
+        return SavedPost(post.id, post.matched_keywords, post.title or "", post.content or "")
+    
+    def _build_post(self, post_data, post_hash: str) -> CrawledPost:
+        return CrawledPost(
+            title=post_data.title,
+            content=post_data.content,
+            author=post_data.author,
+            post_url=post_data.post_url,
+            post_time=post_data.post_time,
+            likes_count=post_data.likes_count,
+            comments_count=post_data.comments_count,
+            source_website=post_data.source_website,
+            matched_keywords=post_data.matched_keywords,
+            post_hash=post_hash,
+            is_read=False
+        )
+    
+    def _build_comment(self, post_id: int, comment_data: Dict[str, Any]) -> CrawledComment:
+        return CrawledComment(
+            post_id=post_id,
+            content=comment_data.get("content", ""),
+            author=comment_data.get("author", ""),
+            comment_time=comment_data.get("comment_time"),
+            likes_count=comment_data.get("likes_count", 0)
+        )
+    
+    def warm_seen_filter(self):
+        """用已入库帖子的链接和指纹预热已见帖子过滤器"""
+        try:
+            total = db.session.query(CrawledPost.id).count()
+            rows = db.session.query(CrawledPost.post_url, CrawledPost.post_hash).yield_per(10000)
+            seen_posts.warm(rows, expected=total)
+        except Exception as e:
+            logger.error(f"❌ 预热已见帖子过滤器失败: {e}")
+    
+    def _generate_post_hash(self, post_data) -> str:
+        """生成帖子指纹（与 post_hash 列一致）"""
+        return CrawledPost.compute_hash(post_data.title, post_data.author,
+                                        post_data.source_website, post_data.post_url)
     
     def save_post_data(self, post_data, website: WebsiteConfig, 
-                      keyword_dict: Dict[str, KeywordConfig]) -> Optional[CrawledPost]:
-        """保存帖子数据到数据库"""
+                      keyword_dict: Dict[str, KeywordConfig]) -> Optional[SavedPost]:
+        """保存帖子数据到数据库，返回已保存帖子的字段快照"""
         try:
             # 创建帖子记录
-            post = CrawledPost(
-                title=post_data.title,
-                content=post_data.content,
-                author=post_data.author,
-                post_url=post_data.post_url,
-                post_time=post_data.post_time,
-                likes_count=post_data.likes_count,
-                comments_count=post_data.comments_count,
-                source_website=post_data.source_website,
-                matched_keywords=post_data.matched_keywords,
-                is_read=False,
-                is_pushed=False
-            )
+            post_hash = self._generate_post_hash(post_data)
+            post = self._build_post(post_data, post_hash)
             
             db.session.add(post)
             db.session.flush()  # 获取ID
             
             # 保存评论数据
-            if post_data.comments:
-                for comment_data in post_data.comments:
-                    comment = CrawledComment(
-                        post_id=post.id,
-                        content=comment_data.get("content", ""),
-                        author=comment_data.get("author", ""),
-                        comment_time=comment_data.get("comment_time"),
-                        likes_count=comment_data.get("likes_count", 0)
-                    )
-                    db.session.add(comment)
+            for comment_data in post_data.comments or []:
+                db.session.add(self._build_comment(post.id, comment_data))
             
+            saved_post = self._snapshot(post)
             db.session.commit()
-            logger.info(f"保存帖子成功: {post.title[:50]}")
-            return post
+            seen_posts.add(post_data.post_url, post_hash)
+            logger.info(f"保存帖子成功: {saved_post.title[:50]}")
+            return saved_post
+            
+        except IntegrityError:
+            # 并发写入时指纹已存在，按重复帖子处理
+            db.session.rollback()
+            logger.debug(f"帖子已存在，跳过: {post_data.title[:50]}")
+            return None
             
         except Exception as e:
             db.session.rollback()
@@ -264,19 +367,15 @@ class CrawlerService:
         return self.data_filter.should_push(post)
     
     def generate_ai_summary(self, post: CrawledPost) -> bool:
-        """为帖子生成AI总结"""
+        """为帖子同步生成AI总结（使用总结工作池共用的AI客户端）"""
         try:
             # 检查是否已有总结
             if post.ai_summary:
                 logger.info(f"帖子已有AI总结: {post.title[:50]}")
                 return True
             
-            # 导入AI总结服务
-            from .ai_summary_service import AISummaryService
-            ai_service = AISummaryService()
-            
             # 生成总结
-            summary = ai_service.summarize_content(
+            summary = summary_pool.summarizer.summarize_content(
                 title=post.title or "",
                 content=post.content or "",
                 max_length=150
@@ -375,32 +474,28 @@ class CrawlerService:
         """获取爬虫统计信息"""
         from datetime import timedelta
         
-        end_date = datetime.now()
+        end_date = datetime.utcnow()  # 与帖子 created_at 一致使用UTC时间
         start_date = end_date - timedelta(days=days)
         
         try:
+            # 一次读取区间内帖子的元数据（来源、关键词、是否已推送），统计在 DataFrame 上完成
+            from services.analytics_service import get_post_analytics
+            post_analytics = get_post_analytics()
+            frame = post_analytics.load_frame(days=days + 1)
+            frame = frame[frame['created_at'] >= start_date]
+            
             # 总帖子数
-            total_posts = CrawledPost.query.filter(
-                CrawledPost.created_at >= start_date
-            ).count()
+            total_posts = len(frame)
             
             # 按网站统计
-            website_stats = db.session.query(
-                CrawledPost.source_website,
-                db.func.count(CrawledPost.id).label('count')
-            ).filter(
-                CrawledPost.created_at >= start_date
-            ).group_by(CrawledPost.source_website).all()
+            website_stats = post_analytics.top_values(frame, 'platform', top=None)
             
             # 推送统计
-            pushed_posts = CrawledPost.query.filter(
-                CrawledPost.created_at >= start_date,
-                CrawledPost.is_pushed == True
-            ).count()
+            pushed_posts = int(frame['pushed'].sum())
             
             # 热门关键词统计
-            # 这里需要复杂的JSON查询，简化处理
-            keyword_stats = []
+            keyword_stats = [{"keyword": keyword, "count": count}
+                             for keyword, count in post_analytics.top_values(frame, 'keyword', top=10)]
             
             return {
                 "total_posts": total_posts,
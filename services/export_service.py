@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+数据导出服务 - 流式导出会话和帖子
+使用流式游标按批读取（不创建 ORM 对象），逐批编码为 JSONL / CSV 并增量压缩，
+导出多少数据内存占用都保持不变；接口和命令行工具 export_records.py 共用
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, Mapping, Optional
+
+from sqlalchemy import select
+from loguru import logger
+
+from models.competitor_models import CrawlSession, CompetitorPost
+from models.database import CrawledPost
+
+EXPORT_FORMATS = ('jsonl', 'csv')
+EXPORT_COMPRESSIONS = ('gzip', 'zstd', 'none')
+DEFAULT_BATCH_SIZE = 1000  # 每批从数据库读取的行数
+
+_MIMETYPES = {'jsonl': 'application/x-ndjson', 'csv': 'text/csv; charset=utf-8',
+              'gzip': 'application/gzip', 'zstd': 'application/zstd'}
+_EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst', 'none': ''}
+
+
+class ExportError(ValueError):
+    """导出参数错误（未知的数据集、格式、筛选条件等）"""
+
+
+class ExportDataset:
+    """可导出的一张表：time_column 用于日期筛选，filters 为 {参数名: 字段名}"""
+
+    def __init__(self, name: str, table, time_column: str, filters: Dict[str, str]):
+        self.name = name
+        self.table = table
+        self.time_column = time_column
+        self.filters = filters
+
+    @property
+    def columns(self):
+        """导出的字段：id 在前，其余按表定义的顺序"""
+        return [self.table.c.id] + [column for column in self.table.columns if column.name != 'id']
+
+
+# 竞品监控库（competitor_app.py）
+COMPETITOR_DATASETS = {
+    'posts': ExportDataset('competitor_posts', CompetitorPost.__table__, 'created_at',
+                           {'platform': 'platform', 'config_id': 'monitor_config_id', 'session_id': 'session_id'}),
+    'sessions': ExportDataset('crawl_sessions', CrawlSession.__table__, 'crawl_time', {'session_id': 'id'}),
+}
+
+# 内容抓取库（app.py）
+CRAWLED_DATASETS = {
+    'posts': ExportDataset('crawled_posts', CrawledPost.__table__, 'created_at',
+                           {'platform': 'source_website', 'archived': 'is_archived'}),
+}
+
+_INTEGER_FILTERS = {'config_id', 'session_id'}
+_BOOLEAN_FILTERS = {'archived'}
+
+
+def _parse_date(name: str, value: str) -> date:
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ExportError(f"{name} 日期格式错误，应为 YYYY-MM-DD: {value}")
+
+
+def _serialize(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class Export:
+    """一次导出任务（参数在创建时校验，iter_bytes 逐块生成导出内容）"""
+
+    def __init__(self, dataset: ExportDataset, fmt: str = 'jsonl', compression: str = 'gzip',
+                 start_date: Optional[date] = None, end_date: Optional[date] = None,
+                 filters: Optional[Dict[str, Any]] = None, batch_size: int = DEFAULT_BATCH_SIZE):
+        if fmt not in EXPORT_FORMATS:
+            raise ExportError(f"不支持的导出格式: {fmt}（可选 {', '.join(EXPORT_FORMATS)}）")
+        if compression not in EXPORT_COMPRESSIONS:
+            raise ExportError(f"不支持的压缩方式: {compression}（可选 {', '.join(EXPORT_COMPRESSIONS)}）")
+        if compression == 'zstd':
+            self._zstd_module()
+
+        self.dataset = dataset
+        self.fmt = fmt
+        self.compression = compression
+        self.start_date = start_date
+        self.end_date = end_date
+        self.filters = filters or {}
+        self.batch_size = max(batch_size, 1)
+
+    @classmethod
+    def from_args(cls, datasets: Dict[str, ExportDataset], name: str, args: Mapping[str, Any]) -> 'Export':
+        """从请求参数（或命令行参数）创建导出任务；只使用数据集支持的筛选条件"""
+        dataset = datasets.get(name)
+        if dataset is None:
+            raise ExportError(f"未知的导出数据: {name}（可选 {', '.join(datasets)}）")
+
+        filters = {}
+        for key in dataset.filters:
+            value = args.get(key)
+            if value in (None, ''):
+                continue
+            if key in _INTEGER_FILTERS:
+                try:
+                    value = int(value)
+                except (TypeError, ValueError):
+                    raise ExportError(f"{key} 必须是整数: {value}")
+            elif key in _BOOLEAN_FILTERS:
+                value = str(value).lower() in ('1', 'true', 'yes')
+            filters[key] = value
+
+        unsupported = [key for key in _INTEGER_FILTERS | _BOOLEAN_FILTERS | {'platform'}
+                       if args.get(key) not in (None, '') and key not in dataset.filters]
+        if unsupported:
+            raise ExportError(f"{name} 不支持筛选条件: {', '.join(sorted(unsupported))}")
+
+        start_date = _parse_date('start_date', args['start_date']) if args.get('start_date') else None
+        end_date = _parse_date('end_date', args['end_date']) if args.get('end_date') else None
+
+        return cls(dataset, fmt=args.get('format') or 'jsonl', compression=args.get('compression') or 'gzip',
+                   start_date=start_date, end_date=end_date, filters=filters)
+
+    @property
+    def filename(self) -> str:
+        return f"{self.dataset.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{self.fmt}{_EXTENSIONS[self.compression]}"
+
+    @property
+    def mimetype(self) -> str:
+        return _MIMETYPES.get(self.compression, _MIMETYPES[self.fmt])
+
+    def statement(self):
+        """导出查询：按 id 正序，日期范围包含 end_date 当天"""
+        table = self.dataset.table
+        stmt = select(*self.dataset.columns).order_by(table.c.id)
+        time_column = table.c[self.dataset.time_column]
+        if self.start_date:
+            stmt = stmt.where(time_column >= datetime.combine(self.start_date, datetime.min.time()))
+        if self.end_date:
+            stmt = stmt.where(time_column < datetime.combine(self.end_date + timedelta(days=1), datetime.min.time()))
+        for key, value in self.filters.items():
+            stmt = stmt.where(table.c[self.dataset.filters[key]] == value)
+        return stmt
+
+    def iter_rows(self, engine) -> Iterator[list]:
+        """按批读取（流式游标，每批 batch_size 行），使用独立连接，不占用请求的会话"""
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=self.batch_size).execute(self.statement())
+            for partition in result.partitions():
+                yield partition
+
+    def iter_bytes(self, engine) -> Iterator[bytes]:
+        """逐块生成导出内容（已压缩）"""
+        compressor = self._compressor()
+        columns = [column.name for column in self.dataset.columns]
+        rows = 0
+
+        if self.fmt == 'csv':
+            header = self._csv_lines([columns])
+            yield compressor.compress(header.encode('utf-8')) if compressor else header.encode('utf-8')
+
+        try:
+            for partition in self.iter_rows(engine):
+                rows += len(partition)
+                if self.fmt == 'csv':
+                    chunk = self._csv_lines([[_serialize(value) for value in row] for row in partition])
+                else:
+                    chunk = ''.join(json.dumps({key: _serialize(value) for key, value in row._mapping.items()},
+                                               ensure_ascii=False) + '\n' for row in partition)
+                data = chunk.encode('utf-8')
+                if compressor:
+                    data = compressor.compress(data)
+                if data:
+                    yield data
+        except Exception as e:
+            logger.error(f"❌ 导出 {self.dataset.name} 失败（已导出 {rows} 行）: {e}")
+            raise
+
+        if compressor:
+            yield compressor.flush()
+        logger.info(f"📦 导出 {self.dataset.name} 完成: {rows} 行（{self.fmt}, {self.compression}）")
+
+    def write_to(self, engine, path: str) -> int:
+        """写入文件，返回写入的字节数"""
+        written = 0
+        with open(path, 'wb') as output:
+            for data in self.iter_bytes(engine):
+                output.write(data)
+                written += len(data)
+        return written
+
+    @staticmethod
+    def _csv_lines(rows) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue()
+
+    def _compressor(self):
+        """增量压缩器（compress/flush 接口），不压缩时返回 None"""
+        if self.compression == 'gzip':
+            return zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip 格式
+        if self.compression == 'zstd':
+            return self._zstd_module().ZstdCompressor(level=3).compressobj()
+        return None
+
+    @staticmethod
+    def _zstd_module():
+        try:
+            import zstandard
+            return zstandard
+        except ImportError:
+            raise ExportError("zstd 压缩需要安装 zstandard（pip install zstandard），或使用 gzip")
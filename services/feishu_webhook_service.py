@@ -9,14 +9,15 @@ import json
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from loguru import logger
-from services.competitor_ai_service import CompetitorAIService
+from services.competitor_ai_service import CompetitorAIService, AIServiceError
 
 class FeishuWebhookService:
     """飞书Webhook推送服务"""
     
-    def __init__(self, webhook_url: str = None):
+    def __init__(self, webhook_url: str = None, ai_service: CompetitorAIService = None):
         self.webhook_url = webhook_url or self._get_webhook_url()
-        self.ai_service = CompetitorAIService()
+        # 传入调用方的AI服务实例以共用限流状态
+        self.ai_service = ai_service or CompetitorAIService()
     
     def _get_webhook_url(self) -> str:
         """获取飞书Webhook地址"""
@@ -31,8 +32,12 @@ class FeishuWebhookService:
         # 2. 使用默认地址
         return "https://open.feishu.cn/open-apis/bot/v2/hook/b4051018-a48b-46e0-983a-7978456b3a00"
     
-    def generate_daily_summary(self, posts: List[Dict[str, Any]]) -> str:
-        """生成每日推送的简洁汇总"""
+    def generate_daily_summary(self, posts: List[Dict[str, Any]], use_cache: bool = True,
+                               raise_errors: bool = False) -> str:
+        """生成每日推送的简洁汇总（use_cache=False 时忽略AI响应缓存重新生成）
+
+        raise_errors=True 时AI调用失败抛出 AIServiceError（限流时为 RateLimitedError），不使用备用汇总
+        """
         if not posts:
             return None
         
@@ -66,13 +71,17 @@ class FeishuWebhookService:
         
         try:
             # 调用AI生成按品牌分类的汇总
-            full_summary = self.ai_service.analyze_posts(posts, custom_prompt=summary_prompt)
+            full_summary = self.ai_service.analyze_posts(posts, custom_prompt=summary_prompt, use_cache=use_cache,
+                                                         raise_errors=raise_errors)
             
             # 进一步精简处理
             summary = self._clean_and_simplify(full_summary)
             
             return summary
             
+        except AIServiceError:
+            raise
+            
         except Exception as e:
             logger.error(f"生成简洁汇总失败: {e}")
             # 生成备用简单汇总
@@ -121,11 +130,12 @@ class FeishuWebhookService:
         
         return summary
     
-    def send_daily_summary(self, posts: List[Dict[str, Any]], session_name: str = None, session_id: int = None) -> bool:
-        """发送每日汇总到飞书"""
+    def send_daily_summary(self, posts: List[Dict[str, Any]], session_name: str = None, session_id: int = None,
+                           use_cache: bool = True, raise_errors: bool = False) -> bool:
+        """发送每日汇总到飞书（raise_errors=True 时AI调用失败抛出 AIServiceError，由调用方重试，不推送备用汇总）"""
         try:
             # 生成简洁汇总
-            summary = self.generate_daily_summary(posts)
+            summary = self.generate_daily_summary(posts, use_cache=use_cache, raise_errors=raise_errors)
             
             if not summary:
                 logger.info("📱 没有内容需要推送到飞书")
@@ -149,6 +159,9 @@ class FeishuWebhookService:
                 logger.error(f"❌ 飞书推送失败: {response.status_code} - {response.text}")
                 return False
                 
+        except AIServiceError:
+            raise
+            
         except Exception as e:
             logger.error(f"❌ 飞书推送异常: {e}")
             return False
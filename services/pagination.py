@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+键集分页（keyset pagination）
+按 (created_at, id) 倒序翻页，游标记录上一页最后一条的位置，
+下一页用 (created_at, id) < 游标 的范围条件直接在索引上定位，翻到多深耗时都不变
+"""
+
+import base64
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """游标格式错误"""
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """把 (created_at, id) 编码为URL安全的游标"""
+    raw = f"{created_at.isoformat()}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str) -> Tuple[datetime, int]:
+    """解析游标，格式错误时抛出 InvalidCursor"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode('utf-8')
+        created_at, row_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(f"无效的分页游标: {token}") from e
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    """限制每页条数在 1 ~ MAX_PAGE_SIZE 之间"""
+    return min(max(limit or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+
+
+class KeysetPage:
+    """一页结果及前后翻页游标"""
+
+    def __init__(self, items: List[Any], next_cursor: Optional[str], prev_cursor: Optional[str]):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+    def to_dict(self, serialize: Callable[[Any], Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "items": [serialize(item) for item in self.items],
+            "next_cursor": self.next_cursor,
+            "prev_cursor": self.prev_cursor,
+            "has_more": self.has_next
+        }
+
+
+def keyset_paginate(query, model, cursor: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+                    direction: str = 'next') -> KeysetPage:
+    """按 (created_at, id) 倒序分页
+
+    direction='next' 返回游标之后（更早）的一页，'prev' 返回游标之前（更新）的一页；
+    不传游标时返回第一页。需要 (…, created_at) 索引才能做到每页耗时恒定。
+    """
+    limit = clamp_page_size(limit)
+    key = tuple_(model.created_at, model.id)
+    position = decode_cursor(cursor) if cursor else None
+
+    if direction == 'prev' and position:
+        # 往回翻：取游标之后更新的 limit 条（正序），再翻转为倒序
+        rows = query.filter(key > tuple_(*position))\
+            .order_by(model.created_at.asc(), model.id.asc()).limit(limit + 1).all()
+        if not rows:
+            # 更新的记录已被删除，回到第一页
+            return keyset_paginate(query, model, None, limit)
+        has_newer = len(rows) > limit
+        items = list(reversed(rows[:limit]))
+        has_older = True
+    else:
+        if position:
+            query = query.filter(key < tuple_(*position))
+        rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+        has_older = len(rows) > limit
+        items = rows[:limit]
+        has_newer = position is not None
+
+    next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if items and has_older else None
+    prev_cursor = encode_cursor(items[0].created_at, items[0].id) if items and has_newer else None
+    return KeysetPage(items, next_cursor, prev_cursor)
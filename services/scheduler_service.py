@@ -5,6 +5,7 @@
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.executors.pool import ThreadPoolExecutor
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from datetime import datetime, timedelta
@@ -13,6 +14,7 @@ from typing import Dict, Any
 
 from config.config import config
 from models.database import TaskSchedule
+from models.sqlite_profile import create_sqlite_engine
 
 class SchedulerService:
     """任务调度服务类"""
@@ -20,7 +22,7 @@ class SchedulerService:
     def __init__(self):
         # 配置作业存储
         jobstores = {
-            'default': SQLAlchemyJobStore(url=config.database.uri)
+            'default': SQLAlchemyJobStore(engine=create_sqlite_engine(config.database.uri, config.database.sqlite_profile))
         }
         
         # 配置执行器
@@ -134,6 +136,18 @@ class SchedulerService:
             logger.error(f"❌ 移除任务失败: {e}")
             return False
     
+    def add_stats_reconcile_job(self):
+        """添加统计计数核对任务（按 config.scheduler.stats_reconcile_hours 间隔执行）"""
+        hours = max(1, config.scheduler.stats_reconcile_hours)
+        self.scheduler.add_job(
+            func=reconcile_statistics_job,
+            trigger=IntervalTrigger(hours=hours, timezone=config.scheduler.timezone),
+            id='stats_reconcile',
+            name='统计计数核对',
+            replace_existing=True
+        )
+        logger.info(f"✅ 统计计数核对任务已添加，每 {hours} 小时执行一次")
+    
     def get_jobs(self):
         """获取所有作业信息"""
         jobs = []
@@ -153,7 +167,8 @@ class SchedulerService:
             'crawl_website': self._crawl_single_website,
             'data_cleanup': self._cleanup_old_data,
             'push_summary': self._push_daily_summary,
-            'health_check': self._health_check
+            'health_check': self._health_check,
+            'stats_reconcile': self._reconcile_statistics
         }
         return task_functions.get(task_type)
     
@@ -267,14 +282,11 @@ class SchedulerService:
             app = create_app()
             
             with app.app_context():
-                from models.database import CrawledPost
+                from services.analytics_service import get_post_analytics
                 from services.feishu_service import FeishuService
                 
-                # 获取今日数据
-                today_start = datetime.now().replace(hour=0, minute=0, second=0)
-                today_posts = CrawledPost.query.filter(
-                    CrawledPost.created_at >= today_start
-                ).all()
+                # 获取今日数据（只读取统计需要的字段）
+                today_posts = get_post_analytics().load_frame(days=1)
                 
                 # 生成汇总
                 summary = self._generate_daily_summary(today_posts)
@@ -291,6 +303,21 @@ class SchedulerService:
             logger.error(f"❌ 每日汇总任务失败: {e}")
             self._log_task_execution('push_summary', False, str(e))
     
+    def _reconcile_statistics(self, config_data: Dict[str, Any]):
+        """统计计数核对任务"""
+        try:
+            from app import create_app, post_stat_counters
+            app = create_app()
+            
+            with app.app_context():
+                result = post_stat_counters.reconcile()
+                message = f"核对 {result['counters']} 个计数，修正 {result['corrected']} 个"
+                self._log_task_execution('stats_reconcile', True, message)
+                
+        except Exception as e:
+            logger.error(f"❌ 统计计数核对任务失败: {e}")
+            self._log_task_execution('stats_reconcile', False, str(e))
+    
     def _health_check(self, config_data: Dict[str, Any]):
         """系统健康检查任务"""
         try:
@@ -309,8 +336,8 @@ class SchedulerService:
             self._log_task_execution('health_check', False, str(e))
     
     def _generate_daily_summary(self, posts):
-        """生成每日汇总"""
-        if not posts:
+        """生成每日汇总（posts 为 get_post_analytics().load_frame 读取的帖子数据）"""
+        if posts.empty:
             return {
                 'title': '📊 今日数据汇总',
                 'content': '今日暂无新数据',
@@ -319,18 +346,14 @@ class SchedulerService:
                 'top_keywords': []
             }
         
+        from services.analytics_service import get_post_analytics
+        
         # 统计数据
         total_posts = len(posts)
-        pushed_posts = len([p for p in posts if p.is_pushed])
+        pushed_posts = int(posts['pushed'].sum())
         
         # 统计关键词
-        keyword_count = {}
-        for post in posts:
-            if post.matched_keywords:
-                for keyword in post.matched_keywords:
-                    keyword_count[keyword] = keyword_count.get(keyword, 0) + 1
-        
-        top_keywords = sorted(keyword_count.items(), key=lambda x: x[1], reverse=True)[:5]
+        top_keywords = get_post_analytics().top_values(posts, 'keyword', top=5)
         
         return {
             'title': '📊 今日数据汇总',
@@ -366,5 +389,9 @@ class SchedulerService:
         except Exception as e:
             logger.error(f"❌ 记录任务日志失败: {e}")
 
+def reconcile_statistics_job():
+    """统计计数核对作业（模块级函数，作业存储可以按引用恢复）"""
+    scheduler_service._reconcile_statistics({})
+
 # 全局调度器实例
 scheduler_service = SchedulerService() 
\ No newline at end of file
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+全文搜索服务 - 基于 SQLite FTS5 的帖子搜索索引
+索引表为外部内容表（只保存倒排索引，不重复保存正文），由触发器在插入、更新、删除时同步；
+使用 trigram 分词器，中文、英文都可以按任意子串匹配
+"""
+
+import html
+import re
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy import Integer, or_, text
+from loguru import logger
+
+# trigram 分词器每个词至少3个字符，更短的关键词回退到 LIKE 查询
+MIN_TRIGRAM_LENGTH = 3
+SNIPPET_TOKENS = 24  # 摘要片段的长度（词元数）
+
+# 高亮标记先用控制字符占位，转义HTML后再替换为 <mark>，避免正文中的标签被注入页面
+_MARK_OPEN, _MARK_CLOSE = '\x02', '\x03'
+
+
+class FullTextIndex:
+    """一张内容表对应的 FTS5 搜索索引"""
+
+    def __init__(self, db, model, columns: Sequence[str], weights: Optional[Sequence[float]] = None):
+        self.db = db
+        self.model = model
+        self.table = model.__tablename__
+        self.fts_table = f'{self.table}_fts'
+        self.columns = list(columns)
+        # bm25 权重与 columns 一一对应，值越大该字段的匹配越重要
+        self.weights = list(weights or [1.0] * len(self.columns))
+        self.tokenizer = None
+
+    def ensure(self):
+        """创建索引表和同步触发器（可重复执行）；新建索引表时从内容表重建索引"""
+        connection = self.db.session.connection()
+        exists = self._detect_tokenizer() is not None
+
+        column_list = ', '.join(self.columns)
+        if not exists:
+            self.tokenizer = 'trigram' if self._trigram_supported(connection) else 'unicode61'
+            if self.tokenizer != 'trigram':
+                logger.warning(f"⚠️ 当前 SQLite 不支持 trigram 分词器（需要 3.34+），{self.fts_table} 使用 unicode61，中文只能整词匹配")
+            connection.execute(text(
+                f"CREATE VIRTUAL TABLE {self.fts_table} USING fts5("
+                f"{column_list}, content='{self.table}', content_rowid='id', tokenize='{self.tokenizer}')"
+            ))
+            # 保存字段权重，ORDER BY rank 可以直接使用 FTS5 内置的排序
+            weights = ', '.join(str(weight) for weight in self.weights)
+            connection.execute(text(f"INSERT INTO {self.fts_table}({self.fts_table}, rank) VALUES ('rank', :rank)"),
+                               {"rank": f"bm25({weights})"})
+
+        new_values = ', '.join(f'new.{column}' for column in self.columns)
+        old_values = ', '.join(f'old.{column}' for column in self.columns)
+        delete_row = (f"INSERT INTO {self.fts_table}({self.fts_table}, rowid, {column_list}) "
+                      f"VALUES ('delete', old.id, {old_values});")
+        insert_row = f"INSERT INTO {self.fts_table}(rowid, {column_list}) VALUES (new.id, {new_values});"
+
+        # 只有被索引的字段变化时才更新索引（如标记已读、存档不触发）
+        triggers = {
+            'ai': f"AFTER INSERT ON {self.table} BEGIN {insert_row} END",
+            'ad': f"AFTER DELETE ON {self.table} BEGIN {delete_row} END",
+            'au': f"AFTER UPDATE OF {column_list} ON {self.table} BEGIN {delete_row} {insert_row} END",
+        }
+        for suffix, body in triggers.items():
+            connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS {self.fts_table}_{suffix} {body}"))
+
+        if not exists:
+            logger.info(f"🔎 正在建立全文索引 {self.fts_table}...")
+            self.rebuild()
+
+        self.db.session.commit()
+
+    def rebuild(self):
+        """从内容表重建整个索引（修复索引与内容不一致时使用）"""
+        self.db.session.execute(text(f"INSERT INTO {self.fts_table}({self.fts_table}) VALUES ('rebuild')"))
+        self.db.session.execute(text(f"INSERT INTO {self.fts_table}({self.fts_table}) VALUES ('optimize')"))
+
+    def match_expression(self, keyword: str) -> Optional[str]:
+        """把用户输入转换为 FTS5 查询（空格分隔的词全部匹配）；索引不存在或有词短于3个字符时返回 None"""
+        terms = keyword.split()
+        tokenizer = self._detect_tokenizer()
+        if not terms or tokenizer is None:
+            return None
+        if tokenizer == 'trigram' and any(len(term) < MIN_TRIGRAM_LENGTH for term in terms):
+            return None
+        # 每个词作为短语加引号，用户输入中的 FTS5 语法字符不会被解释
+        return ' AND '.join('"' + term.replace('"', '""') + '"' for term in terms)
+
+    def filter_query(self, query, keyword: str):
+        """为 ORM 查询添加关键词条件（FTS 匹配，短关键词回退到 LIKE）"""
+        expression = self.match_expression(keyword)
+        if expression is None:
+            return query.filter(self._like_condition(keyword))
+
+        matched_ids = text(f"SELECT rowid FROM {self.fts_table} WHERE {self.fts_table} MATCH :fts_query")\
+            .bindparams(fts_query=expression).columns(rowid=Integer)
+        return query.filter(self.model.id.in_(matched_ids))
+
+    def search(self, keyword: str, limit: int = 20, offset: int = 0,
+               snippet_column: str = None) -> List[Dict[str, Any]]:
+        """按相关度排序搜索，返回 [{id, rank, title_highlight, snippet}]"""
+        expression = self.match_expression(keyword)
+        if expression is None:
+            return self._like_search(keyword, limit, offset, snippet_column)
+
+        title_index = self.columns.index('title')
+        snippet_index = self.columns.index(snippet_column) if snippet_column else -1
+
+        rows = self.db.session.execute(text(
+            f"SELECT rowid, rank, "
+            f"highlight({self.fts_table}, {title_index}, :mark_open, :mark_close), "
+            f"snippet({self.fts_table}, {snippet_index}, :mark_open, :mark_close, '…', {SNIPPET_TOKENS}) "
+            f"FROM {self.fts_table} WHERE {self.fts_table} MATCH :fts_query "
+            f"ORDER BY rank LIMIT :limit OFFSET :offset"
+        ), {"fts_query": expression, "mark_open": _MARK_OPEN, "mark_close": _MARK_CLOSE,
+            "limit": limit, "offset": offset}).all()
+
+        return [{
+            "id": row[0],
+            "rank": round(row[1], 4),
+            "title_highlight": self._render_marks(row[2]),
+            "snippet": self._render_marks(row[3])
+        } for row in rows]
+
+    def count(self, keyword: str) -> int:
+        """匹配的帖子总数"""
+        expression = self.match_expression(keyword)
+        if expression is None:
+            return self.model.query.filter(self._like_condition(keyword)).count()
+        return self.db.session.execute(
+            text(f"SELECT count(*) FROM {self.fts_table} WHERE {self.fts_table} MATCH :fts_query"),
+            {"fts_query": expression}
+        ).scalar()
+
+    def _like_condition(self, keyword: str):
+        return or_(*[getattr(self.model, column).contains(keyword, autoescape=True) for column in self.columns])
+
+    def _like_search(self, keyword: str, limit: int, offset: int, snippet_column: str) -> List[Dict[str, Any]]:
+        """短关键词：LIKE 查询，按时间倒序，在 Python 中生成高亮"""
+        posts = self.model.query.filter(self._like_condition(keyword))\
+            .order_by(self.model.created_at.desc()).limit(limit).offset(offset).all()
+
+        results = []
+        for post in posts:
+            snippet_source = getattr(post, snippet_column) if snippet_column else None
+            if not snippet_source:
+                snippet_source = next((getattr(post, column) for column in self.columns
+                                       if keyword.lower() in (getattr(post, column) or '').lower()), '')
+            results.append({
+                "id": post.id,
+                "rank": None,
+                "title_highlight": self._highlight(post.title or '', keyword),
+                "snippet": self._highlight(self._excerpt(snippet_source or '', keyword), keyword)
+            })
+        return results
+
+    @staticmethod
+    def _excerpt(value: str, keyword: str, width: int = 60) -> str:
+        position = value.lower().find(keyword.lower())
+        if position < 0:
+            return value[:width * 2] + ('…' if len(value) > width * 2 else '')
+        start = max(0, position - width)
+        end = position + len(keyword) + width
+        return ('…' if start > 0 else '') + value[start:end] + ('…' if end < len(value) else '')
+
+    @classmethod
+    def _highlight(cls, value: str, keyword: str) -> str:
+        marked = re.sub(re.escape(keyword), lambda m: f'{_MARK_OPEN}{m.group(0)}{_MARK_CLOSE}', value,
+                        flags=re.IGNORECASE)
+        return cls._render_marks(marked)
+
+    @staticmethod
+    def _render_marks(value: Optional[str]) -> str:
+        return html.escape(value or '').replace(_MARK_OPEN, '<mark>').replace(_MARK_CLOSE, '</mark>')
+
+    def _detect_tokenizer(self) -> Optional[str]:
+        """读取已有索引表使用的分词器，索引表不存在时返回 None"""
+        if self.tokenizer is None:
+            sql = self.db.session.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": self.fts_table}
+            ).scalar()
+            if sql is not None:
+                self.tokenizer = 'trigram' if 'trigram' in sql else 'unicode61'
+        return self.tokenizer
+
+    @staticmethod
+    def _trigram_supported(connection) -> bool:
+        try:
+            connection.execute(text("CREATE VIRTUAL TABLE temp._trigram_probe USING fts5(x, tokenize='trigram')"))
+            connection.execute(text("DROP TABLE temp._trigram_probe"))
+            return True
+        except Exception:
+            return False
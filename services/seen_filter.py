@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+已见帖子过滤器 - 进程内布隆过滤器
+保存已入库帖子的规范化URL和帖子指纹，"一定是新帖子"时无需查询数据库，
+只有可能命中时才回退到数据库确认
+"""
+
+import hashlib
+import math
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+from loguru import logger
+
+from crawlers.link_cache import canonicalize_url
+
+DEFAULT_CAPACITY = 200000  # 预计保存的键数量
+DEFAULT_ERROR_RATE = 0.001  # 目标误判率
+
+
+class BloomFilter:
+    """布隆过滤器（位数组 + 双重哈希）"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        # 最优位数 m = -n·ln(p) / (ln2)²，哈希函数个数 k = m/n·ln2
+        self.num_bits = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self.bits)
+
+    def estimated_error_rate(self) -> float:
+        """按已添加的键数估算当前误判率 (1 - e^(-kn/m))^k"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class SeenPostFilter:
+    """已见帖子集合（规范化URL + 帖子指纹），线程安全"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+        self.is_warm = False
+        # 运行统计
+        self.definitely_new = 0
+        self.possible_hits = 0
+        self.false_positives = 0
+
+    def warm(self, rows: Iterable[Tuple[Optional[str], Optional[str]]], expected: int = 0):
+        """用数据库中已有帖子的 (post_url, post_hash) 重建过滤器"""
+        # 每个帖子最多2个键（指纹和链接），再留一倍的增长空间
+        bloom = BloomFilter(max(self.capacity, expected * 4), self.error_rate)
+        for post_url, post_hash in rows:
+            for key in self._keys(post_url, post_hash):
+                bloom.add(key)
+
+        with self._lock:
+            self._bloom = bloom
+            self.is_warm = True
+        logger.info(f"✅ 已见帖子过滤器已预热: {bloom.count} 个键，占用 {bloom.memory_bytes / 1024:.0f} KB")
+
+    def add(self, post_url: Optional[str], post_hash: Optional[str]):
+        """帖子入库后调用"""
+        with self._lock:
+            for key in self._keys(post_url, post_hash):
+                self._bloom.add(key)
+
+    def might_contain(self, post_url: Optional[str], post_hash: Optional[str]) -> bool:
+        """返回 False 表示一定是新帖子；未预热时总是返回 True（需查询数据库）"""
+        if not self.is_warm:
+            return True
+
+        bloom = self._bloom
+        hit = any(key in bloom for key in self._keys(post_url, post_hash))
+        if hit:
+            self.possible_hits += 1
+        else:
+            self.definitely_new += 1
+        return hit
+
+    def record_false_positive(self, count: int = 1):
+        """可能命中但数据库确认为新帖子时调用，用于统计实际误判率"""
+        if self.is_warm:
+            self.false_positives += count
+
+    def stats(self) -> Dict[str, Any]:
+        bloom = self._bloom
+        return {
+            "is_warm": self.is_warm,
+            "keys": bloom.count,
+            "capacity": bloom.capacity,
+            "memory_bytes": bloom.memory_bytes,
+            "num_hashes": bloom.num_hashes,
+            "estimated_false_positive_rate": round(bloom.estimated_error_rate(), 6),
+            "definitely_new": self.definitely_new,
+            "possible_hits": self.possible_hits,
+            "false_positives": self.false_positives,
+            "observed_false_positive_rate": round(self.false_positives / self.possible_hits, 6)
+            if self.possible_hits else 0.0
+        }
+
+    @staticmethod
+    def _keys(post_url: Optional[str], post_hash: Optional[str]):
+        if post_hash:
+            yield f"h:{post_hash}"
+        if post_url:
+            yield f"u:{canonicalize_url(post_url)}"
+
+
+def _load_filter_settings():
+    """读取配置文件中的 SEEN_FILTER_CAPACITY / SEEN_FILTER_ERROR_RATE"""
+    capacity, error_rate = DEFAULT_CAPACITY, DEFAULT_ERROR_RATE
+    try:
+        import config
+        capacity = int(getattr(config, 'SEEN_FILTER_CAPACITY', capacity))
+        error_rate = float(getattr(config, 'SEEN_FILTER_ERROR_RATE', error_rate))
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.warning(f"⚠️ 已见帖子过滤器配置无效，使用默认值: {e}")
+        capacity, error_rate = DEFAULT_CAPACITY, DEFAULT_ERROR_RATE
+    return capacity, error_rate
+
+
+# 全局已见帖子过滤器，进程内共享
+seen_posts = SeenPostFilter(*_load_filter_settings())
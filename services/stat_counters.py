@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+统计计数服务 - 物化的统计计数器
+计数由 SQLite 触发器在插入、更新、删除时增量维护（批量插入、批量删除同样生效），
+首页和统计接口直接读取计数表，不再对明细表执行 COUNT / DISTINCT；
+定期核对任务从明细表重新计算，修正可能的偏差
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import func, text
+from loguru import logger
+
+HOUR_RETENTION_HOURS = 48  # 按小时的计数只保留最近48小时（用于最近24小时统计）
+
+
+class CounterSpec:
+    """一个计数器定义：对 table 中满足 condition 的行，按 key 分组计数
+
+    key 和 condition 为 SQL 模板，{row} 在触发器中替换为 new./old.，核对时替换为空
+    """
+
+    def __init__(self, metric: str, table: str, scope: str = 'total', key: str = "''",
+                 condition: Optional[str] = None, columns: Sequence[str] = ()):
+        self.metric = metric
+        self.table = table
+        self.scope = scope
+        self.key = key
+        self.condition = condition
+        self.columns = list(columns)  # key 和 condition 依赖的字段，这些字段更新时调整计数
+
+    def key_sql(self, row: str) -> str:
+        return f"coalesce({self.key.format(row=row)}, '')"
+
+    def condition_sql(self, row: str) -> str:
+        return f"({self.condition.format(row=row)})" if self.condition else '1'
+
+
+def _day(column: str) -> str:
+    return f"substr({{row}}{column}, 1, 10)"
+
+
+def _hour(column: str) -> str:
+    return f"substr({{row}}{column}, 1, 13)"
+
+
+# 竞品监控库的计数器
+COMPETITOR_COUNTERS = [
+    CounterSpec('posts', 'competitor_posts'),
+    CounterSpec('posts', 'competitor_posts', 'config', "CAST({row}monitor_config_id AS TEXT)",
+                columns=['monitor_config_id']),
+    CounterSpec('posts', 'competitor_posts', 'platform', "{row}platform", columns=['platform']),
+    CounterSpec('posts', 'competitor_posts', 'day', _day('created_at'), columns=['created_at']),
+    CounterSpec('posts', 'competitor_posts', 'hour', _hour('created_at'), columns=['created_at']),
+    CounterSpec('sessions', 'crawl_sessions'),
+    # 按 created_at（UTC）而不是 crawl_time（本地时间）分桶，与 recent() 的时间窗口和核对时的截止时间一致
+    CounterSpec('sessions', 'crawl_sessions', 'day', _day('created_at'), columns=['created_at']),
+    CounterSpec('sessions', 'crawl_sessions', 'hour', _hour('created_at'), columns=['created_at']),
+    CounterSpec('configs', 'monitor_configs'),
+    CounterSpec('active_configs', 'monitor_configs', condition="{row}is_active", columns=['is_active']),
+]
+
+# 内容抓取库的计数器（unarchived 为未存档的帖子）
+CRAWLED_POST_COUNTERS = [
+    CounterSpec('posts', 'crawled_posts'),
+    CounterSpec('posts', 'crawled_posts', 'day', _day('created_at'), columns=['created_at']),
+    CounterSpec('posts', 'crawled_posts', 'source', "{row}source_website", columns=['source_website']),
+    CounterSpec('unarchived', 'crawled_posts', condition="NOT coalesce({row}is_archived, 0)",
+                columns=['is_archived']),
+    CounterSpec('unarchived', 'crawled_posts', 'day', _day('created_at'),
+                condition="NOT coalesce({row}is_archived, 0)", columns=['created_at', 'is_archived']),
+]
+
+
+class StatCounters:
+    """一个数据库的统计计数器"""
+
+    def __init__(self, db, counter_model, specs: List[CounterSpec]):
+        self.db = db
+        self.model = counter_model
+        self.table = counter_model.__tablename__
+        self.specs = specs
+
+    def ensure(self):
+        """（重新）创建维护计数的触发器；计数表为空或计数规则有变化时从明细表重新计算"""
+        changed = False
+        for table in self._tables():
+            specs = [spec for spec in self.specs if spec.table == table]
+            increments = ' '.join(self._increment(spec, 'new.') for spec in specs)
+            decrements = ' '.join(self._decrement(spec, 'old.') for spec in specs)
+            columns = sorted({column for spec in specs for column in spec.columns})
+
+            triggers = {
+                'ai': f"AFTER INSERT ON {table} BEGIN {increments} END",
+                'ad': f"AFTER DELETE ON {table} BEGIN {decrements} END",
+            }
+            if columns:
+                # 只有计数依赖的字段变化时才调整（先按旧值减1，再按新值加1）
+                triggers['au'] = f"AFTER UPDATE OF {', '.join(columns)} ON {table} BEGIN {decrements} {increments} END"
+
+            for suffix in ('ai', 'ad', 'au'):
+                name = f"stat_{table}_{suffix}"
+                statement = f"CREATE TRIGGER {name} {triggers[suffix]}" if suffix in triggers else None
+                existing = self.db.session.execute(
+                    text("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = :name"), {"name": name}
+                ).scalar()
+                changed = changed or (existing is not None and existing != statement)
+                self.db.session.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+                if statement:
+                    self.db.session.execute(text(statement))
+
+        self.db.session.commit()
+
+        if changed or not self.db.session.query(self.model.id).first():
+            self.reconcile()
+
+    def reconcile(self) -> Dict[str, int]:
+        """从明细表重新计算全部计数（同一事务内完成，期间的写入会等待提交）"""
+        try:
+            before = {(row.metric, row.scope, row.key): row.value for row in self.model.query.all()}
+            hour_cutoff = (datetime.utcnow() - timedelta(hours=HOUR_RETENTION_HOURS)).strftime('%Y-%m-%d %H')
+
+            self.db.session.execute(text(f"DELETE FROM {self.table}"))
+            for spec in self.specs:
+                key = spec.key_sql('')
+                condition = spec.condition_sql('')
+                if spec.scope == 'hour':
+                    condition += f" AND {key} >= :hour_cutoff"
+                self.db.session.execute(text(
+                    f"INSERT INTO {self.table} (metric, scope, key, value) "
+                    f"SELECT :metric, :scope, {key}, count(*) FROM {spec.table} WHERE {condition} GROUP BY {key}"
+                ), {"metric": spec.metric, "scope": spec.scope, "hour_cutoff": hour_cutoff})
+            self.db.session.commit()
+
+            after = {(row.metric, row.scope, row.key): row.value for row in self.model.query.all()}
+            corrected = sum(1 for counter, value in after.items()
+                            if counter[1] != 'hour' and before.get(counter, 0) != value)
+            corrected += sum(1 for counter, value in before.items()
+                             if counter[1] != 'hour' and value and counter not in after)
+
+            logger.info(f"📊 统计计数核对完成: {len(after)} 个计数器，修正 {corrected} 个")
+            return {"counters": len(after), "corrected": corrected}
+
+        except Exception as e:
+            logger.error(f"❌ 统计计数核对失败: {e}")
+            self.db.session.rollback()
+            raise
+
+    def get(self, metric: str, scope: str = 'total', key: str = '') -> int:
+        """读取单个计数"""
+        value = self.db.session.query(self.model.value).filter_by(metric=metric, scope=scope, key=key).scalar()
+        return value or 0
+
+    def get_scope(self, metric: str, scope: str) -> Dict[str, int]:
+        """读取某个维度下所有非零计数 {key: value}"""
+        rows = self.db.session.query(self.model.key, self.model.value)\
+            .filter(self.model.metric == metric, self.model.scope == scope, self.model.value > 0).all()
+        return {key: value for key, value in rows}
+
+    def sum_since(self, metric: str, scope: str, start_key: str) -> int:
+        """按 day/hour 维度累加 start_key 及之后的计数（键为可按字符串排序的时间）"""
+        value = self.db.session.query(func.sum(self.model.value)).filter(
+            self.model.metric == metric, self.model.scope == scope, self.model.key >= start_key
+        ).scalar()
+        return value or 0
+
+    def recent(self, metric: str, hours: int = 24) -> int:
+        """最近若干小时的计数（按整点小时桶累加，起始小时整体计入；小时桶与 created_at 一样为UTC时间）"""
+        start_key = (datetime.utcnow() - timedelta(hours=hours)).strftime('%Y-%m-%d %H')
+        return self.sum_since(metric, 'hour', start_key)
+
+    def _tables(self) -> List[str]:
+        return list(dict.fromkeys(spec.table for spec in self.specs))
+
+    def _increment(self, spec: CounterSpec, row: str) -> str:
+        return (f"INSERT INTO {self.table} (metric, scope, key, value) "
+                f"SELECT '{spec.metric}', '{spec.scope}', {spec.key_sql(row)}, 1 WHERE {spec.condition_sql(row)} "
+                f"ON CONFLICT (metric, scope, key) DO UPDATE SET value = value + 1;")
+
+    def _decrement(self, spec: CounterSpec, row: str) -> str:
+        return (f"UPDATE {self.table} SET value = value - 1 "
+                f"WHERE metric = '{spec.metric}' AND scope = '{spec.scope}' AND key = {spec.key_sql(row)} "
+                f"AND {spec.condition_sql(row)};")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+帖子AI总结工作池
+爬虫保存帖子后把总结任务交给有上限的线程池，不再在爬取循环中逐条同步调用模型；
+所有工作线程共用一个AI客户端，多条帖子合并为一次批量总结请求，完成后直接写回帖子的 ai_summary 字段
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import bindparam, or_, update
+from loguru import logger
+
+from config.config import config
+from models.database import CrawledPost
+
+SUMMARY_MAX_LENGTH = 150
+
+
+class SummaryWorkerPool:
+    """帖子AI总结工作池
+
+    max_workers 为并发调用模型的线程数，queue_size 为等待中的任务（每个任务为一批帖子）上限，
+    队列已满时 submit 会阻塞，直到有任务完成（爬取速度远快于总结时限制内存占用）
+    """
+
+    def __init__(self, max_workers: int = None, queue_size: int = None):
+        self.max_workers = max(max_workers or config.ai_summary_workers, 1)
+        self.queue_size = max(queue_size or config.ai_summary_queue_size, 1)
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.queue_size)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._executor = None
+        self._summarizer = None
+        self._pending = set()
+        self._metrics = {'submitted': 0, 'completed': 0, 'failed': 0, 'tasks': 0, 'seconds': 0.0}
+
+    @property
+    def summarizer(self):
+        """共用的AI总结客户端（首次使用时创建）"""
+        with self._lock:
+            if self._summarizer is None:
+                from .ai_summary_service import AISummaryService
+                self._summarizer = AISummaryService()
+            return self._summarizer
+
+    def submit(self, engine, post) -> bool:
+        """提交一个已保存的帖子，已有总结或已在队列中的帖子跳过；返回是否提交"""
+        return self.submit_many(engine, [post]) == 1
+
+    def submit_many(self, engine, posts: Iterable) -> int:
+        """批量提交已保存的帖子，按AI客户端的批量大小分组，每组一个任务（一次模型请求）；返回提交的帖子数
+
+        posts 为带 id、title、content 属性的对象（CrawledPost 或 crawler_service.SavedPost 快照），
+        engine 为写回结果使用的数据库引擎（工作线程没有应用上下文，由调用方传入 db.engine）
+        """
+        candidates = [(post.id, post.title or "", post.content or "")
+                      for post in posts if not getattr(post, 'ai_summary', None) and post.id is not None]
+
+        with self._lock:
+            items = [item for item in candidates if item[0] not in self._pending]
+            if not items:
+                return 0
+            self._pending.update(post_id for post_id, _, _ in items)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='ai-summary')
+            executor = self._executor
+            self._metrics['submitted'] += len(items)
+
+        batch_size = self.summarizer.batch_size
+        for start in range(0, len(items), batch_size):
+            self._slots.acquire()
+            try:
+                executor.submit(self._summarize, engine, items[start:start + batch_size])
+            except Exception:
+                self._slots.release()
+                self._finish([post_id for post_id, _, _ in items[start:]], 'failed')
+                raise
+        return len(items)
+
+    def wait(self, timeout: float = None) -> bool:
+        """等待已提交的任务全部完成，超时返回 False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self._metrics)
+            pending = len(self._pending)
+        return {
+            'max_workers': self.max_workers,
+            'queue_size': self.queue_size,
+            'pending': pending,
+            'submitted': metrics['submitted'],
+            'completed': metrics['completed'],
+            'failed': metrics['failed'],
+            'tasks': metrics['tasks'],
+            'avg_task_seconds': round(metrics['seconds'] / metrics['tasks'], 2) if metrics['tasks'] else None,
+        }
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+    def _summarize(self, engine, items: List[Tuple[int, str, str]]):
+        started = time.perf_counter()
+        outcome = 'failed'
+        try:
+            summaries = self.summarizer.summarize_batch([(title, content) for _, title, content in items],
+                                                        max_length=SUMMARY_MAX_LENGTH)
+            table = CrawledPost.__table__
+            # 只填充仍为空的总结，不覆盖期间手动生成的内容
+            with engine.begin() as conn:
+                conn.execute(update(table)
+                             .where(table.c.id == bindparam('post_id'),
+                                    or_(table.c.ai_summary.is_(None), table.c.ai_summary == ''))
+                             .values(ai_summary=bindparam('summary')),
+                             [{'post_id': post_id, 'summary': summary}
+                              for (post_id, _, _), summary in zip(items, summaries)])
+            outcome = 'completed'
+            logger.info(f"✅ AI总结生成成功: {len(items)} 条帖子")
+        except Exception as e:
+            logger.error(f"❌ AI总结生成失败: {len(items)} 条帖子, 错误: {e}")
+        finally:
+            self._slots.release()
+            self._finish([post_id for post_id, _, _ in items], outcome, time.perf_counter() - started)
+
+    def _finish(self, post_ids: List[int], outcome: str, seconds: float = 0.0):
+        with self._idle:
+            self._pending.difference_update(post_ids)
+            self._metrics[outcome] += len(post_ids)
+            self._metrics['tasks'] += 1
+            self._metrics['seconds'] += seconds
+            if not self._pending:
+                self._idle.notify_all()
+
+
+# 全局总结工作池，所有爬虫服务实例共用
+summary_pool = SummaryWorkerPool()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+网页快照服务
+按版本保存网页更新模式的历史内容：每隔若干版本保存一个全文关键帧，
+其余版本只保存相对上一版本的行级增量，可重建任意版本并对比任意两个版本
+"""
+
+import hashlib
+import json
+import os
+import zlib
+from typing import List, Dict, Any, Optional
+from models.competitor_models import db, WebpageSnapshot
+from crawlers.content_diff import split_blocks, fingerprint_blocks, added_blocks, line_delta, apply_line_delta
+from loguru import logger
+
+# 默认每20个版本保存一个关键帧，限制重建时需要回放的增量数量
+DEFAULT_KEYFRAME_INTERVAL = 20
+
+class WebpageSnapshotService:
+    """网页快照服务"""
+
+    def __init__(self):
+        self.keyframe_interval = self._get_keyframe_interval()
+
+    def _get_keyframe_interval(self) -> int:
+        """获取关键帧间隔 - 优先从配置文件，然后环境变量，默认20"""
+        value = None
+
+        # 1. 优先从配置文件获取
+        try:
+            import config
+            value = getattr(config, 'SNAPSHOT_KEYFRAME_INTERVAL', None)
+        except ImportError:
+            pass
+
+        # 2. 从环境变量获取
+        if value is None:
+            value = os.getenv('SNAPSHOT_KEYFRAME_INTERVAL')
+
+        try:
+            return max(1, int(value)) if value is not None else DEFAULT_KEYFRAME_INTERVAL
+        except (TypeError, ValueError):
+            logger.warning(f"⚠️ 无效的快照关键帧间隔配置: {value}，使用默认值{DEFAULT_KEYFRAME_INTERVAL}")
+            return DEFAULT_KEYFRAME_INTERVAL
+
+    def record_snapshot(self, config_id: int, content: str, content_hash: str = None,
+                        previous_content: str = None) -> Optional[WebpageSnapshot]:
+        """记录网页的新版本（只添加到会话，由调用方提交）
+
+        previous_content 为调用方已有的上一版本文本（如网页状态表中的内容），
+        与最新快照一致时直接用来计算增量，避免从关键帧重建。
+        尚无快照时会先把 previous_content 保存为第1个版本，保留迁移前的基线。
+        """
+        content = content or ''
+        content_hash = content_hash or self._hash(content)
+
+        latest = WebpageSnapshot.query.filter_by(monitor_config_id=config_id)\
+            .order_by(WebpageSnapshot.version.desc()).first()
+
+        if latest is None and previous_content:
+            latest = self._add_keyframe(config_id, 1, previous_content, self._hash(previous_content))
+
+        if latest is None:
+            return self._add_keyframe(config_id, 1, content, content_hash)
+
+        if latest.content_hash == content_hash:
+            return latest
+
+        if previous_content is None or self._hash(previous_content) != latest.content_hash:
+            previous_content = self._rebuild(config_id, latest.version)
+
+        version = latest.version + 1
+        keyframe_payload = zlib.compress(content.encode('utf-8'))
+
+        if version - latest.keyframe_version >= self.keyframe_interval:
+            return self._add_keyframe(config_id, version, content, content_hash, keyframe_payload)
+
+        ops = line_delta(previous_content.split('\n'), content.split('\n'))
+        delta_payload = zlib.compress(json.dumps(ops, ensure_ascii=False).encode('utf-8'))
+
+        # 变化过大时增量不比全文小，直接保存关键帧
+        if len(delta_payload) >= len(keyframe_payload):
+            return self._add_keyframe(config_id, version, content, content_hash, keyframe_payload)
+
+        snapshot = WebpageSnapshot(
+            monitor_config_id=config_id,
+            version=version,
+            is_keyframe=False,
+            keyframe_version=latest.keyframe_version,
+            content_hash=content_hash,
+            content_length=len(content),
+            payload=delta_payload
+        )
+        db.session.add(snapshot)
+        logger.debug(f"📸 记录网页快照 config={config_id} v{version}（增量 {len(delta_payload)} 字节）")
+        return snapshot
+
+    def list_snapshots(self, config_id: int) -> List[Dict[str, Any]]:
+        """获取配置的所有快照版本（不含内容）"""
+        snapshots = WebpageSnapshot.query.filter_by(monitor_config_id=config_id)\
+            .order_by(WebpageSnapshot.version.desc()).all()
+        return [snapshot.to_dict() for snapshot in snapshots]
+
+    def get_version(self, config_id: int, version: int) -> Dict[str, Any]:
+        """重建指定版本的网页内容"""
+        try:
+            snapshot = WebpageSnapshot.query.filter_by(monitor_config_id=config_id, version=version).first()
+            if not snapshot:
+                return {"success": False, "message": "快照版本不存在"}
+
+            result = snapshot.to_dict()
+            result['content'] = self._rebuild(config_id, version)
+            result['success'] = True
+            return result
+
+        except Exception as e:
+            logger.error(f"❌ 重建网页快照失败: {e}")
+            return {"success": False, "message": str(e)}
+
+    def diff_versions(self, config_id: int, from_version: int, to_version: int) -> Dict[str, Any]:
+        """对比两个版本，返回新增和删除的内容行"""
+        try:
+            versions = {from_version, to_version}
+            found = WebpageSnapshot.query.filter(
+                WebpageSnapshot.monitor_config_id == config_id,
+                WebpageSnapshot.version.in_(versions)
+            ).count()
+            if found != len(versions):
+                return {"success": False, "message": "快照版本不存在"}
+
+            old_blocks = split_blocks(self._rebuild(config_id, from_version))
+            new_blocks = split_blocks(self._rebuild(config_id, to_version))
+
+            return {
+                "success": True,
+                "config_id": config_id,
+                "from_version": from_version,
+                "to_version": to_version,
+                "added": added_blocks(fingerprint_blocks(old_blocks), new_blocks, min_length=0),
+                "removed": added_blocks(fingerprint_blocks(new_blocks), old_blocks, min_length=0)
+            }
+
+        except Exception as e:
+            logger.error(f"❌ 对比网页快照失败: {e}")
+            return {"success": False, "message": str(e)}
+
+    def _add_keyframe(self, config_id: int, version: int, content: str, content_hash: str,
+                      payload: bytes = None) -> WebpageSnapshot:
+        snapshot = WebpageSnapshot(
+            monitor_config_id=config_id,
+            version=version,
+            is_keyframe=True,
+            keyframe_version=version,
+            content_hash=content_hash,
+            content_length=len(content),
+            payload=payload or zlib.compress(content.encode('utf-8'))
+        )
+        db.session.add(snapshot)
+        logger.debug(f"📸 记录网页快照 config={config_id} v{version}（关键帧）")
+        return snapshot
+
+    def _rebuild(self, config_id: int, version: int) -> str:
+        """从关键帧开始依次应用增量，重建指定版本的文本"""
+        target = WebpageSnapshot.query.filter_by(monitor_config_id=config_id, version=version).first()
+        if not target:
+            raise ValueError(f"快照版本不存在: v{version}")
+
+        chain = db.session.query(WebpageSnapshot.is_keyframe, WebpageSnapshot.payload).filter(
+            WebpageSnapshot.monitor_config_id == config_id,
+            WebpageSnapshot.version >= target.keyframe_version,
+            WebpageSnapshot.version <= version
+        ).order_by(WebpageSnapshot.version).all()
+
+        lines = []
+        for is_keyframe, payload in chain:
+            data = zlib.decompress(payload).decode('utf-8')
+            if is_keyframe:
+                lines = data.split('\n')
+            else:
+                lines = apply_line_delta(lines, json.loads(data))
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _hash(content: str) -> str:
+        return hashlib.md5(content.encode('utf-8')).hexdigest()
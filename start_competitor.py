@@ -12,7 +12,7 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 try:
-    from competitor_app import app, init_database, init_sample_configs, init_scheduler
+    from competitor_app import app, init_database, init_sample_configs, init_scheduler, init_ai_job_queue
     from loguru import logger
     
     def main():
@@ -33,6 +33,10 @@ try:
             print("⏰ 初始化定时任务...")
             init_scheduler()
             
+            # 启动AI任务队列
+            print("🤖 启动AI任务队列...")
+            init_ai_job_queue()
+            
             # 获取端口
             port = int(os.environ.get('PORT', 8080))
             